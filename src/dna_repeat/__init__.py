@@ -1,6 +1,4 @@
 # src/dna_repeat/__init__.py
 
-from importlib.metadata import version
-
 __all__ = []
-__version__ = version('dna-repeat')
\ No newline at end of file
+__version__ = '1.0.0'   # single source of the version (pyproject.toml reads it); importlib.metadata costs ~70 ms per start
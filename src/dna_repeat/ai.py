@@ -2,8 +2,9 @@
     # Core code either written or inspired by AI. (written ones are marked by "[MADE BY AI]")
     ## Faster repeat-finding algorithm; converts k-mers to 2*k bits and does some bit tricks to check for repeats! About 5x faster than string slicing method
 
+from typing import Iterator
 from dna_repeat.constants import BASE_TO_INT
-from dna_repeat.core import RepeatHit, reverse_complement
+from dna_repeat.core import PairCounter, RepeatHit, make_hit, reverse_complement, subject_window
 
 def dna_to_int(seq: str) -> int: 
     '''[MADE BY AI] Executes DNA_seq-to-integer conversion; DNA string -> 2*k bits (int)'''
@@ -38,6 +39,24 @@ def encode_kmers(seq: str, kmer_length: int) -> list[int]:
                                                             # result is going to be 2 0's on the left so...trimmed!
     return codes
 
+def encode_kmers_both(seq: str, kmer_length: int) -> tuple[list[int], list[int]]:
+    '''Returns (codes, rc_codes): 2-bit codes of all k-mers and of their reverse complements (rc_codes[i] = code of revcomp of
+    k-mer i), from one rolling pass. The complement of a 2-bit base is 3 - x (A <-> T, C <-> G), so no string is reversed'''
+    n_kmers = len(seq) - kmer_length + 1
+    codes = [0] * n_kmers
+    rc_codes = [0] * n_kmers
+    mask: int = ((1 << (2 * kmer_length)) - 1)
+    top_shift = 2 * (kmer_length - 1)                       # complement of the newest base goes in front of the rc k-mer
+    code = rc_code = 0
+    for pos, base in enumerate(seq):
+        val = BASE_TO_INT[base]
+        code = ((code << 2) | val) & mask
+        rc_code = (rc_code >> 2) | ((3 - val) << top_shift)
+        if pos >= kmer_length - 1:
+            codes[pos - kmer_length + 1] = code
+            rc_codes[pos - kmer_length + 1] = rc_code
+    return codes, rc_codes
+
 def hamming_distance_2bit(code_a: int, code_b: int, kmer_length: int) -> int:
     '''[MADE BY AI] Calculates the hamming distance between to 2-bit-encoded sequence using some fancy bit tricks'''
     diff = code_a ^ code_b                              # Find bit mismatches using XOR (^). A mismatch will be either 01, 10, or 11
@@ -52,50 +71,58 @@ def hamming_distance_2bit(code_a: int, code_b: int, kmer_length: int) -> int:
     return (m & lsb_bit_mask).bit_count()               # Apply mask by ANDing on m. Now all mismatches are 01 and can be simply bit-counted to get # mismatches
 
 
-def find_repeats_2bit(rec_id: str, seq: str, kmer_length: int, allowed_mismatches: int) -> list[RepeatHit]:
+def find_repeats_2bit(rec_id: str, seq: str, kmer_length: int, allowed_mismatches: int,
+                      min_distance: int = 0, max_distance: int | None = None) -> list[RepeatHit]:
     '''Find direct repeats by 2-bit encoding (bitwise comparisons) and nested loop'''
-    hits: list[RepeatHit] = []
+    return list(iter_repeats_2bit(rec_id, seq, kmer_length, allowed_mismatches, min_distance, max_distance))
+
+def iter_repeats_2bit(rec_id: str, seq: str, kmer_length: int, allowed_mismatches: int,
+                      min_distance: int = 0, max_distance: int | None = None) -> Iterator[RepeatHit]:
+    '''Generator version of find_repeats_2bit; yields hits one at a time'''
+    for i, j, mismatches in iter_pairs_2bit(seq, kmer_length, allowed_mismatches, min_distance, max_distance):
+        yield make_hit(rec_id, seq, kmer_length, i, j, mismatches, 'direct')
+
+def iter_pairs_2bit(seq: str, kmer_length: int, allowed_mismatches: int,
+                    min_distance: int = 0, max_distance: int | None = None, *, counter: PairCounter | None = None) -> Iterator[tuple[int, int, int]]:
+    '''Yields (query pos, subject pos, mismatches) of direct repeats; 0-based k-mer starts.
+    Only pairs with min_distance <= subject pos - query pos <= max_distance are compared (counted in counter, if given)'''
     codes = encode_kmers(seq, kmer_length)
     
     for i in range(len(codes)):
-        for j in range(i + 1, len(codes)):
+        first, stop = subject_window(i, len(codes), min_distance, max_distance)
+        first = max(i + 1, first)
+        if counter:
+            counter.pairs += max(0, stop - first)
+        for j in range(first, stop):
             mismatches = hamming_distance_2bit(codes[i], codes[j], kmer_length)
             if mismatches <= allowed_mismatches:
-                hits.append(RepeatHit(
-                    record_id = rec_id,
-                    query_start = i + 1,
-                    query_end = i + kmer_length,
-                    subject_start = j + 1,
-                    subject_end = j + kmer_length,
-                    query_seq = seq[i:i + kmer_length],
-                    subject_seq = seq[j:j + kmer_length],
-                    mismatches = mismatches,
-                    kmer_length = kmer_length,
-                    orientation = 'direct'
-                    ))
-    return hits
-
-def find_invert_repeats_2bit(rec_id: str, seq: str, kmer_length: int, allowed_mismatches: int) -> list[RepeatHit]:
+                yield i, j, mismatches
+
+def find_invert_repeats_2bit(rec_id: str, seq: str, kmer_length: int, allowed_mismatches: int,
+                             min_distance: int = 0, max_distance: int | None = None) -> list[RepeatHit]:
     '''Find indirect repeats by 2-bit encoding (bitwise comparisons) and nested loop'''
+    return list(iter_invert_repeats_2bit(rec_id, seq, kmer_length, allowed_mismatches, min_distance, max_distance))
+
+def iter_invert_repeats_2bit(rec_id: str, seq: str, kmer_length: int, allowed_mismatches: int,
+                             min_distance: int = 0, max_distance: int | None = None) -> Iterator[RepeatHit]:
+    '''Generator version of find_invert_repeats_2bit; yields hits one at a time'''
+    for i, p, mismatches in iter_invert_pairs_2bit(seq, kmer_length, allowed_mismatches, min_distance, max_distance):
+        yield make_hit(rec_id, seq, kmer_length, i, p, mismatches, 'inverted')
+
+def iter_invert_pairs_2bit(seq: str, kmer_length: int, allowed_mismatches: int,
+                           min_distance: int = 0, max_distance: int | None = None, *, counter: PairCounter | None = None) -> Iterator[tuple[int, int, int]]:
+    '''Yields (query pos, subject pos, mismatches) of inverted repeats; 0-based k-mer starts, subject on the forward strand.
+    Only pairs with min_distance <= subject pos - query pos <= max_distance are compared (counted in counter, if given)'''
     seq_rc = reverse_complement(seq)
-    hits: list[RepeatHit] = []
     codes = encode_kmers(seq, kmer_length)
     codes_rc = encode_kmers(seq_rc, kmer_length)
+    n = len(codes_rc)
 
     for i in range(len(codes)):
-        for j in range(len(codes_rc) - i):
+        first, stop = subject_window(i, n, min_distance, max_distance)
+        if counter:
+            counter.pairs += max(0, stop - first)
+        for j in range(n - stop, n - first):                # rev. comp. k-mer j starts at n - 1 - j on the forward strand
             mismatches = hamming_distance_2bit(codes[i], codes_rc[j], kmer_length)
             if mismatches <= allowed_mismatches:
-                hits.append(RepeatHit(
-                    record_id = rec_id,
-                    query_start = i + 1,
-                    query_end = i + kmer_length,
-                    subject_start = len(seq) - j - kmer_length + 1,
-                    subject_end = len(seq) - j,
-                    query_seq = seq[i:i + kmer_length],
-                    subject_seq = seq[len(seq) - j - kmer_length:len(seq) - j],
-                    mismatches = mismatches,
-                    kmer_length = kmer_length,
-                    orientation = 'inverted'
-                    ))
-    return hits
\ No newline at end of file
+                yield i, len(seq) - j - kmer_length, mismatches   # k-mer j of the rev. comp. starts here on the forward strand
@@ -0,0 +1,51 @@
+# src/dna_repeat/ambiguity.py
+# Ambiguity-aware scanning. Instead of rejecting a sequence with N gaps / IUPAC codes, it is split into ACGT-only segments.
+# The segments (>= k bp) are joined and searched as one sequence; k-mers that cross a junction are dropped and the rest are
+# mapped back to original-sequence coordinates. So repeats between different segments are found too.
+
+import re
+from bisect import bisect_right
+from typing import Callable, Iterator
+
+ACGT_RUN = re.compile(r'[ACGT]+')
+
+class SegmentMap:
+    '''ACGT-only segments of a sequence (each >= k bp), joined into one string, with a map back to original positions'''
+
+    def __init__(self, seq: str, kmer_length: int) -> None:
+        self.kmer_length = kmer_length
+        self.segments: list[tuple[int, int]] = [m.span() for m in ACGT_RUN.finditer(seq) if m.end() - m.start() >= kmer_length]
+        self.joined = ''.join(seq[start:end] for start, end in self.segments)
+        self.joined_starts: list[int] = []                  # where each segment starts in the joined string
+        pos = 0
+        for start, end in self.segments:
+            self.joined_starts.append(pos)
+            pos += end - start
+
+    def to_original(self, pos: int) -> int | None:
+        '''Maps a k-mer start in the joined string to the original sequence. None if the k-mer crosses a junction'''
+        s = bisect_right(self.joined_starts, pos) - 1
+        start, end = self.segments[s]
+        original = start + pos - self.joined_starts[s]
+        return original if original + self.kmer_length <= end else None
+
+def iter_segment_pairs(find: Callable[..., Iterator[tuple]], seq: str, kmer_length: int, allowed_mismatches: int,
+                       min_distance: int = 0, max_distance: int | None = None, **extra) -> Iterator[tuple]:
+    '''Runs an engine's pair generator on the ACGT segments of seq; yields pairs in original coordinates (same order).
+    Any fields after the two positions (mismatches, inverted flag) are passed through. The distance band applies to
+    original coordinates; the engine only gets max_distance, since removing gaps can only bring two k-mers closer'''
+    segment_map = SegmentMap(seq, kmer_length)
+    if not segment_map.segments:
+        return
+    if segment_map.segments == [(0, len(seq))]:             # nothing ambiguous
+        yield from find(seq, kmer_length, allowed_mismatches, min_distance=min_distance, max_distance=max_distance, **extra)
+        return
+    to_original = segment_map.to_original
+    for query_pos, subject_pos, *rest in find(segment_map.joined, kmer_length, allowed_mismatches, max_distance=max_distance, **extra):
+        query_original = to_original(query_pos)
+        subject_original = to_original(subject_pos)
+        if query_original is None or subject_original is None:
+            continue
+        distance = subject_original - query_original
+        if distance >= min_distance and (max_distance is None or distance <= max_distance):
+            yield query_original, subject_original, *rest
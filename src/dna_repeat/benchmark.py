@@ -0,0 +1,157 @@
+# src/dna_repeat/benchmark.py
+# Benchmark and scaling suite ("dna-repeat bench"). Every engine (plus the original string-slicing search as a baseline) is timed
+# on the same deterministic synthetic sequences (synthetic.py) across sequence lengths, k and m. Reports run time, throughput
+# (bp/s, and k-mer pairs/s = pairs a brute-force search would compare, so engines are comparable), peak memory (tracemalloc,
+# separate run) and the scaling exponent (slope of log time vs. log length). All engines must give identical hit sets, and
+# every planted repeat must be found
+
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Callable, Iterator
+import numpy as np
+from dna_repeat.core import find_repeats
+from dna_repeat.engines import ENGINES, EXACT_ONLY_ENGINES
+from dna_repeat.scan import ScanParams, iter_record_pairs
+from dna_repeat.synthetic import PlantedRepeat, synthetic_sequence
+
+BASELINE = 'string'
+'''The original string-slicing search (core.find_repeats). Direct repeats only: its inverted search covers a different subject
+range than the engines, so it can't be cross-checked'''
+
+BENCH_ENGINES: list[str] = [*ENGINES, BASELINE]
+
+BENCH_COLUMNS: list[str] = ['engine', 'length', 'kmer_length', 'mismatches', 'orientation', 'seconds', 'hits', 'bp_per_s',
+                            'pairs_per_s', 'peak_mib']
+
+@dataclass
+class BenchResult:
+    '''Timing of one engine on one synthetic sequence'''
+    engine: str
+    length: int
+    kmer_length: int
+    allowed_mismatches: int
+    orientation: str                # 'both', 'direct' or 'inverted'
+    seconds: float                  # best of the timed runs
+    hits: int
+    peak_bytes: int | None = None   # None if memory wasn't measured
+
+    @property
+    def bp_per_s(self) -> float:
+        return self.length / self.seconds if self.seconds else float('inf')
+
+    @property
+    def pairs_per_s(self) -> float:
+        '''k-mer pairs covered per second (what a brute-force search compares)'''
+        pairs = kmer_pairs(self.length, self.kmer_length, self.orientation)
+        return pairs / self.seconds if self.seconds else float('inf')
+
+    def row(self) -> tuple:
+        peak_mib = round(self.peak_bytes / 2**20, 2) if self.peak_bytes is not None else None
+        return (self.engine, self.length, self.kmer_length, self.allowed_mismatches, self.orientation, round(self.seconds, 4),
+                self.hits, round(self.bp_per_s), round(self.pairs_per_s), peak_mib)
+
+def kmer_pairs(length: int, kmer_length: int, orientation: str) -> int:
+    '''Number of k-mer pairs a brute-force search compares (direct: i < j; inverted: subject pos >= query pos)'''
+    n = max(0, length - kmer_length + 1)
+    return (n * (n - 1) // 2 if orientation != 'inverted' else 0) + (n * (n + 1) // 2 if orientation != 'direct' else 0)
+
+def engine_pairs(engine: str, seq: str, kmer_length: int, allowed_mismatches: int, direct: bool = True,
+                 inverted: bool = True) -> list[tuple[int, int, int, bool]]:
+    '''All (query pos, subject pos, mismatches, inverted) of seq found by engine, the way a scan runs it'''
+    if engine == BASELINE:
+        return [(hit.query_start - 1, hit.subject_start - 1, hit.mismatches, False)
+                for hit in find_repeats('', seq, kmer_length, allowed_mismatches)]
+    params = ScanParams(kmer_length=kmer_length, allowed_mismatches=allowed_mismatches, engine=engine, do_direct=direct,
+                        do_inverted=inverted)
+    return list(iter_record_pairs(seq, params))
+
+def measure(search: Callable[[], list], repeat: int = 1, memory: bool = True) -> tuple[list, float, int | None]:
+    '''Runs search repeat times; returns (its result, best time in s, peak traced memory in bytes or None). Memory is measured
+    in an extra run, since tracing slows allocation-heavy code down'''
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = search()
+        best = min(best, time.perf_counter() - start)
+    peak = None
+    if memory:
+        del result
+        tracemalloc.start()
+        try:
+            result = search()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return result, best, peak
+
+def cross_check(pairs: dict[str, list[tuple[int, int, int, bool]]], planted: list[PlantedRepeat], kmer_length: int,
+                allowed_mismatches: int, direct: bool = True, inverted: bool = True) -> list[str]:
+    '''Problems found in the hit sets of one sequence: engines that disagree with the first one, and planted repeats (with at
+    most allowed_mismatches) that are missing. An empty list means everything checks out'''
+    problems: list[str] = []
+    engines = [engine for engine in pairs if engine != BASELINE]
+    reference_engine = engines[0] if engines else BASELINE
+    reference = set(pairs[reference_engine])
+    for engine, engine_hits in pairs.items():
+        expected = reference if engine != BASELINE or reference_engine == BASELINE else {hit for hit in reference if not hit[3]}
+        found = set(engine_hits)
+        if len(found) != len(engine_hits):
+            problems.append(f'{engine}: {len(engine_hits) - len(found)} duplicate hits')
+        if found != expected:
+            problems.append(f'{engine}: {len(found - expected)} extra / {len(expected - found)} missing hits vs. {reference_engine}')
+    positions = {(query_pos, subject_pos, is_inverted) for query_pos, subject_pos, _, is_inverted in reference}
+    for repeat in planted:
+        wanted = inverted if repeat.inverted else direct
+        if wanted and repeat.mismatches <= allowed_mismatches and (*repeat.first_pair(kmer_length), repeat.inverted) not in positions:
+            kind = 'inverted' if repeat.inverted else 'direct'
+            problems.append(f'{reference_engine}: planted {kind} repeat at {repeat.query_pos}/{repeat.subject_pos} not found')
+    return problems
+
+def scaling_exponents(results: list[BenchResult]) -> dict[tuple[str, int, int, str], float]:
+    '''(engine, k, m, orientation) -> exponent b of time ~ length^b, fitted over the lengths it ran on (needs >= 2 lengths)'''
+    series: dict[tuple[str, int, int, str], list[tuple[int, float]]] = {}
+    for result in results:
+        key = (result.engine, result.kmer_length, result.allowed_mismatches, result.orientation)
+        series.setdefault(key, []).append((result.length, result.seconds))
+    exponents: dict[tuple[str, int, int, str], float] = {}
+    for key, points in series.items():
+        lengths, seconds = np.array(points, dtype=float).T
+        if len(set(lengths)) >= 2 and (seconds > 0).all():
+            exponents[key] = float(np.polyfit(np.log(lengths), np.log(seconds), 1)[0])
+    return exponents
+
+def iter_benchmark(lengths: list[int], kmer_lengths: list[int], mismatch_counts: list[int], engines: list[str] = BENCH_ENGINES,
+                   seed: int = 0, direct: bool = True, inverted: bool = True, repeat: int = 1, memory: bool = True,
+                   max_seconds: float | None = None, problems: list[str] | None = None) -> Iterator[BenchResult]:
+    '''Yields a BenchResult per engine, length, k and m (shortest sequences first). Engines that can't run a combination
+    (exact with m > 0, the baseline without direct search, m > k/2) are left out, and an engine that took longer than
+    max_seconds is not run on longer sequences. Cross-check problems are appended to problems. Every engine runs once untimed
+    on the shortest sequence before its first timed run, so lazy imports (NumPy) and other first-call costs aren't timed'''
+    orientation = 'both' if direct and inverted else 'direct' if direct else 'inverted'
+    too_slow: set[tuple[str, int, int]] = set()
+    lengths = sorted(lengths)
+    for length in lengths:
+        for kmer_length in kmer_lengths:
+            for allowed_mismatches in mismatch_counts:
+                if allowed_mismatches > kmer_length / 2:
+                    continue
+                seq, planted = synthetic_sequence(length, seed, mismatches=allowed_mismatches,
+                                                  repeat_length=max(40, 2 * kmer_length))
+                pairs: dict[str, list[tuple[int, int, int, bool]]] = {}
+                for engine in engines:
+                    if ((engine in EXACT_ONLY_ENGINES and allowed_mismatches) or (engine == BASELINE and not direct)
+                            or (engine, kmer_length, allowed_mismatches) in too_slow):
+                        continue
+                    engine_direct, engine_inverted = (True, False) if engine == BASELINE else (direct, inverted)
+                    search = lambda: engine_pairs(engine, seq, kmer_length, allowed_mismatches, engine_direct, engine_inverted)
+                    if length == lengths[0]:
+                        search()            # warm-up
+                    pairs[engine], seconds, peak = measure(search, repeat, memory)
+                    if max_seconds is not None and seconds > max_seconds:
+                        too_slow.add((engine, kmer_length, allowed_mismatches))
+                    yield BenchResult(engine, length, kmer_length, allowed_mismatches,
+                                      'direct' if engine == BASELINE else orientation, seconds, len(pairs[engine]), peak)
+                if problems is not None and pairs:
+                    problems += [f'length {length}, k {kmer_length}, m {allowed_mismatches}: {problem}'
+                                 for problem in cross_check(pairs, planted, kmer_length, allowed_mismatches, direct, inverted)]
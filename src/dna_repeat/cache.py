@@ -0,0 +1,133 @@
+# src/dna_repeat/cache.py
+# Content-addressed on-disk cache of per-record hit tables. The key is a hash of the cleaned sequence and every parameter that
+# changes the hits, so an unchanged record is never searched twice. Files are the raw HitTable columns (no pickle); the least
+# recently used ones are evicted once the cache grows past its size limit
+
+import hashlib
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from pathlib import Path
+from typing import TYPE_CHECKING
+from dna_repeat import __version__
+from dna_repeat.hits import HitTable
+
+if TYPE_CHECKING:
+    from dna_repeat.packed import PackedSequence
+
+CACHE_FORMAT = 1
+'''Bump when the file layout or the meaning of cached hits changes; old entries are then simply never hit again'''
+
+DEFAULT_CACHE_BYTES = 512 * 1024 * 1024
+
+HEADER = struct.Struct('<4sIIB')
+'''magic, number of hits, k-mer length, has per-hit lengths'''
+MAGIC = b'DRH1'
+
+def default_cache_dir() -> Path:
+    '''$XDG_CACHE_HOME/dna-repeat, or ~/.cache/dna-repeat'''
+    return Path(os.environ.get('XDG_CACHE_HOME') or Path.home() / '.cache') / 'dna-repeat'
+
+def cache_key(seq: 'str | PackedSequence', fields: tuple) -> str:
+    '''Hex digest of the cleaned sequence (or of a packed record's bytes and runs) plus the result-relevant parameters'''
+    h = hashlib.sha256()
+    h.update(repr((CACHE_FORMAT, __version__, fields)).encode())
+    h.update(b'\0')
+    h.update(seq.encode('ascii') if isinstance(seq, str) else seq.cache_bytes())
+    return h.hexdigest()
+
+def entry_bytes(hits: HitTable) -> int:
+    '''Size of the file a hit table is stored in'''
+    columns = [hits.query_start, hits.subject_start, hits.mismatches, hits.inverted] + ([hits.lengths] if hits.lengths is not None else [])
+    return HEADER.size + sum(len(column) * column.itemsize for column in columns)
+
+class ResultCache:
+    '''Directory of cached hit tables, one file per key. Safe to share between processes (writes are atomic renames)'''
+
+    def __init__(self, directory: Path, max_bytes: int = DEFAULT_CACHE_BYTES) -> None:
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f'{key}.hits'
+
+    def get(self, key: str, record_id: str, seq: str) -> HitTable | None:
+        '''Cached hit table for key (with the given record ID and sequence), or None. A hit marks the entry as recently used'''
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+            os.utime(path)
+        except OSError:
+            return None
+        try:
+            return _decode(data, record_id, seq)
+        except (ValueError, struct.error):          # truncated/foreign file; treat as a miss, it gets overwritten
+            return None
+
+    def put(self, key: str, hits: HitTable) -> None:
+        '''Stores a hit table. Errors (read-only or full disk) are ignored; the cache is only an optimization'''
+        path = self._path(key)
+        tmp_name = None
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(_encode(hits))
+            os.replace(tmp_name, path)
+        except OSError:
+            if tmp_name:                            # e.g. disk full mid-write: don't leave the partial file behind
+                try:
+                    os.unlink(tmp_name)
+                except OSError:
+                    pass
+
+    def evict(self) -> int:
+        '''Deletes least recently used entries until the cache fits in max_bytes. Returns the number of bytes freed'''
+        entries = []
+        for path in self.directory.glob('*/*.hits'):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        freed = 0
+        for _, size, path in sorted(entries):
+            if total - freed <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+                freed += size
+            except OSError:
+                pass
+        return freed
+
+def _encode(hits: HitTable) -> bytes:
+    has_lengths = hits.lengths is not None
+    columns = [hits.query_start, hits.subject_start, hits.mismatches, hits.inverted] + ([hits.lengths] if has_lengths else [])
+    if sys.byteorder == 'big':                      # files are little-endian
+        columns = [array(column.typecode, column) for column in columns]
+        for column in columns:
+            column.byteswap()
+    return HEADER.pack(MAGIC, len(hits), hits.kmer_length, has_lengths) + b''.join(column.tobytes() for column in columns)
+
+def _decode(data: bytes, record_id: str, seq: str) -> HitTable:
+    magic, n, kmer_length, has_lengths = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError('not a dna-repeat cache file')
+    hits = HitTable(record_id, seq, kmer_length)
+    if has_lengths:
+        hits.lengths = array('i')
+    columns = [hits.query_start, hits.subject_start, hits.mismatches, hits.inverted] + ([hits.lengths] if has_lengths else [])
+    pos = HEADER.size
+    for column in columns:
+        size = n * column.itemsize
+        column.frombytes(data[pos:pos + size])
+        if sys.byteorder == 'big':
+            column.byteswap()
+        pos += size
+    if pos != len(data):
+        raise ValueError('cache file has the wrong size')
+    return hits
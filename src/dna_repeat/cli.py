@@ -1,38 +1,53 @@
 # src/dna_repeat/cli.py
 # Top-level functions for dna-repeat CLI
 
+import os
 import sys
 import argparse
+from contextlib import nullcontext
 from dna_repeat import __version__
-from dna_repeat.core import iter_fasta, RepeatHit, clean_and_check, count_fasta_seqs
-from dna_repeat.ai import find_repeats_2bit, find_invert_repeats_2bit
-from dna_repeat.error import (
-    InvalidFASTAError,
-    EmptySequenceError,
-    InvalidSequenceError,
-    InvalidKmerError,
-)
+from dna_repeat.cache import DEFAULT_CACHE_BYTES, ResultCache, default_cache_dir
+from dna_repeat.core import clean_and_check, open_fasta
+from dna_repeat.crossrecord import CROSS_COLUMNS, iter_cross_rows, read_pools
+from dna_repeat.engines import ENGINES, DEFAULT_ENGINE, EXACT_ONLY_ENGINES, TILED_ENGINES, select_engine
+from dna_repeat.scan import ScanParams, iter_scan, default_chunk_bp
+from dna_repeat.stats import RecordStats, StatsWriter, timed
+from dna_repeat.output import COLUMNS, HIT_BLOCK_ROWS, HitWriter, OUTPUT_FORMATS, PANDAS_FORMATS, STREAMING_FORMATS, missing_format_dependency
+from dna_repeat.summary import COUNT_COLUMNS, FIRST_HIT_COLUMNS
+from dna_repeat.fasta import FastaFile
+from dna_repeat.error import EmptySequenceError, InvalidFASTAError, InvalidKmerError, InvalidSequenceError
 from pathlib import Path
-import pandas as pd
-from tqdm import tqdm
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from tqdm import tqdm
+    from dna_repeat.packed import PackedFile
 
 
 def init_argparser() -> argparse.ArgumentParser:
     """Initializes argument parser for CLI"""
     parser = argparse.ArgumentParser(
         prog="dna-repeat",
-        description=f"dna-repeat {__version__} - Finds repeats in a DNA sequence",
+        description=f"dna-repeat {__version__} - Finds repeats in a DNA sequence. 'dna-repeat pack -h': convert FASTA to a packed 2-bit file, 'dna-repeat bench -h': benchmark the engines, 'dna-repeat serve -h': scanning service",
     )
-    parser.add_argument("input_filepath", help="filepath to input file (FASTA)")
+    parser.add_argument("input_filepath", help="filepath to input file (FASTA, or packed file from 'dna-repeat pack')")
     parser.add_argument(
         "-o",
         "--output",
-        help="desired directory for output file (output.csv). Default: cwd",
+        help="desired directory for output file (output.csv / .tsv / .parquet). Default: cwd",
         nargs="?",
         const=".",
         default=None,
         dest="output_directory",
     )
+    parser.add_argument(
+        "-f",
+        "--format",
+        help="output format (default: csv). csv/tsv are streamed; parquet needs pandas + pyarrow and -o",
+        choices=OUTPUT_FORMATS,
+        default="csv",
+        dest="output_format",
+    )
     parser.add_argument(
         "-k",
         "--length",
@@ -49,6 +64,122 @@ def init_argparser() -> argparse.ArgumentParser:
         default=0,
         dest="allowed_mismatches",
     )
+    parser.add_argument(
+        "-e",
+        "--engine",
+        help=f"repeat search engine (default: {DEFAULT_ENGINE})",
+        choices=["auto", *ENGINES],
+        default=DEFAULT_ENGINE,
+        dest="engine",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        help="number of worker processes; records are scanned in parallel (0 = all CPUs, default: 1)",
+        type=int,
+        default=1,
+        dest="jobs",
+    )
+    screening = parser.add_mutually_exclusive_group()
+    screening.add_argument(
+        "--first-hit",
+        help="screening: stop each sequence's search at its first repeat and only report whether it has one",
+        action="store_true",
+        dest="first_hit",
+    )
+    screening.add_argument(
+        "--count-only",
+        help="screening: only report the number of repeats and the repeat coverage per sequence",
+        action="store_true",
+        dest="count_only",
+    )
+    parser.add_argument(
+        "--cross-record",
+        help="report repeats between different sequences of the input (one global index over all sequences) instead of within each sequence",
+        action="store_true",
+        dest="cross_record",
+    )
+    parser.add_argument(
+        "--pools",
+        help="with --cross-record: tab-separated file of 'record_id<TAB>pool' lines; only sequences of the same pool are compared (unlisted sequences are left out)",
+        default=None,
+        dest="pools_filepath",
+    )
+    parser.add_argument(
+        "--maximal",
+        help="report maximal exact repeats of at least -k bp, one row per repeat (no upper limit on -k; -m must be 0)",
+        action="store_true",
+        dest="maximal",
+    )
+    parser.add_argument(
+        "-a",
+        "--split-ambiguous",
+        help="split sequences at ambiguous bases (N, wobbles) and search the ACGT-only segments instead of skipping the sequence",
+        action="store_true",
+        dest="split_ambiguous",
+    )
+    parser.add_argument(
+        "--min-distance",
+        help="only report repeats whose copies start at least this many bp apart (default: 0)",
+        type=int,
+        default=0,
+        dest="min_distance",
+    )
+    parser.add_argument(
+        "--max-distance",
+        help="only report repeats whose copies start at most this many bp apart; pairs further apart are not compared at all (default: no limit)",
+        type=int,
+        default=None,
+        dest="max_distance",
+    )
+    caching = parser.add_mutually_exclusive_group()
+    caching.add_argument(
+        "--cache",
+        help="reuse the hits of unchanged sequences from earlier runs (on-disk result cache; off by default)",
+        action="store_true",
+        default=None,
+        dest="use_cache",
+    )
+    caching.add_argument(
+        "--no-cache",
+        help="don't read or write the result cache (the default; overrides --cache-dir)",
+        action="store_false",
+        dest="use_cache",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        help=f"result cache directory; implies --cache (default: {default_cache_dir()})",
+        default=None,
+        dest="cache_dir",
+    )
+    parser.add_argument(
+        "--cache-size",
+        help=f"result cache size limit in MB; least recently used entries are removed after a run (default: {DEFAULT_CACHE_BYTES // 2**20})",
+        type=int,
+        default=DEFAULT_CACHE_BYTES // 2**20,
+        dest="cache_size",
+    )
+    parser.add_argument(
+        "--save-index",
+        help="write a samtools-style index (INPUT.fai) next to the input file; it is reused by later runs",
+        action="store_true",
+        dest="save_index",
+    )
+    parser.add_argument(
+        "--stats",
+        help="write per-sequence telemetry to FILE as JSON lines (time per stage, candidate pairs, hits, length, peak RSS) "
+        "followed by a summary line",
+        metavar="FILE",
+        default=None,
+        dest="stats_filepath",
+    )
+    parser.add_argument(
+        "--profile",
+        help="run under cProfile and write the profile (pstats format) to FILE. Only the main process is profiled",
+        metavar="FILE",
+        default=None,
+        dest="profile_filepath",
+    )
 
     group = parser.add_mutually_exclusive_group()
     group.add_argument(
@@ -65,10 +196,248 @@ def init_argparser() -> argparse.ArgumentParser:
         action="store_true",
         dest="direct_only",
     )
+    group.add_argument(
+        "--hairpin",
+        help="hairpin / stem-loop preset: inverted repeats (stems) with at most MAX_LOOP bp between the two arms",
+        type=int,
+        metavar="MAX_LOOP",
+        dest="hairpin_max_loop",
+    )
     return parser
 
 
-def main(argv: str | None = None) -> int:
+def scan_cross_record(fasta: "FastaFile | PackedFile", params: ScanParams, pools: dict[str, str] | None, writer: HitWriter, progress: "tqdm") -> list[str]:
+    """Cleans all records and writes the repeats between records (of the same pool). Returns errors of skipped records"""
+    records: list[tuple[str, str]] = []
+    errors: list[str] = []
+    for entry, (rec_id, seq) in zip(fasta.entries, fasta):
+        try:
+            records.append(clean_and_check(rec_id, seq, params.kmer_length))
+        except (EmptySequenceError, InvalidSequenceError, InvalidKmerError) as e:
+            errors.append(f"{e}")
+        progress.update(entry.length)
+    writer.write_rows(
+        iter_cross_rows(
+            records,
+            params.kmer_length,
+            params.allowed_mismatches,
+            params.do_direct,
+            params.do_inverted,
+            pools,
+        )
+    )
+    return errors
+
+
+def init_pack_argparser() -> argparse.ArgumentParser:
+    """Initializes argument parser for the pack subcommand"""
+    parser = argparse.ArgumentParser(
+        prog="dna-repeat pack",
+        description="Converts a FASTA file into a packed 2-bit file (4 bases per byte, with index) that dna-repeat reads directly",
+    )
+    parser.add_argument("input_filepath", help="filepath to input file (FASTA)")
+    parser.add_argument("output_filepath", help="filepath for the packed file (e.g. INPUT.2bit)")
+    return parser
+
+
+def pack_main(argv: list[str]) -> int:
+    """dna-repeat pack INPUT.fasta OUTPUT.2bit"""
+    from dna_repeat.packed import write_packed  # NumPy
+
+    args = init_pack_argparser().parse_args(argv)
+    input_filepath = Path(args.input_filepath).resolve()
+    output_filepath = Path(args.output_filepath).resolve()
+    if not input_filepath.is_file():
+        print(f"Input file not found: {input_filepath}", file=sys.stderr)
+        return 1
+    if output_filepath == input_filepath:
+        print("output file must not be the input file", file=sys.stderr)
+        return 1
+    try:
+        with open_fasta(input_filepath) as fasta:
+            number_of_seqs = write_packed(fasta, output_filepath)
+    except InvalidFASTAError as e:
+        print(f"InvalidFASTAError: {e.message}", file=sys.stderr)
+        return e.exit_code
+    print(f"Packed {number_of_seqs} sequence(s) into {output_filepath}", file=sys.stderr)
+    return 0
+
+
+def init_bench_argparser() -> argparse.ArgumentParser:
+    """Initializes argument parser for the bench subcommand"""
+    from dna_repeat.benchmark import BENCH_ENGINES
+    parser = argparse.ArgumentParser(
+        prog="dna-repeat bench",
+        description="Times every search engine on deterministic synthetic sequences (random + tandem regions + planted repeats) "
+        "and checks that all engines find the same hits",
+    )
+    parser.add_argument(
+        "-l",
+        "--lengths",
+        help="sequence lengths in bp (default: 500 1000 2000 4000)",
+        type=int,
+        nargs="+",
+        default=[500, 1000, 2000, 4000],
+    )
+    parser.add_argument("-k", "--length", help="repeat lengths (default: 20)", type=int, nargs="+", default=[20], dest="kmer_lengths")
+    parser.add_argument("-m", "--mismatches", help="mismatch counts (default: 0 2)", type=int, nargs="+", default=[0, 2])
+    parser.add_argument(
+        "-e",
+        "--engines",
+        help=f"engines to time (default: all). '{BENCH_ENGINES[-1]}' is the original string-slicing search (direct repeats only)",
+        choices=BENCH_ENGINES,
+        nargs="+",
+        default=BENCH_ENGINES,
+    )
+    parser.add_argument("--seed", help="seed of the synthetic sequences (default: 0)", type=int, default=0)
+    parser.add_argument("--repeat", help="timed runs per measurement; the best is reported (default: 1)", type=int, default=1)
+    parser.add_argument(
+        "--max-seconds",
+        help="don't run an engine on longer sequences once one run took longer than this (default: 10)",
+        type=float,
+        default=10.0,
+    )
+    parser.add_argument("--no-memory", help="don't measure peak memory (saves one run per measurement)", action="store_false", dest="memory")
+    parser.add_argument(
+        "-o",
+        "--output",
+        help="directory for the results (output.csv / .tsv / .parquet). Default: terminal",
+        default=None,
+        dest="output_directory",
+    )
+    parser.add_argument("-f", "--format", help="output format (default: csv)", choices=OUTPUT_FORMATS, default="csv", dest="output_format")
+    orientation = parser.add_mutually_exclusive_group()
+    orientation.add_argument("-i", "--inverted-only", help="only time inverted-repeat search", action="store_true")
+    orientation.add_argument("-d", "--direct-only", help="only time direct-repeat search", action="store_true")
+    return parser
+
+
+def bench_main(argv: list[str]) -> int:
+    """dna-repeat bench [options]"""
+    from dna_repeat.benchmark import BENCH_COLUMNS, iter_benchmark, scaling_exponents  # NumPy, tracemalloc
+
+    args = init_bench_argparser().parse_args(argv)
+    if min(args.lengths) < 1 or min(args.mismatches) < 0 or args.repeat < 1:
+        print("lengths and --repeat must be >= 1, mismatch counts >= 0", file=sys.stderr)
+        return 1
+    if not all(4 <= k <= 30 for k in args.kmer_lengths):
+        print("repeat lengths (-k, --length) must be in the range 4-30", file=sys.stderr)
+        return 1
+    output_directory = Path(args.output_directory).resolve() if args.output_directory else None
+    if output_directory:
+        output_directory.mkdir(parents=True, exist_ok=True)
+    elif args.output_format in PANDAS_FORMATS:
+        print(f"format '{args.output_format}' can only be written to a file (-o)", file=sys.stderr)
+        return 1
+    missing = missing_format_dependency(args.output_format)
+    if missing:
+        print(f"format '{args.output_format}' needs {missing} (pip install dna-repeat[parquet])", file=sys.stderr)
+        return 1
+
+    problems: list[str] = []
+    results = []
+    with HitWriter(output_directory, args.output_format, columns=BENCH_COLUMNS) as writer:
+        for result in iter_benchmark(
+            args.lengths,
+            args.kmer_lengths,
+            args.mismatches,
+            args.engines,
+            seed=args.seed,
+            direct=not args.inverted_only,
+            inverted=not args.direct_only,
+            repeat=args.repeat,
+            memory=args.memory,
+            max_seconds=args.max_seconds,
+            problems=problems,
+        ):
+            results.append(result)
+            writer.write_rows([result.row()])
+    if writer.rows_written and writer.output_filepath:
+        print(f"\nResults have been written to {writer.output_filepath}", file=sys.stderr)
+
+    print("\nScaling (time ~ length^b):", file=sys.stderr)
+    for (engine, kmer_length, allowed_mismatches, orientation), exponent in scaling_exponents(results).items():
+        print(f" {engine:<7} k={kmer_length} m={allowed_mismatches} {orientation:<8} b = {exponent:.2f}", file=sys.stderr)
+    if problems:
+        print("\nEngines disagree:", file=sys.stderr)
+        for problem in problems:
+            print(f" {problem}", file=sys.stderr)
+        return 1
+    print("\nAll engines found the same hits, including every planted repeat", file=sys.stderr)
+    return 0
+
+
+def init_serve_argparser() -> argparse.ArgumentParser:
+    """Initializes argument parser for the serve subcommand"""
+    parser = argparse.ArgumentParser(
+        prog="dna-repeat serve",
+        description="Runs a local scanning service: imports and warm-up happen once, clients send batches of sequences "
+        "(newline-delimited JSON, see dna_repeat.serve) over a Unix socket or a localhost TCP port",
+    )
+    address = parser.add_mutually_exclusive_group(required=True)
+    address.add_argument("--socket", help="Unix socket path to listen on", default=None, dest="socket_path")
+    address.add_argument("--port", help="TCP port to listen on (127.0.0.1 only)", type=int, default=None)
+    parser.add_argument("-j", "--jobs", help="worker processes per batch (default: 1 = scan in a thread; 0 = all CPUs)", type=int, default=1)
+    caching = parser.add_mutually_exclusive_group()
+    caching.add_argument("--cache", help="reuse hits of sequences seen before (result cache; off by default)", action="store_true", default=None, dest="use_cache")
+    caching.add_argument("--no-cache", help="don't use the result cache (the default; overrides --cache-dir)", action="store_false", dest="use_cache")
+    parser.add_argument("--cache-dir", help="cache directory; implies --cache (default: $XDG_CACHE_HOME/dna-repeat)", default=None)
+    parser.add_argument(
+        "--cache-size",
+        help=f"cache size limit in MB; least recently used entries are removed while serving (default: {DEFAULT_CACHE_BYTES // 2**20})",
+        type=int,
+        default=DEFAULT_CACHE_BYTES // 2**20,
+    )
+    return parser
+
+
+def serve_main(argv: list[str]) -> int:
+    """dna-repeat serve (--socket PATH | --port PORT) [options]"""
+    import asyncio
+    from dna_repeat.serve import ScanServer, serve, warm_up
+
+    args = init_serve_argparser().parse_args(argv)
+    jobs: int = args.jobs or os.cpu_count() or 1
+    if jobs < 0:
+        print("number of jobs (-j, --jobs) must be >= 0", file=sys.stderr)
+        return 1
+    if args.cache_size < 0:
+        print("cache size (--cache-size) must be >= 0", file=sys.stderr)
+        return 1
+    socket_path = Path(args.socket_path).resolve() if args.socket_path else None
+    if socket_path and socket_path.exists():
+        print(f"Socket path already exists: {socket_path}", file=sys.stderr)
+        return 1
+    cache = None
+    if args.use_cache or (args.use_cache is None and args.cache_dir):
+        cache = ResultCache(Path(args.cache_dir).resolve() if args.cache_dir else default_cache_dir(), args.cache_size * 2**20)
+        cache.evict()
+    warm_up()
+    server = ScanServer(jobs, cache)
+    print(f"dna-repeat {__version__} serving on {socket_path or f'127.0.0.1:{args.port}'} (Ctrl-C to stop)", file=sys.stderr)
+    try:
+        asyncio.run(serve(server, socket_path, args.port))
+    except OSError as e:
+        print(f"Could not start server: {e}", file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        if cache:
+            cache.evict()
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    if argv is None:
+        argv = sys.argv[1:]
+    if argv[:1] == ["pack"]:
+        return pack_main(argv[1:])
+    if argv[:1] == ["bench"]:
+        return bench_main(argv[1:])
+    if argv[:1] == ["serve"]:
+        return serve_main(argv[1:])
     parser = init_argparser()
     args = parser.parse_args(argv)
 
@@ -76,88 +445,212 @@ def main(argv: str | None = None) -> int:
     if args.output_directory:
         output_directory = Path(args.output_directory).resolve()
         output_directory.mkdir(parents=True, exist_ok=True)
-        output_filepath: Path | None = output_directory / "output.csv"
     else:
-        output_filepath = None
+        output_directory = None
+    output_format: str = args.output_format
     kmer_length: int = args.kmer_length
     allowed_mismatches: int = args.allowed_mismatches
 
     do_direct = not args.inverted_only
     do_inverted = not args.direct_only
+    min_distance: int = args.min_distance
+    max_distance: int | None = args.max_distance
+    if args.hairpin_max_loop is not None:  # stem arms don't overlap, loop of 0..MAX_LOOP bp
+        do_direct = False
+        min_distance, max_distance = kmer_length, kmer_length + args.hairpin_max_loop
+    engine = select_engine(args.engine, kmer_length, allowed_mismatches)
+    jobs: int = args.jobs or os.cpu_count() or 1
 
     if not input_filepath.is_file():
         print(f"Input file not found: {input_filepath}", file=sys.stderr)
         return 1
+    if args.maximal:
+        if kmer_length < 4:
+            print("minimum repeat length (-k, --length) must be at least 4", file=sys.stderr)
+            return 1
+        if allowed_mismatches != 0:
+            print("--maximal only finds exact repeats (-m 0)", file=sys.stderr)
+            return 1
+    elif not 4 <= kmer_length <= 30:
+        print("repeat length (-k, --length) must be in the range 4-30", file=sys.stderr)
+        return 1
+    if allowed_mismatches > kmer_length / 2:
+        print("m must be <= kmer_length / 2", file=sys.stderr)
+        return 1
+    if jobs < 0:
+        print("number of jobs (-j, --jobs) must be >= 0", file=sys.stderr)
+        return 1
+    if args.hairpin_max_loop is not None and (args.min_distance or args.max_distance is not None):
+        print("--hairpin sets the distance band itself; it can't be combined with --min-distance/--max-distance", file=sys.stderr)
+        return 1
+    if min_distance < 0 or (max_distance is not None and max_distance < min_distance):
+        print("distance band must satisfy 0 <= --min-distance <= --max-distance (--hairpin: MAX_LOOP >= 0)", file=sys.stderr)
+        return 1
+    if args.pools_filepath and not args.cross_record:
+        print("--pools only works with --cross-record", file=sys.stderr)
+        return 1
+    if args.cross_record and (args.maximal or args.split_ambiguous or args.first_hit or args.count_only or min_distance or max_distance is not None):
+        print("--cross-record can't be combined with --maximal, -a, --first-hit/--count-only or a distance band", file=sys.stderr)
+        return 1
+    pools = None
+    if args.pools_filepath:
+        try:
+            pools = read_pools(Path(args.pools_filepath))
+        except (OSError, ValueError) as e:
+            print(f"Could not read pool file: {e}", file=sys.stderr)
+            return 1
+    if args.stats_filepath and args.cross_record:
+        print("--stats reports per sequence; it can't be combined with --cross-record", file=sys.stderr)
+        return 1
+    if args.cache_size < 0:
+        print("cache size (--cache-size) must be >= 0", file=sys.stderr)
+        return 1
+    if engine in EXACT_ONLY_ENGINES and allowed_mismatches != 0:
+        print(f"engine '{engine}' only finds exact repeats (-m 0)", file=sys.stderr)
+        return 1
+    if output_format in PANDAS_FORMATS and output_directory is None:
+        print(f"format '{output_format}' can only be written to a file (-o)", file=sys.stderr)
+        return 1
+    missing = missing_format_dependency(output_format)
+    if missing:
+        print(f"format '{output_format}' needs {missing} (pip install dna-repeat[parquet])", file=sys.stderr)
+        return 1
+    stats_writer = None
+    if args.stats_filepath:
+        try:
+            stats_writer = StatsWriter(open(args.stats_filepath, "w"))
+        except OSError as e:
+            print(f"Could not open stats file: {e}", file=sys.stderr)
+            return 1
     try:
-        number_of_seqs = count_fasta_seqs(input_filepath)
+        fasta = open_fasta(input_filepath)
     except InvalidFASTAError as e:
+        if stats_writer:
+            stats_writer.handle.close()
         print(f"InvalidFASTAError: {e.message}", file=sys.stderr)
         if e.details:
             print(f"Details: {e.details}", file=sys.stderr)
         return e.exit_code
-    if not 4 <= kmer_length <= 30:
-        print("repeat length (-k, --length) must be in the range 4-30", file=sys.stderr)
-        return 1
-    if allowed_mismatches > kmer_length / 2:
-        print("m must be <= kmer_length / 2", file=sys.stderr)
-        return 1
+    number_of_seqs = len(fasta)
+    if args.save_index:
+        if not isinstance(fasta, FastaFile):
+            print("Index not written: packed files have their own index", file=sys.stderr)
+        elif fai_filepath := fasta.save_index():
+            print(f"Index written to {fai_filepath}", file=sys.stderr)
+        else:
+            print("Index not written: line lengths vary within a record", file=sys.stderr)
 
-    results = []
     errors: list[str] = []
     no_hits: list[str] = []
 
+    cache = None
+    if args.use_cache or (args.use_cache is None and args.cache_dir):  # opt-in: --cache or --cache-dir
+        cache = ResultCache(Path(args.cache_dir).resolve() if args.cache_dir else default_cache_dir(), args.cache_size * 2**20)
+    tile_jobs = 1
+    if number_of_seqs == 1:  # nothing to spread across records; split the one sequence instead
+        tile_jobs, jobs = jobs, 1
+        if tile_jobs > 1 and (args.maximal or args.cross_record or engine not in TILED_ENGINES):
+            what = "--maximal" if args.maximal else "--cross-record" if args.cross_record else f"engine '{engine}'"
+            print(f"Note: -j has no effect on a single sequence with {what}; scanning with one process", file=sys.stderr)
+    # serial CSV/TSV without cache/stats: write each record's hits in blocks as they're found instead of one table per record
+    stream_blocks = jobs <= 1 and cache is None and stats_writer is None and output_format in STREAMING_FORMATS
+    params = ScanParams(
+        kmer_length=kmer_length,
+        allowed_mismatches=allowed_mismatches,
+        engine=engine,
+        do_direct=do_direct,
+        do_inverted=do_inverted,
+        tile_jobs=tile_jobs,
+        split_ambiguous=args.split_ambiguous,
+        maximal=args.maximal,
+        min_distance=min_distance,
+        max_distance=max_distance,
+        first_hit=args.first_hit,
+        count_only=args.count_only,
+        cache_dir=cache.directory if cache else None,
+        stats=args.stats_filepath is not None,
+        block_hits=HIT_BLOCK_ROWS if stream_blocks else 0,
+    )
+    if args.first_hit or args.count_only:  # one summary row per sequence
+        columns = FIRST_HIT_COLUMNS if args.first_hit else COUNT_COLUMNS
+        stdout_message = f"\nRepeat screening of {input_filepath}:\n"
+    elif args.cross_record:
+        columns = CROSS_COLUMNS
+        stdout_message = f"\nFound repeats between sequences in {input_filepath}:\n"
+    else:
+        columns = COLUMNS
+        stdout_message = f"\nFound repeats in {input_filepath}:\n"
+    writer = HitWriter(output_directory, output_format, stdout_message, columns)
+    from tqdm import tqdm  # not needed by the subcommands
+
+    progress = tqdm(
+        desc="Searching for repeats",
+        total=fasta.total_length,
+        unit="bp",
+        unit_scale=True,
+    )
+    profiler = None
+    if args.profile_filepath:
+        import cProfile
+
+        profiler = cProfile.Profile()
+        profiler.enable()
     try:
-        for rec_id, seq in tqdm(
-            iter_fasta(input_filepath),
-            desc="Searching for repeats",
-            total=number_of_seqs,
-            unit="sequence",
-        ):
-            try:
-                rec_id, seq = clean_and_check(rec_id, seq, kmer_length)
-                hits_found = False
-                if do_direct:
-                    repeats: list[RepeatHit] = find_repeats_2bit(
-                        rec_id=rec_id,
-                        seq=seq,
-                        kmer_length=kmer_length,
-                        allowed_mismatches=allowed_mismatches,
-                    )
-                    if repeats:
-                        results.extend(repeats)
-                        hits_found = True
-                if do_inverted:
-                    repeats: list[RepeatHit] = find_invert_repeats_2bit(
-                        rec_id=rec_id,
-                        seq=seq,
-                        kmer_length=kmer_length,
-                        allowed_mismatches=allowed_mismatches,
-                    )
-                    if repeats:
-                        results.extend(repeats)
-                        hits_found = True
-                if not hits_found:
-                    no_hits.append(rec_id)
-            except EmptySequenceError as e:
-                errors.append(f"{e}")
-                continue
-            except InvalidSequenceError as e:
-                errors.append(f"{e}")
-                continue
-            except InvalidKmerError as e:
-                errors.append(f"{e}")
-                continue
+        if args.cross_record:
+            errors = scan_cross_record(fasta, params, pools, writer, progress)
+        else:
+            parse_seconds: list[float] = []
+            records = iter(fasta) if isinstance(fasta, FastaFile) else fasta.records()  # packed: engines get k-mer codes
+            results = iter_scan(
+                timed(records, parse_seconds) if stats_writer else records,
+                params,
+                jobs=jobs,
+                chunk_bp=default_chunk_bp(fasta.total_length, jobs),
+            )
+            for number, (entry, result) in enumerate(zip(fasta.entries, results)):
+                stats = result.stats or RecordStats(result.record_id, error=result.error)
+                with stats.stage("output") if stats_writer else nullcontext():
+                    if result.error:
+                        errors.append(result.error)
+                    elif result.summary:
+                        writer.write_rows([result.summary.row(columns)])
+                    elif result.blocks is not None:
+                        if not sum(writer.write(block) for block in result.blocks):
+                            no_hits.append(result.record_id)
+                    elif not writer.write(result.hits):
+                        no_hits.append(result.record_id)
+                if stats_writer:
+                    stats.stages["parse"] = parse_seconds[number]
+                    stats_writer.write(stats)
+                progress.update(entry.length)
+        writer.close()
+        if cache:
+            cache.evict()
     except Exception as e:
+        writer.close()
         print(f"An unexpected error occurred: {e}", file=sys.stderr)
         return 255
-    if results:
-        df = pd.DataFrame(results)
-        if output_filepath:
-            df.to_csv(output_filepath, index=False)
-            print(f"\nResults have been written to {output_filepath}\n")
-        else:
-            print(f"\nFound repeats in {input_filepath}:\n")
-            df.to_csv(sys.stdout, index=False)
+    finally:
+        progress.close()
+        fasta.close()
+        if profiler:
+            profiler.disable()
+            profiler.dump_stats(args.profile_filepath)
+        if stats_writer:
+            summary = stats_writer.close()
+            stats_writer.handle.close()
+    if profiler:
+        print(f"\nProfile written to {args.profile_filepath} (view with: python -m pstats {args.profile_filepath})", file=sys.stderr)
+    if stats_writer:
+        stages = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in summary["stages"].items())
+        print(
+            f"\nStats written to {args.stats_filepath}: {summary['records']} sequence(s), {summary['length']} bp, "
+            f"{summary['hits']} hits, {summary['candidate_pairs']} candidate pairs in {summary['wall_seconds']:.2f}s "
+            f"({stages}); peak RSS {summary['peak_rss_mib']} MiB",
+            file=sys.stderr,
+        )
+    if writer.rows_written and writer.output_filepath:
+        print(f"\nResults have been written to {writer.output_filepath}\n")
     if no_hits:
         print("\nNo repeats were found in the following sequence(s):")
         for item in no_hits:
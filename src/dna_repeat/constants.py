@@ -4,4 +4,13 @@ COMPLEMENT: dict[int, int] = str.maketrans('ACGT', 'TGCA')
 '''Translation table for nt. base complement'''
 
 BASE_TO_INT: dict[str, int] = {'A':0,'C':1,'G':2,'T':3}
-'''Dictionary for substituting an integer for a nt. base'''
\ No newline at end of file
+'''Dictionary for substituting an integer for a nt. base'''
+
+NON_UPPERCASE: bytes = bytes(c for c in range(256) if not ord('A') <= c <= ord('Z'))
+'''Bytes to delete (with bytes.translate) to keep only uppercase letters'''
+
+ACGT: bytes = b'ACGT'
+'''Valid bases. Deleting these (with bytes.translate) leaves only invalid/ambiguous characters'''
+
+PACKED_MAGIC: bytes = b'DR2B'
+'''First bytes of a packed 2-bit file (packed.py)'''
@@ -1,11 +1,11 @@
 # src/dna_repeat/core.py
 # Core functions
 
-from Bio import SeqIO
 from pathlib import Path
-from typing import Iterator
+from typing import Iterable, Iterator, TYPE_CHECKING
 from dataclasses import dataclass
-from dna_repeat.constants import COMPLEMENT
+from dna_repeat.constants import COMPLEMENT, NON_UPPERCASE, ACGT, PACKED_MAGIC
+from dna_repeat.fasta import FastaFile
 from dna_repeat.error import (
     InvalidFASTAError,
     EmptySequenceError,
@@ -14,6 +14,9 @@ from dna_repeat.error import (
 )
 import re
 
+if TYPE_CHECKING:
+    from dna_repeat.packed import PackedFile
+
 @dataclass
 class RepeatHit:
     '''Stores information for a found repeat'''
@@ -28,21 +31,71 @@ class RepeatHit:
     kmer_length: int
     orientation: str
 
-def count_fasta_seqs(input_filepath: Path) -> int:
-    '''Counts the number of seqs in a fasta file'''
-    number_of_seqs = len(list(SeqIO.parse(handle=input_filepath, format='fasta')))
-    if number_of_seqs == 0:
+@dataclass
+class PairCounter:
+    '''k-mer pairs an engine compared (--stats). Engines add to it as they go when one is passed in (counter=...)'''
+    pairs: int = 0
+
+def make_hit(rec_id: str, seq: str, kmer_length: int, query_pos: int, subject_pos: int, mismatches: int, orientation: str) -> RepeatHit:
+    '''Builds a RepeatHit from 0-based k-mer start positions (subject position on the forward strand, also for inverted repeats)'''
+    return RepeatHit(
+        record_id = rec_id,
+        query_start = query_pos + 1,        # '+ 1' = convert to 1-based index for positions (DNA)
+        query_end = query_pos + kmer_length,
+        subject_start = subject_pos + 1,
+        subject_end = subject_pos + kmer_length,
+        query_seq = seq[query_pos:query_pos + kmer_length],
+        subject_seq = seq[subject_pos:subject_pos + kmer_length],
+        mismatches = mismatches,
+        kmer_length = kmer_length,
+        orientation = orientation
+        )
+
+def subject_window(query_pos: int, n_kmers: int, min_distance: int = 0, max_distance: int | None = None) -> tuple[int, int]:
+    '''(first, stop) subject k-mer positions whose distance from query_pos (subject start - query start) is within the band'''
+    stop = n_kmers if max_distance is None else min(n_kmers, query_pos + max_distance + 1)
+    return query_pos + min_distance, stop
+
+def is_packed(path: Path) -> bool:
+    '''True if path is a packed 2-bit file (by its magic bytes)'''
+    with open(path, 'rb') as f:
+        return f.read(len(PACKED_MAGIC)) == PACKED_MAGIC
+
+def open_sequences(input_filepath: Path) -> 'FastaFile | PackedFile':
+    '''Opens a FASTA file, or a packed 2-bit file made by `dna-repeat pack` (detected by its magic bytes). Raises
+    InvalidFASTAError if a packed file is truncated or corrupt'''
+    if not is_packed(input_filepath):
+        return FastaFile(input_filepath)
+    from dna_repeat.packed import PackedFile    # packed.py needs NumPy (and vectorized.py, which imports this module)
+    try:
+        return PackedFile(input_filepath)
+    except ValueError as e:                     # truncated/corrupt header or index
+        raise InvalidFASTAError(
+            message=f"Packed file {input_filepath} is truncated or corrupt.",
+            details=f"{e} in core.py: open_sequences()",
+        ) from e
+
+def open_fasta(input_filepath: Path) -> 'FastaFile | PackedFile':
+    '''Opens (memory-maps and indexes) a fasta or packed file. Raises InvalidFASTAError if it has no records, or if a packed
+    file is truncated or corrupt'''
+    fasta = open_sequences(input_filepath)
+    if len(fasta) == 0:
+        fasta.close()
         raise InvalidFASTAError(
             message=f"FASTA file {input_filepath} contains no records and/or is not formatted correctly.",
-            details="StopIteration exception in core.py: iter_fasta()",
+            details="No '>' header lines found in core.py: open_fasta()",
         )
-    return number_of_seqs
+    return fasta
+
+def count_fasta_seqs(input_filepath: Path) -> int:
+    '''Counts the number of seqs in a fasta file (from its index; no parsing)'''
+    with open_fasta(input_filepath) as fasta:
+        return len(fasta)
 
 def iter_fasta(input_filepath: Path) -> Iterator[tuple[str, str]]:
-    '''Generator that yields (record ID, sequence) tuples from a FASTA file'''
-    records = SeqIO.parse(handle=input_filepath, format='fasta')
-    for rec in records:
-        yield rec.id, str(rec.seq)
+    '''Generator that yields (record ID, sequence) tuples from a FASTA (or packed) file'''
+    with open_sequences(input_filepath) as fasta:
+        yield from fasta
 
 def hamming_distance(a: str, b: str) -> int:
     '''[DEPRECATED FOR BITWISE SEARCH] Returns the hamming distance for two strings'''
@@ -103,9 +156,11 @@ def reverse_complement(s: str) -> str:
     '''Get the reverse complement of a dna sequence (no wobbles)'''
     return s.translate(COMPLEMENT)[::-1]
 
-def clean_and_check(rec_id: str, seq: str, kmer_length: int) -> tuple[str, str]:
-    '''Clean sequence of non-letters, make uppercase, and check for empty sequence, invalid sequence, and K-mer length < length of sequence'''
-    clean_seq = re.sub(r'[^A-Z]', '', seq.upper())          # Remove non-alphas and spaces. Make uppercase.
+def clean_and_check(rec_id: str, seq: str, kmer_length: int, allow_ambiguous: bool = False) -> tuple[str, str]:
+    '''Clean sequence of non-letters, make uppercase, and check for empty sequence, invalid sequence, and K-mer length < length of sequence.
+    With allow_ambiguous, non-ACGT letters (N, wobbles) are kept so the sequence can be split into segments later'''
+    clean_bytes = seq.upper().encode('ascii', 'ignore').translate(None, NON_UPPERCASE)   # Remove non-alphas and spaces. Make uppercase.
+    clean_seq = clean_bytes.decode('ascii')
     if clean_seq == '':                                     # Check that there's a sequence
         raise EmptySequenceError(rec_id)
     if kmer_length > len(clean_seq):                        # Check that k-mer lengh isn't longer than the query sequence
@@ -114,11 +169,19 @@ def clean_and_check(rec_id: str, seq: str, kmer_length: int) -> tuple[str, str]:
         clean_rec_id = f'No-name sequence ({len(clean_seq)} bp)'
     else:
         clean_rec_id = rec_id
+    if not allow_ambiguous and clean_bytes.translate(None, ACGT):    # Check for invalid characters e.g. wobble bases, etc. (one pass)
+        raise InvalidSequenceError(rec_id, describe_invalid_bases(clean_seq))
+    return clean_rec_id, clean_seq
+
+def describe_invalid_bases(seq: str) -> list[str]:
+    '''Lists the invalid characters of a sequence and their positions, one entry per run (e.g. a block of N's)'''
+    return describe_invalid_runs((match.start(), match.end() - match.start(), match.group(1))
+                                 for match in re.finditer(r'([^ACGT])\1*', seq))
+
+def describe_invalid_runs(runs: Iterable[tuple[int, int, str]]) -> list[str]:
+    '''Lists runs of invalid characters given as (0-based start, length, character), e.g. the ambiguous runs of a packed file'''
     invalid_chars = []
-    for match in re.finditer(r'[^ACGT]', clean_seq):        # Check for invalid characters e.g. wobble bases, etc.
-        char = match.group(0)
-        pos = match.start() + 1                             # The position of the base is the start position plus one character
-        invalid_chars.append(f"'{char}' at pos. {pos}")
-    if invalid_chars:
-        raise InvalidSequenceError(rec_id, invalid_chars)
-    return clean_rec_id, clean_seq 
+    for start, length, char in runs:
+        end = start + length                                # 1-based positions: start + 1 .. end
+        invalid_chars.append(f"'{char}' at pos. {start + 1}" if length == 1 else f"'{char}' at pos. {start + 1}-{end}")
+    return invalid_chars
@@ -0,0 +1,92 @@
+# src/dna_repeat/crossrecord.py
+    ## Cross-record repeat search: repeats between different records of a multi-FASTA (e.g. fragments that end up in one
+    ## assembly pool). All k-mers of a pool go into one global block index (pigeonhole, see pigeonhole.py; for m = 0 the single
+    ## block is the whole k-mer, i.e. plain hashing). Each k-mer looks up its own blocks (direct) and the blocks of its reverse
+    ## complement (inverted) and only checks candidates from later records, so each pair of records is searched once and the work
+    ## scales with the total length + number of candidate pairs instead of (total length)^2.
+
+from bisect import bisect_left, bisect_right
+from pathlib import Path
+from typing import Iterator
+from dna_repeat.ai import encode_kmers_both, hamming_distance_2bit
+from dna_repeat.pigeonhole import build_block_index, split_blocks
+
+CROSS_COLUMNS: list[str] = ['query_record', 'query_start', 'query_end', 'subject_record', 'subject_start', 'subject_end',
+                            'query_seq', 'subject_seq', 'mismatches', 'kmer_length', 'orientation']
+'''Output columns of --cross-record (both record IDs; positions are 1-based, local to each record)'''
+
+def read_pools(path: Path) -> dict[str, str]:
+    '''Reads a pool file: one "record_id<TAB>pool" line per record. Blank lines and lines starting with # are skipped'''
+    pools: dict[str, str] = {}
+    with open(path) as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.rstrip('\r\n')
+            if not line.strip() or line.startswith('#'):
+                continue
+            rec_id, tab, pool = line.rpartition('\t')
+            if not tab or not rec_id.strip() or not pool.strip():
+                raise ValueError(f'{path}, line {line_number}: expected "record_id<TAB>pool"')
+            pools[rec_id.strip()] = pool.strip()
+    return pools
+
+def group_pools(record_ids: list[str], pools: dict[str, str] | None) -> list[list[int]]:
+    '''Record numbers per pool, in order of first appearance. Without pools all records are one pool; with pools,
+    records that aren't listed are left out'''
+    if pools is None:
+        return [list(range(len(record_ids)))]
+    groups: dict[str, list[int]] = {}
+    for r, rec_id in enumerate(record_ids):
+        if rec_id in pools:
+            groups.setdefault(pools[rec_id], []).append(r)
+    return list(groups.values())
+
+def iter_cross_pairs(seqs: list[str], kmer_length: int, allowed_mismatches: int, direct: bool = True,
+                     inverted: bool = True) -> Iterator[tuple[int, int, int, int, int, bool]]:
+    '''Yields (query record, query pos, subject record, subject pos, mismatches, inverted) of repeats between two different
+    sequences (query record < subject record; 0-based k-mer starts, subject on its forward strand). Ordered by query'''
+    codes: list[int] = []
+    rc_codes: list[int] = []
+    starts: list[int] = []                                  # global k-mer number of each sequence's first k-mer
+    for seq in seqs:
+        starts.append(len(codes))
+        if len(seq) >= kmer_length:
+            seq_codes, seq_rc_codes = encode_kmers_both(seq, kmer_length)
+            codes += seq_codes
+            rc_codes += seq_rc_codes
+    starts.append(len(codes))
+    blocks = split_blocks(kmer_length, allowed_mismatches)
+    indexes = [build_block_index(codes, shift, mask) for shift, mask in blocks]
+
+    def located(candidates: set[int]) -> Iterator[tuple[int, int, int]]:
+        '''(global k-mer number, record, local pos) of candidates, sorted'''
+        for g in sorted(candidates):
+            s = bisect_right(starts, g) - 1
+            yield g, s, g - starts[s]
+
+    for r in range(len(seqs)):
+        later = starts[r + 1]                               # only k-mers of later sequences
+        for g in range(starts[r], later):
+            for query_code, is_inverted, wanted in ((codes[g], False, direct), (rc_codes[g], True, inverted)):
+                if not wanted:
+                    continue
+                candidates: set[int] = set()
+                for (shift, mask), index in zip(blocks, indexes):
+                    bucket = index.get((query_code >> shift) & mask)
+                    if bucket:
+                        candidates.update(bucket[bisect_left(bucket, later):])
+                for c, s, pos in located(candidates):
+                    mismatches = hamming_distance_2bit(query_code, codes[c], kmer_length)
+                    if mismatches <= allowed_mismatches:
+                        yield r, g - starts[r], s, pos, mismatches, is_inverted
+
+def iter_cross_rows(records: list[tuple[str, str]], kmer_length: int, allowed_mismatches: int, direct: bool = True,
+                    inverted: bool = True, pools: dict[str, str] | None = None) -> Iterator[tuple]:
+    '''Yields CROSS_COLUMNS rows of repeats between (clean) records of the same pool, pool by pool'''
+    for group in group_pools([rec_id for rec_id, _ in records], pools):
+        pool_records = [records[r] for r in group]
+        for r, i, s, p, mismatches, is_inverted in iter_cross_pairs([seq for _, seq in pool_records], kmer_length,
+                                                                   allowed_mismatches, direct, inverted):
+            (query_id, query_seq), (subject_id, subject_seq) = pool_records[r], pool_records[s]
+            yield (query_id, i + 1, i + kmer_length, subject_id, p + 1, p + kmer_length,
+                   query_seq[i:i + kmer_length], subject_seq[p:p + kmer_length], mismatches, kmer_length,
+                   'inverted' if is_inverted else 'direct')
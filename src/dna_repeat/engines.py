@@ -0,0 +1,71 @@
+# src/dna_repeat/engines.py
+# Registry of repeat-finding engines. Each engine is a (direct, inverted) pair of generator functions with the same signature,
+# yielding (query pos, subject pos, mismatches) tuples (0-based k-mer starts)
+
+from importlib import import_module
+from typing import Callable, Iterator
+from dna_repeat.ai import iter_pairs_2bit, iter_invert_pairs_2bit
+from dna_repeat.pigeonhole import iter_pairs_pigeonhole, iter_invert_pairs_pigeonhole, iter_pairs_both_pigeonhole, iter_code_pairs_pigeonhole
+from dna_repeat.exact import iter_pairs_exact, iter_invert_pairs_exact, iter_pairs_both_exact, iter_code_pairs_exact
+
+SearchFunc = Callable[[str, int, int], Iterator[tuple[int, int, int]]]
+
+def lazy_engine(module: str, name: str) -> SearchFunc:
+    '''Engine function that imports its module on first call. Keeps NumPy (and the process pool) off the import path of the
+    pure-Python engines'''
+    def search(*args, **kwargs) -> Iterator[tuple[int, int, int]]:
+        return getattr(import_module(module), name)(*args, **kwargs)
+    search.__name__ = search.__qualname__ = name
+    return search
+
+iter_pairs_np = lazy_engine('dna_repeat.vectorized', 'iter_pairs_np')
+iter_invert_pairs_np = lazy_engine('dna_repeat.vectorized', 'iter_invert_pairs_np')
+iter_code_pairs_np = lazy_engine('dna_repeat.vectorized', 'iter_code_pairs_np')
+
+ENGINES: dict[str, tuple[SearchFunc, SearchFunc]] = {
+    'index': (iter_pairs_pigeonhole, iter_invert_pairs_pigeonhole),
+    'exact': (iter_pairs_exact, iter_invert_pairs_exact),
+    'numpy': (iter_pairs_np, iter_invert_pairs_np),
+    '2bit': (iter_pairs_2bit, iter_invert_pairs_2bit),
+}
+'''Engine name -> (direct search, inverted search)'''
+
+CombinedSearchFunc = Callable[[str, int, int], Iterator[tuple[int, int, int, bool]]]
+
+COMBINED_ENGINES: dict[str, CombinedSearchFunc] = {
+    'index': iter_pairs_both_pigeonhole,
+    'exact': iter_pairs_both_exact,
+}
+'''Engine name -> search that finds direct and inverted repeats in one pass, yielding (query pos, subject pos, mismatches, inverted).
+Used instead of the two separate searches when both orientations are wanted'''
+
+CODE_ENGINES: dict[str, Callable[..., Iterator[tuple[int, int, int, bool]]]] = {
+    'index': iter_code_pairs_pigeonhole,
+    'exact': iter_code_pairs_exact,
+    'numpy': iter_code_pairs_np,
+}
+'''Engine name -> search over k-mer codes that are already encoded: (codes, valid, k, m, direct, inverted, min_distance,
+max_distance), yielding (query pos, subject pos, mismatches, inverted). valid (bool array or None) marks the k-mers that may
+be compared. Packed files are searched through these, without decoding the sequence to a str'''
+
+DEFAULT_ENGINE = 'auto'
+
+EXACT_ONLY_ENGINES: set[str] = {'exact'}
+'''Engines that can only find repeats with 0 mismatches'''
+
+TILED_ENGINES: set[str] = {'numpy', 'index', 'exact'}
+'''Engines that can split one sequence's search over several processes (take a `jobs` keyword): numpy by strips of its
+comparison matrix, index/exact by strips of query k-mers (strips.py)'''
+
+MIN_BLOCK_LENGTH = 4
+'''Shortest pigeonhole block (bp) that still filters well. Below this, most pairs share a block and brute force (NumPy) wins'''
+
+def select_engine(name: str, kmer_length: int, allowed_mismatches: int) -> str:
+    '''Resolves 'auto' to an engine name: exact hashing for m = 0, block-index filtering for low m, NumPy brute force for high m'''
+    if name != 'auto':
+        return name
+    if allowed_mismatches == 0:
+        return 'exact'
+    if kmer_length // (allowed_mismatches + 1) < MIN_BLOCK_LENGTH:
+        return 'numpy'
+    return 'index'
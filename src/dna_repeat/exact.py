@@ -0,0 +1,116 @@
+# src/dna_repeat/exact.py
+    ## Exact repeat search (-m 0) by hashing. Identical k-mers have identical 2-bit codes, so grouping the codes into buckets
+    ## (code -> positions) gives every repeat pair directly. No hamming distance needed; runtime ~ sequence length + number of hits.
+    ## One index (forward strand) serves direct and inverted searches, for any range of query k-mers (strips.py, -j).
+
+from typing import Iterator, TYPE_CHECKING
+from bisect import bisect_left
+from dna_repeat.ai import encode_kmers, encode_kmers_both
+from dna_repeat.core import PairCounter, RepeatHit, make_hit, subject_window
+from dna_repeat.strips import iter_strip_pairs
+
+if TYPE_CHECKING:
+    import numpy as np
+
+def build_code_index(codes: list[int], valid: list[bool] | None = None) -> dict[int, list[int]]:
+    '''Maps 2-bit k-mer code -> sorted list of positions that have it (only positions where valid is True)'''
+    index: dict[int, list[int]] = {}
+    items = enumerate(codes) if valid is None else ((pos, code) for pos, code in enumerate(codes) if valid[pos])
+    for pos, code in items:
+        index.setdefault(code, []).append(pos)
+    return index
+
+class CodeIndex:
+    '''2-bit k-mer codes of a sequence and the code -> positions index over them. rc_codes (reverse-complement code of every
+    k-mer) are only needed for inverted searches. K-mers where valid is False (e.g. overlapping ambiguous bases) are left out
+    of the index and never queried'''
+
+    def __init__(self, codes: list[int], rc_codes: list[int] | None, valid: list[bool] | None = None) -> None:
+        self.codes = codes
+        self.rc_codes = rc_codes
+        self.valid = valid
+        self.n_kmers = len(codes)
+        self.index = build_code_index(codes, valid)
+
+    @classmethod
+    def from_seq(cls, seq: str, kmer_length: int, inverted: bool = True) -> 'CodeIndex':
+        return cls(*encode_kmers_both(seq, kmer_length)) if inverted else cls(encode_kmers(seq, kmer_length), None)
+
+    def pairs(self, direct: bool = True, inverted: bool = True, min_distance: int = 0, max_distance: int | None = None,
+              rows: tuple[int, int] | None = None, counter: PairCounter | None = None) -> Iterator[tuple[int, int, int, bool]]:
+        '''Yields (query pos, subject pos, 0, inverted) for the query k-mers in rows = (first, stop) (default: all). Per query
+        k-mer: direct hits (subject pos ascending), then inverted hits (descending), the order of the nested-loop searches.
+        Only pairs with min_distance <= subject pos - query pos <= max_distance are reported. Nothing is compared: every
+        pair taken from a bucket is a hit, and that is what counter gets'''
+        codes, rc_codes, index, valid = self.codes, self.rc_codes, self.index, self.valid
+        for i in range(*(rows or (0, self.n_kmers))):
+            if valid is not None and not valid[i]:
+                continue
+            first, stop = subject_window(i, self.n_kmers, min_distance, max_distance)
+            if direct:
+                bucket = index[codes[i]]                            # sorted, and always has i itself
+                subjects = bucket[bisect_left(bucket, max(i + 1, first)):bisect_left(bucket, stop)]
+                if counter:
+                    counter.pairs += len(subjects)
+                for j in subjects:
+                    yield i, j, 0, False
+            if inverted:
+                bucket = index.get(rc_codes[i])                     # an inverted repeat is a lookup of the rc code
+                if bucket:
+                    subjects = bucket[bisect_left(bucket, first):bisect_left(bucket, stop)]
+                    if counter:
+                        counter.pairs += len(subjects)
+                    for p in reversed(subjects):                    # p >= i, from the 3' end like the nested loop
+                        yield i, p, 0, True
+
+def find_repeats_exact(rec_id: str, seq: str, kmer_length: int, allowed_mismatches: int = 0) -> list[RepeatHit]:
+    '''Find exact direct repeats by hashing k-mer codes. Same hits (and order) as find_repeats_2bit with m = 0'''
+    return list(iter_repeats_exact(rec_id, seq, kmer_length, allowed_mismatches))
+
+def iter_repeats_exact(rec_id: str, seq: str, kmer_length: int, allowed_mismatches: int = 0) -> Iterator[RepeatHit]:
+    '''Generator version of find_repeats_exact; yields hits one at a time'''
+    for i, j, mismatches in iter_pairs_exact(seq, kmer_length, allowed_mismatches):
+        yield make_hit(rec_id, seq, kmer_length, i, j, mismatches, 'direct')
+
+def iter_pairs_exact(seq: str, kmer_length: int, allowed_mismatches: int = 0,
+                     min_distance: int = 0, max_distance: int | None = None, *, jobs: int = 1,
+                     counter: PairCounter | None = None) -> Iterator[tuple[int, int, int]]:
+    '''Yields (query pos, subject pos, 0) of exact direct repeats; 0-based k-mer starts.
+    Only pairs with min_distance <= subject pos - query pos <= max_distance are reported. jobs > 1: strips of query k-mers
+    run in a process pool'''
+    for i, j, _, _ in iter_strip_pairs(CodeIndex.from_seq(seq, kmer_length, inverted=False), True, False, min_distance, max_distance, jobs, counter):
+        yield i, j, 0
+
+def find_invert_repeats_exact(rec_id: str, seq: str, kmer_length: int, allowed_mismatches: int = 0) -> list[RepeatHit]:
+    '''Find exact inverted repeats by hashing k-mer codes. Same hits (and order) as find_invert_repeats_2bit with m = 0'''
+    return list(iter_invert_repeats_exact(rec_id, seq, kmer_length, allowed_mismatches))
+
+def iter_invert_repeats_exact(rec_id: str, seq: str, kmer_length: int, allowed_mismatches: int = 0) -> Iterator[RepeatHit]:
+    '''Generator version of find_invert_repeats_exact; yields hits one at a time'''
+    for i, p, mismatches in iter_invert_pairs_exact(seq, kmer_length, allowed_mismatches):
+        yield make_hit(rec_id, seq, kmer_length, i, p, mismatches, 'inverted')
+
+def iter_invert_pairs_exact(seq: str, kmer_length: int, allowed_mismatches: int = 0,
+                            min_distance: int = 0, max_distance: int | None = None, *, jobs: int = 1,
+                            counter: PairCounter | None = None) -> Iterator[tuple[int, int, int]]:
+    '''Yields (query pos, subject pos, 0) of exact inverted repeats; 0-based k-mer starts, subject on the forward strand.
+    Only pairs with min_distance <= subject pos - query pos <= max_distance are reported. jobs > 1: see iter_pairs_exact'''
+    for i, p, _, _ in iter_strip_pairs(CodeIndex.from_seq(seq, kmer_length), False, True, min_distance, max_distance, jobs, counter):
+        yield i, p, 0
+
+def iter_pairs_both_exact(seq: str, kmer_length: int, allowed_mismatches: int = 0, min_distance: int = 0,
+                          max_distance: int | None = None, *, jobs: int = 1, counter: PairCounter | None = None) -> Iterator[tuple[int, int, int, bool]]:
+    '''Yields (query pos, subject pos, 0, inverted) of exact direct and inverted repeats from one encoding pass and one index.
+    Per query k-mer: direct hits first, then inverted hits, each in the same order as the separate generators'''
+    yield from iter_strip_pairs(CodeIndex.from_seq(seq, kmer_length), True, True, min_distance, max_distance, jobs, counter)
+
+def iter_code_pairs_exact(codes: 'np.ndarray', valid: 'np.ndarray | None', kmer_length: int, allowed_mismatches: int = 0,
+                          direct: bool = True, inverted: bool = True, min_distance: int = 0,
+                          max_distance: int | None = None, *, jobs: int = 1,
+                          counter: PairCounter | None = None) -> Iterator[tuple[int, int, int, bool]]:
+    '''Same pairs (and order) as iter_pairs_both_exact, or one orientation of it, from k-mer codes that are already encoded
+    (e.g. straight from a packed file, see PackedSequence.kmer_codes). K-mers where valid is False are skipped'''
+    from dna_repeat.vectorized import reverse_complement_codes     # NumPy; code arrays only come from packed files
+    rc_codes = reverse_complement_codes(codes, kmer_length).tolist() if inverted else None
+    index = CodeIndex(codes.tolist(), rc_codes, None if valid is None else valid.tolist())
+    yield from iter_strip_pairs(index, direct, inverted, min_distance, max_distance, jobs, counter)
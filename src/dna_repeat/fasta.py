@@ -0,0 +1,138 @@
+# src/dna_repeat/fasta.py
+# Native FASTA reader. The file is memory-mapped and indexed in one pass (samtools .fai layout: name, length, offset,
+# line bases, line width), so record counts / total bp are known up front and any record can be read directly
+
+import mmap
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator
+
+@dataclass
+class FaiEntry:
+    '''One record of a .fai index'''
+    name: str
+    length: int             # number of bases
+    offset: int             # byte offset of the first base
+    line_bases: int         # bases per line (0 = lines are not all the same length)
+    line_width: int         # bytes per line, incl. newline
+    end: int | None = None  # byte offset after the last base, if known (needed when line_bases = 0)
+
+    def byte_end(self) -> int:
+        '''Byte offset after the last base of the record'''
+        if self.end is not None:
+            return self.end
+        if self.length == 0:
+            return self.offset
+        full_lines, rest = divmod(self.length, self.line_bases)
+        return self.offset + full_lines * self.line_width + rest - (self.line_width - self.line_bases if rest == 0 else 0)
+
+    def to_line(self) -> str:
+        return f'{self.name}\t{self.length}\t{self.offset}\t{self.line_bases}\t{self.line_width}\n'
+
+class FastaFile:
+    '''Memory-mapped FASTA file with a .fai-style offset index. Reuses an existing, up to date <file>.fai'''
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self._file = open(self.path, 'rb')
+        size = self.path.stat().st_size
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b''
+        fai_path = self.fai_path()
+        if fai_path.is_file() and fai_path.stat().st_mtime >= self.path.stat().st_mtime:
+            self.entries = read_fai(fai_path)
+        else:
+            self.entries = build_fai(self._mm)
+        self._by_name = {entry.name: entry for entry in self.entries}
+
+    def fai_path(self) -> Path:
+        return self.path.with_name(self.path.name + '.fai')
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    @property
+    def total_length(self) -> int:
+        '''Total number of bases in the file'''
+        return sum(entry.length for entry in self.entries)
+
+    def fetch(self, entry: FaiEntry) -> str:
+        '''Returns the sequence of one record (newlines removed)'''
+        raw = self._mm[entry.offset:entry.byte_end()]
+        return raw.translate(None, b'\r\n ').decode('ascii', errors='replace')
+
+    def __getitem__(self, key: int | str) -> str:
+        '''Random access by record number or name'''
+        entry = self.entries[key] if isinstance(key, int) else self._by_name[key]
+        return self.fetch(entry)
+
+    def __iter__(self) -> Iterator[tuple[str, str]]:
+        '''Yields (record ID, sequence) tuples in file order'''
+        for entry in self.entries:
+            yield entry.name, self.fetch(entry)
+
+    def save_index(self) -> Path | None:
+        '''Writes <file>.fai next to the FASTA file. Not possible (returns None) if line lengths vary within a record'''
+        if any(entry.line_bases == 0 and entry.length for entry in self.entries):
+            return None
+        fai_path = self.fai_path()
+        with open(fai_path, 'w') as f:
+            f.writelines(entry.to_line() for entry in self.entries)
+        return fai_path
+
+    def close(self) -> None:
+        if isinstance(self._mm, mmap.mmap):
+            self._mm.close()
+        self._file.close()
+
+    def __enter__(self) -> 'FastaFile':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+def read_fai(fai_path: Path) -> list[FaiEntry]:
+    '''Reads a samtools-style .fai index'''
+    entries: list[FaiEntry] = []
+    with open(fai_path) as f:
+        for line in f:
+            name, length, offset, line_bases, line_width = line.rstrip('\n').split('\t')[:5]
+            entries.append(FaiEntry(name, int(length), int(offset), int(line_bases), int(line_width)))
+    return entries
+
+def build_fai(data: bytes | mmap.mmap) -> list[FaiEntry]:
+    '''Indexes FASTA data in one pass (finds headers, counts newlines per record). Text before the first header is ignored'''
+    entries: list[FaiEntry] = []
+    size = len(data)
+    pos = 0 if data[:1] == b'>' else data.find(b'\n>')
+    if pos > 0:
+        pos += 1
+    while pos != -1:
+        header_end = data.find(b'\n', pos)
+        if header_end == -1:
+            header_end = size
+        header = data[pos + 1:header_end].decode('ascii', errors='replace').strip()
+        name = header.split(maxsplit=1)[0] if header else ''
+        offset = min(header_end + 1, size)
+        next_header = data.find(b'\n>', header_end)
+        stop = size if next_header == -1 else next_header + 1
+        entries.append(_index_record(name, data[offset:stop], offset))
+        pos = -1 if next_header == -1 else next_header + 1
+    return entries
+
+def _index_record(name: str, span: bytes, offset: int) -> FaiEntry:
+    '''Builds the index entry for one record from its raw bytes (everything between its header and the next)'''
+    content_length = len(span.rstrip(b'\r\n'))                # bytes up to the last base
+    length = content_length - span.count(b'\n', 0, content_length) - span.count(b'\r', 0, content_length)
+    first_newline = span.find(b'\n', 0, content_length)
+    if first_newline == -1:                                     # one line (or empty)
+        line_end = span.find(b'\n', content_length)
+        line_width = length if line_end == -1 else line_end + 1
+        return FaiEntry(name, length, offset, length, line_width, offset + content_length)
+    line_width = first_newline + 1
+    line_bases = len(span[:first_newline].rstrip(b'\r'))
+    entry = FaiEntry(name, length, offset, line_bases, line_width)
+    full_lines = span[line_width - 1:content_length:line_width] # byte at each expected line end should be a newline
+    if line_bases == 0 or full_lines.count(b'\n') != len(full_lines) or entry.byte_end() != offset + content_length:
+        entry.line_bases = entry.line_width = 0                 # lines aren't all the same length; keep the exact end instead
+    entry.end = offset + content_length
+    return entry
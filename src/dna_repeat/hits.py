@@ -0,0 +1,112 @@
+# src/dna_repeat/hits.py
+# Compact (struct-of-arrays) hit table for one record. Stores only coordinates, mismatches and an orientation flag;
+# the record ID and sequence are stored once and the k-mer strings are only sliced out when hits are read/written
+
+from array import array
+from itertools import repeat
+from typing import Iterable, Iterator, TYPE_CHECKING
+from dna_repeat.core import RepeatHit, make_hit
+
+if TYPE_CHECKING:
+    import numpy as np
+
+ORIENTATIONS: tuple[str, str] = ('direct', 'inverted')
+'''Orientation flag -> orientation name'''
+
+class HitTable:
+    '''Hits of one record as columns. Iterating gives RepeatHit objects (built on the fly)'''
+
+    def __init__(self, record_id: str, seq: str, kmer_length: int) -> None:
+        self.record_id = record_id
+        self.seq = seq
+        self.kmer_length = kmer_length
+        self.query_start = array('i')               # int32, 1-based
+        self.subject_start = array('i')             # int32, 1-based (forward strand, also for inverted repeats)
+        self.mismatches = array('B')                # uint8
+        self.inverted = array('B')                  # uint8 flag: 0 = direct, 1 = inverted
+        self.lengths: array | None = None           # int32 repeat length per hit; only for variable-length (maximal) repeats
+
+    def append(self, query_pos: int, subject_pos: int, mismatches: int, inverted: bool) -> None:
+        '''Adds one hit, from 0-based k-mer start positions'''
+        self.query_start.append(query_pos + 1)
+        self.subject_start.append(subject_pos + 1)
+        self.mismatches.append(mismatches)
+        self.inverted.append(inverted)
+        if self.lengths is not None:
+            self.lengths.append(self.kmer_length)
+
+    def extend(self, pairs: Iterable[tuple[int, int, int]], inverted: bool) -> int:
+        '''Adds (query pos, subject pos, mismatches) tuples from an engine (0-based). Returns the number added'''
+        before = len(self.query_start)
+        for query_pos, subject_pos, mismatches in pairs:
+            self.query_start.append(query_pos + 1)
+            self.subject_start.append(subject_pos + 1)
+            self.mismatches.append(mismatches)
+        added = len(self.query_start) - before
+        self.inverted.extend([inverted] * added)
+        if self.lengths is not None:
+            self.lengths.extend([self.kmer_length] * added)
+        return added
+
+    def extend_both(self, pairs: Iterable[tuple[int, int, int, bool]]) -> int:
+        '''Adds (query pos, subject pos, mismatches, inverted) tuples from a combined engine (0-based). Inverted hits are held
+        back and added after the direct ones, so the row order is the same as with separate direct/inverted searches'''
+        held_back = HitTable(self.record_id, self.seq, self.kmer_length)
+        before = len(self)
+        for query_pos, subject_pos, mismatches, inverted in pairs:
+            (held_back if inverted else self).append(query_pos, subject_pos, mismatches, inverted)
+        self.query_start.extend(held_back.query_start)
+        self.subject_start.extend(held_back.subject_start)
+        self.mismatches.extend(held_back.mismatches)
+        self.inverted.extend(held_back.inverted)
+        if self.lengths is not None:
+            self.lengths.extend([self.kmer_length] * len(held_back))
+        return len(self) - before
+
+    def extend_maximal(self, repeats: Iterable[tuple[int, int, int]], inverted: bool) -> int:
+        '''Adds variable-length repeats as (query pos, subject pos, length) tuples (0-based). Returns the number added'''
+        if self.lengths is None:
+            self.lengths = array('i', [self.kmer_length] * len(self))
+        before = len(self.query_start)
+        for query_pos, subject_pos, length in repeats:
+            self.query_start.append(query_pos + 1)
+            self.subject_start.append(subject_pos + 1)
+            self.lengths.append(length)
+        added = len(self.query_start) - before
+        self.mismatches.extend([0] * added)
+        self.inverted.extend([inverted] * added)
+        return added
+
+    def _lengths(self) -> Iterable[int]:
+        return self.lengths if self.lengths is not None else repeat(self.kmer_length, len(self))
+
+    def __len__(self) -> int:
+        return len(self.query_start)
+
+    def __iter__(self) -> Iterator[RepeatHit]:
+        for query_start, subject_start, mismatches, inverted, k in zip(self.query_start, self.subject_start, self.mismatches, self.inverted, self._lengths()):
+            yield make_hit(self.record_id, self.seq, k, query_start - 1, subject_start - 1, mismatches, ORIENTATIONS[inverted])
+
+    def spans(self) -> Iterator[tuple[int, int, int]]:
+        '''Yields (query pos, subject pos, length) per hit, 0-based'''
+        for query_start, subject_start, k in zip(self.query_start, self.subject_start, self._lengths()):
+            yield query_start - 1, subject_start - 1, k
+
+    def rows(self) -> Iterator[tuple]:
+        '''Yields output rows (same columns as RepeatHit) without building RepeatHit objects'''
+        seq = self.seq
+        for query_start, subject_start, mismatches, inverted, k in zip(self.query_start, self.subject_start, self.mismatches, self.inverted, self._lengths()):
+            yield (self.record_id, query_start, query_start + k - 1, subject_start, subject_start + k - 1,
+                   seq[query_start - 1:query_start - 1 + k], seq[subject_start - 1:subject_start - 1 + k],
+                   mismatches, k, ORIENTATIONS[inverted])
+
+    def to_numpy(self) -> dict[str, 'np.ndarray']:
+        '''Zero-copy NumPy views of the columns'''
+        import numpy as np
+        return {
+            'query_start': np.frombuffer(self.query_start, dtype=np.int32),
+            'subject_start': np.frombuffer(self.subject_start, dtype=np.int32),
+            'mismatches': np.frombuffer(self.mismatches, dtype=np.uint8),
+            'inverted': np.frombuffer(self.inverted, dtype=np.uint8),
+            'length': np.frombuffer(self.lengths, dtype=np.int32) if self.lengths is not None else np.full(len(self), self.kmer_length, dtype=np.int32),
+        }
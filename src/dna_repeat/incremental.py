@@ -0,0 +1,116 @@
+# src/dna_repeat/incremental.py
+    ## Incremental re-scan for point edits. A RepeatScanner keeps the 2-bit k-mer codes (forward and reverse complement) and the
+    ## current hits of one sequence. An edit only changes the k-mers that overlap it (at most k - 1 + edit length of them), so only
+    ## the hits involving those k-mers are dropped and recomputed (each changed k-mer vs. all k-mers, one NumPy vector compare);
+    ## everything else is kept, shifted for indels. The result is always the same as a full rescan.
+
+from typing import Iterator
+import numpy as np
+from dna_repeat.constants import ACGT
+from dna_repeat.core import clean_and_check, describe_invalid_bases, reverse_complement
+from dna_repeat.engines import ENGINES, select_engine
+from dna_repeat.error import InvalidSequenceError
+from dna_repeat.hits import HitTable
+from dna_repeat.vectorized import encode_kmers_np, hamming_tile
+
+class RepeatScanner:
+    '''Repeats of one sequence that stay up to date under substitutions, insertions and deletions'''
+
+    def __init__(self, rec_id: str, seq: str, kmer_length: int, allowed_mismatches: int, direct: bool = True,
+                 inverted: bool = True) -> None:
+        self.rec_id, self.seq = clean_and_check(rec_id, seq, kmer_length)
+        self.kmer_length = kmer_length
+        self.allowed_mismatches = allowed_mismatches
+        self.direct = direct
+        self.inverted = inverted
+        self.codes, self.rc_codes = self._encode(self.seq)
+        find_direct, find_inverted = ENGINES[select_engine('auto', kmer_length, allowed_mismatches)]
+        self.direct_hits: dict[tuple[int, int], int] = {}      # (query pos, subject pos) -> mismatches, 0-based
+        self.inverted_hits: dict[tuple[int, int], int] = {}
+        if direct:
+            self.direct_hits = {(i, j): mm for i, j, mm in find_direct(self.seq, kmer_length, allowed_mismatches)}
+        if inverted:
+            self.inverted_hits = {(i, p): mm for i, p, mm in find_inverted(self.seq, kmer_length, allowed_mismatches)}
+
+    def _encode(self, seq: str) -> tuple[np.ndarray, np.ndarray]:
+        '''(codes, rc codes) of every k-mer of seq; rc_codes[i] = code of the reverse complement of k-mer i'''
+        if len(seq) < self.kmer_length:
+            empty = np.zeros(0, dtype=np.uint64)
+            return empty, empty
+        return encode_kmers_np(seq, self.kmer_length), encode_kmers_np(reverse_complement(seq), self.kmer_length)[::-1].copy()
+
+    def substitute(self, pos: int, bases: str) -> None:
+        '''Replaces the bases starting at pos (0-based) with bases'''
+        self.edit(pos, pos + len(bases), bases)
+
+    def insert(self, pos: int, bases: str) -> None:
+        '''Inserts bases before pos (0-based); everything from pos on shifts right'''
+        self.edit(pos, pos, bases)
+
+    def delete(self, pos: int, length: int) -> None:
+        '''Deletes length bases starting at pos (0-based); everything after shifts left'''
+        self.edit(pos, pos + length, '')
+
+    def edit(self, start: int, end: int, replacement: str) -> None:
+        '''Replaces seq[start:end] with replacement and updates the hits'''
+        if not 0 <= start <= end <= len(self.seq):
+            raise IndexError(f'{self.rec_id} : edit {start}-{end} is outside the sequence (0-{len(self.seq)})')
+        replacement = replacement.upper()
+        if replacement.encode('ascii', 'replace').translate(None, ACGT):
+            raise InvalidSequenceError(self.rec_id, describe_invalid_bases(replacement))
+        k = self.kmer_length
+        shift = len(replacement) - (end - start)
+        first = max(0, start - k + 1)                           # first k-mer that overlaps the edit
+        old_stop = min(len(self.codes), end)                    # k-mers [first, old_stop) are gone...
+        self.seq = self.seq[:start] + replacement + self.seq[end:]
+        new_stop = min(max(0, len(self.seq) - k + 1), start + len(replacement))     # ...and [first, new_stop) are new
+
+        new_codes, new_rc_codes = self._encode(self.seq[first:new_stop + k - 1])
+        self.codes = np.concatenate((self.codes[:first], new_codes, self.codes[max(old_stop, first):]))
+        self.rc_codes = np.concatenate((self.rc_codes[:first], new_rc_codes, self.rc_codes[max(old_stop, first):]))
+
+        def moved(pos: int) -> int | None:
+            '''Position of an old k-mer after the edit; None if it overlapped the edit'''
+            if pos < first:
+                return pos
+            return pos + shift if pos >= old_stop else None
+
+        for hits in (self.direct_hits, self.inverted_hits):
+            kept = {}
+            for (i, j), mm in hits.items():
+                i, j = moved(i), moved(j)
+                if i is not None and j is not None:
+                    kept[i, j] = mm
+            hits.clear()
+            hits.update(kept)
+        self._add_hits(range(first, new_stop))
+
+    def _add_hits(self, positions: range) -> None:
+        '''Compares the k-mers at positions with every k-mer and adds the qualifying pairs'''
+        for a in positions:
+            if self.direct:
+                mismatches = hamming_tile(self.codes[a:a + 1], self.codes, self.kmer_length)[0]
+                for b in np.flatnonzero(mismatches <= self.allowed_mismatches).tolist():
+                    if b != a:
+                        self.direct_hits[min(a, b), max(a, b)] = int(mismatches[b])
+            if self.inverted:
+                # hamming(k-mer a, rc of k-mer b) = hamming(k-mer b, rc of k-mer a): one vector gives a as query and as subject
+                mismatches = hamming_tile(self.codes[a:a + 1], self.rc_codes, self.kmer_length)[0]
+                for b in np.flatnonzero(mismatches <= self.allowed_mismatches).tolist():
+                    self.inverted_hits[min(a, b), max(a, b)] = int(mismatches[b])
+
+    def iter_pairs(self) -> Iterator[tuple[int, int, int, bool]]:
+        '''Yields (query pos, subject pos, mismatches, inverted), in the same order as a full scan'''
+        for (i, j) in sorted(self.direct_hits):
+            yield i, j, self.direct_hits[i, j], False
+        for (i, p) in sorted(self.inverted_hits, key=lambda pair: (pair[0], -pair[1])):    # nested loop runs from the 3' end
+            yield i, p, self.inverted_hits[i, p], True
+
+    def hit_table(self) -> HitTable:
+        '''Current hits as a HitTable (same rows as scanning the current sequence from scratch)'''
+        hits = HitTable(self.rec_id, self.seq, self.kmer_length)
+        hits.extend_both(self.iter_pairs())
+        return hits
+
+    def __len__(self) -> int:
+        return len(self.direct_hits) + len(self.inverted_hits)
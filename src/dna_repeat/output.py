@@ -0,0 +1,108 @@
+# src/dna_repeat/output.py
+# Streaming result writer. Rows are written (and flushed) record by record, so memory use doesn't grow with the total number of hits.
+# A serial CSV/TSV run without cache goes further and writes each record in blocks of HIT_BLOCK_ROWS hits
+
+import csv
+import sys
+from importlib.util import find_spec
+from dataclasses import astuple, fields
+from pathlib import Path
+from typing import Iterable, TextIO
+from dna_repeat.core import RepeatHit
+from dna_repeat.hits import HitTable
+
+STREAMING_FORMATS: dict[str, str] = {'csv': ',', 'tsv': '\t'}
+'''Output format -> delimiter, for formats written row by row with the csv module'''
+
+HIT_BLOCK_ROWS = 1 << 16
+'''Hits per block when a record's hits are written as they are found (ScanParams.block_hits); ~650 kB of HitTable columns'''
+
+PANDAS_FORMATS: set[str] = {'parquet'}
+'''Output formats that need pandas (optional). Rows are collected and written on close'''
+
+FORMAT_ENGINES: dict[str, list[str]] = {'parquet': ['pyarrow', 'fastparquet']}
+'''Pandas format -> packages that can write it (pandas needs one of them)'''
+
+OUTPUT_FORMATS: list[str] = [*STREAMING_FORMATS, *PANDAS_FORMATS]
+
+COLUMNS: list[str] = [f.name for f in fields(RepeatHit)]
+
+def missing_format_dependency(output_format: str) -> str | None:
+    '''Name of the optional package(s) output_format needs that aren't installed, or None. Lets the CLI refuse a format
+    before scanning instead of failing when the results are written on close'''
+    if output_format not in PANDAS_FORMATS:
+        return None
+    if find_spec('pandas') is None:
+        return 'pandas'
+    engines = FORMAT_ENGINES.get(output_format, [])
+    if engines and not any(find_spec(engine) for engine in engines):
+        return ' or '.join(engines)
+    return None
+
+class HitWriter:
+    '''Writes hits to output.<format> in output_directory, or to stdout if output_directory is None.
+    The file (and header) is only created once the first hit comes in. Other row types (e.g. per-record summaries) can be
+    written with write_rows and their own columns'''
+
+    def __init__(self, output_directory: Path | None, output_format: str = 'csv', stdout_message: str | None = None,
+                 columns: list[str] = COLUMNS) -> None:
+        self.output_format = output_format
+        self.columns = columns
+        self.output_filepath = output_directory / f'output.{output_format}' if output_directory else None
+        self.stdout_message = stdout_message        # printed before the first row when writing to stdout
+        self.rows_written = 0
+        self._handle: TextIO | None = None
+        self._writer = None
+        self._pending_rows: list[tuple] = []        # pandas formats only
+
+    def write(self, hits: HitTable | Iterable[RepeatHit] | None) -> int:
+        '''Writes hits (a HitTable, or RepeatHits consumed as they come) and flushes. Returns the number of rows written'''
+        if hits is None:
+            return 0
+        return self.write_rows(hits.rows() if isinstance(hits, HitTable) else (astuple(hit) for hit in hits))
+
+    def write_rows(self, rows: Iterable[tuple]) -> int:
+        '''Writes rows (tuples matching the columns) and flushes. Returns the number of rows written'''
+        count = 0
+        if self.output_format in PANDAS_FORMATS:
+            for row in rows:
+                self._pending_rows.append(row)
+                count += 1
+        else:
+            for row in rows:
+                if self._writer is None:
+                    self._open()
+                self._writer.writerow(row)
+                count += 1
+            if self._handle:
+                self._handle.flush()
+        self.rows_written += count
+        return count
+
+    def _open(self) -> None:
+        '''Opens the output file (or stdout) and writes the header'''
+        if self.output_filepath:
+            self._handle = open(self.output_filepath, 'w', newline='')
+        else:
+            if self.stdout_message:
+                print(self.stdout_message)
+            self._handle = sys.stdout
+        self._writer = csv.writer(self._handle, delimiter=STREAMING_FORMATS[self.output_format], lineterminator='\n')
+        self._writer.writerow(self.columns)
+
+    def close(self) -> None:
+        '''Closes the output file. Pandas formats are written here'''
+        rows, self._pending_rows = self._pending_rows, []     # cleared first: a failed write isn't retried by a second close
+        if rows:
+            import pandas as pd                     # optional; only needed for non-streaming formats
+            df = pd.DataFrame(rows, columns=self.columns)
+            getattr(df, f'to_{self.output_format}')(self.output_filepath, index=False)
+        if self._handle and self._handle is not sys.stdout:
+            self._handle.close()
+        self._handle = None
+
+    def __enter__(self) -> 'HitWriter':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
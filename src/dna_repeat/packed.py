@@ -0,0 +1,241 @@
+# src/dna_repeat/packed.py
+# Packed 2-bit sequence store ("dna-repeat pack"). Sequences are stored 4 bases per byte (A=0, C=1, G=2, T=3, first base in the
+# highest bits), so the file is ~4x smaller than FASTA and needs no parsing. Ambiguous bases (N, wobbles) are stored as runs
+# (start, length, letter) in the index and as A in the packed data. The file is memory-mapped; NumPy views of the packed bytes
+# are made straight on the mapping (no copy), and k-mer codes can be computed from them without going through a str.
+#
+# Layout (little-endian):  header  MAGIC, version (u32), index offset (u64)
+#                          data    packed bases of every record, one after the other
+#                          index   record count (u32); per record: name length (u16), name (utf-8), length (u64),
+#                                  data offset (u64), run count (u32), runs (start u64, length u64, letter u8)
+
+import mmap
+import struct
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, Iterator
+import numpy as np
+from dna_repeat.constants import NON_UPPERCASE, PACKED_MAGIC
+from dna_repeat.core import describe_invalid_runs
+from dna_repeat.error import EmptySequenceError, InvalidKmerError, InvalidSequenceError
+from dna_repeat.vectorized import BASE_LOOKUP, encode_bases_np
+
+MAGIC = PACKED_MAGIC
+VERSION = 1
+HEADER = struct.Struct('<4sIQ')
+RECORD = struct.Struct('<QQI')
+RUN = struct.Struct('<QQB')
+UNPACK = (np.arange(256, dtype=np.uint8)[:, None] >> np.array([6, 4, 2, 0], dtype=np.uint8)) & 3
+'''Packed byte -> its 4 base values (256 x 4 lookup table)'''
+DECODE = np.frombuffer(b'ACGT', dtype=np.uint8)[UNPACK]
+'''Packed byte -> its 4 ASCII letters'''
+
+@dataclass
+class PackedEntry:
+    '''One record of a packed file'''
+    name: str
+    length: int                                     # number of bases
+    offset: int                                     # byte offset of the packed bases
+    runs: list[tuple[int, int, int]] = field(default_factory=list)   # ambiguous runs: (start, length, letter byte)
+
+    @property
+    def packed_size(self) -> int:
+        return (self.length + 3) // 4
+
+def decode_bases(packed: np.ndarray, length: int, runs: list[tuple[int, int, int]]) -> str:
+    '''Letters of packed bytes (first length bases), with the ambiguous runs restored'''
+    letters = DECODE[packed].ravel()[:length]
+    for start, run_length, letter in runs:
+        letters[start:start + run_length] = letter
+    return letters.tobytes().decode('ascii')
+
+@dataclass
+class PackedSequence:
+    '''One record's packed bases (a copy: small to pickle, and valid after the file is closed) and its ambiguous runs.
+    Scans hand it to the code-array engines (engines.CODE_ENGINES) through kmer_codes, so the sequence is never decoded for
+    the search; the letters are decoded once, on the first slice, when hit rows are written'''
+    data: bytes
+    length: int
+    runs: list[tuple[int, int, int]] = field(default_factory=list)
+    _text: str | None = field(default=None, repr=False, compare=False)
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __str__(self) -> str:
+        if self._text is None:
+            self._text = decode_bases(np.frombuffer(self.data, dtype=np.uint8), self.length, self.runs)
+        return self._text
+
+    def __getitem__(self, key: slice) -> str:
+        return str(self)[key]
+
+    def bases(self) -> np.ndarray:
+        '''2-bit base values (uint8, 0-3); ambiguous bases come out as 0 (see runs)'''
+        return UNPACK[np.frombuffer(self.data, dtype=np.uint8)].ravel()[:self.length]
+
+    def kmer_codes(self, kmer_length: int) -> tuple[np.ndarray, np.ndarray]:
+        '''(codes, valid): 2-bit k-mer codes (same values as vectorized.encode_kmers_np) straight from the packed bytes, and
+        a bool mask that is False for k-mers overlapping an ambiguous run. Those are encoded with the ambiguous bases read as A,
+        so their codes must not be compared'''
+        codes = encode_bases_np(self.bases(), kmer_length)
+        valid = np.ones(len(codes), dtype=bool)
+        for start, length, _ in self.runs:
+            valid[max(0, start - kmer_length + 1):start + length] = False
+        return codes, valid
+
+    def check(self, rec_id: str, kmer_length: int, allow_ambiguous: bool = False) -> str:
+        '''Same checks as core.clean_and_check (the bases were already cleaned by write_packed). Returns the record ID to
+        report'''
+        if not self.length:
+            raise EmptySequenceError(rec_id)
+        if kmer_length > self.length:
+            raise InvalidKmerError(rec_id)
+        if not allow_ambiguous and self.runs:
+            raise InvalidSequenceError(rec_id, describe_invalid_runs((start, length, chr(letter)) for start, length, letter in self.runs))
+        return rec_id or f'No-name sequence ({self.length} bp)'
+
+    def cache_bytes(self) -> bytes:
+        '''What identifies the sequence for the result cache (cache.cache_key), without decoding it'''
+        return b'packed\0' + self.data + repr(self.runs).encode()
+
+def pack_bases(letters: np.ndarray) -> tuple[bytes, list[tuple[int, int, int]]]:
+    '''Packs uppercase ASCII letters (uint8 array) into 2-bit bytes; returns (packed bytes, ambiguous runs)'''
+    values = BASE_LOOKUP[letters]
+    ambiguous = np.flatnonzero(values == 255)
+    runs: list[tuple[int, int, int]] = []
+    if len(ambiguous):
+        run_letters = letters[ambiguous]
+        breaks = np.flatnonzero((np.diff(ambiguous) != 1) | (run_letters[1:] != run_letters[:-1])) + 1
+        for run in np.split(np.arange(len(ambiguous)), breaks):
+            start = int(ambiguous[run[0]])
+            runs.append((start, len(run), int(letters[start])))
+        values = values.copy()
+        values[ambiguous] = 0
+    padded = np.zeros((len(values) + 3) // 4 * 4, dtype=np.uint8)
+    padded[:len(values)] = values
+    quads = padded.reshape(-1, 4)
+    return (quads[:, 0] << 6 | quads[:, 1] << 4 | quads[:, 2] << 2 | quads[:, 3]).tobytes(), runs
+
+def write_packed(records: Iterable[tuple[str, str]], output_filepath: Path) -> int:
+    '''Writes (record ID, sequence) tuples to a packed 2-bit file. Sequences are cleaned like clean_and_check (uppercase,
+    letters only) but ambiguous bases are kept. Returns the number of records written'''
+    entries: list[PackedEntry] = []
+    with open(output_filepath, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, 0))
+        for rec_id, seq in records:
+            letters = np.frombuffer(seq.upper().encode('ascii', 'ignore').translate(None, NON_UPPERCASE), dtype=np.uint8)
+            data, runs = pack_bases(letters)
+            entries.append(PackedEntry(rec_id, len(letters), f.tell(), runs))
+            f.write(data)
+        index_offset = f.tell()
+        f.write(struct.pack('<I', len(entries)))
+        for entry in entries:
+            name = entry.name.encode('utf-8')
+            f.write(struct.pack('<H', len(name)) + name + RECORD.pack(entry.length, entry.offset, len(entry.runs)))
+            f.writelines(RUN.pack(*run) for run in entry.runs)
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, VERSION, index_offset))
+    return len(entries)
+
+class PackedFile:
+    '''Memory-mapped packed 2-bit file. Same interface as fasta.FastaFile (entries, iteration, random access)'''
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self._file = open(self.path, 'rb')
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            if len(self._mm) < HEADER.size:
+                raise ValueError('file is shorter than its header')
+            magic, version, index_offset = HEADER.unpack_from(self._mm)
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f'not a packed dna-repeat file (version {VERSION})')
+            self.entries = self._read_index(index_offset)
+        except (struct.error, ValueError) as e:        # truncated or corrupt: never leave a half-read index behind
+            self.close()
+            raise ValueError(f'{self.path}: {e}') from e
+        self._by_name = {entry.name: entry for entry in self.entries}
+
+    def _read_index(self, pos: int) -> list[PackedEntry]:
+        '''Reads the index at pos. Raises ValueError if it (or any record's data or runs) lies outside the file'''
+        size = len(self._mm)
+        data_stop = pos
+        if not HEADER.size <= pos <= size - 4:
+            raise ValueError(f'index offset {pos} is outside the file ({size} bytes); truncated?')
+        (count,) = struct.unpack_from('<I', self._mm, pos)
+        pos += 4
+        entries: list[PackedEntry] = []
+        for _ in range(count):
+            (name_length,) = struct.unpack_from('<H', self._mm, pos)
+            if pos + 2 + name_length > size:
+                raise ValueError('index is truncated')
+            name = self._mm[pos + 2:pos + 2 + name_length].decode('utf-8')
+            pos += 2 + name_length
+            length, offset, run_count = RECORD.unpack_from(self._mm, pos)
+            pos += RECORD.size
+            if pos + run_count * RUN.size > size:
+                raise ValueError('index is truncated')
+            runs = [RUN.unpack_from(self._mm, pos + r * RUN.size) for r in range(run_count)]
+            pos += run_count * RUN.size
+            entry = PackedEntry(name, length, offset, runs)
+            if offset < HEADER.size or offset + entry.packed_size > data_stop:
+                raise ValueError(f'record {name!r}: data ({offset}+{entry.packed_size} bytes) is outside the data section')
+            if any(start + run_length > length for start, run_length, _ in runs):
+                raise ValueError(f'record {name!r}: ambiguous run past the end of the sequence')
+            entries.append(entry)
+        return entries
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    @property
+    def total_length(self) -> int:
+        return sum(entry.length for entry in self.entries)
+
+    def packed(self, entry: PackedEntry) -> np.ndarray:
+        '''The record's packed bytes: a read-only view on the mapping (no copy)'''
+        return np.frombuffer(self._mm, dtype=np.uint8, count=entry.packed_size, offset=entry.offset)
+
+    def bases(self, entry: PackedEntry) -> np.ndarray:
+        '''2-bit base values (uint8, 0-3) of a record; ambiguous bases come out as 0 (see entry.runs)'''
+        return UNPACK[self.packed(entry)].ravel()[:entry.length]
+
+    def sequence(self, entry: PackedEntry) -> PackedSequence:
+        '''One record, still packed (its bytes are copied out of the mapping)'''
+        return PackedSequence(self._mm[entry.offset:entry.offset + entry.packed_size], entry.length, entry.runs)
+
+    def kmer_codes(self, entry: PackedEntry, kmer_length: int) -> tuple[np.ndarray, np.ndarray]:
+        '''(codes, valid) of one record, see PackedSequence.kmer_codes'''
+        return self.sequence(entry).kmer_codes(kmer_length)
+
+    def fetch(self, entry: PackedEntry) -> str:
+        '''Returns the sequence of one record, with its ambiguous bases restored'''
+        return decode_bases(self.packed(entry), entry.length, entry.runs)
+
+    def __getitem__(self, key: int | str) -> str:
+        entry = self.entries[key] if isinstance(key, int) else self._by_name[key]
+        return self.fetch(entry)
+
+    def __iter__(self) -> Iterator[tuple[str, str]]:
+        for entry in self.entries:
+            yield entry.name, self.fetch(entry)
+
+    def records(self) -> Iterator[tuple[str, PackedSequence]]:
+        '''Yields (record ID, PackedSequence) for scanning: nothing is decoded'''
+        for entry in self.entries:
+            yield entry.name, self.sequence(entry)
+
+    def save_index(self) -> None:
+        '''Packed files carry their own index; nothing to write'''
+        return None
+
+    def close(self) -> None:
+        self._mm.close()
+        self._file.close()
+
+    def __enter__(self) -> 'PackedFile':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -0,0 +1,150 @@
+# src/dna_repeat/pigeonhole.py
+    ## Block-index filtering (pigeonhole) repeat search. If two k-mers differ in at most m bases and the k-mer is cut into m + 1 blocks,
+    ## at least one block has to be an exact match. So only pairs that share a block need a full (2-bit) hamming check.
+    ## One set of block indexes (forward strand) serves direct and inverted searches; it can search any range of query k-mers,
+    ## so -j on one sequence runs strips of query k-mers in a process pool (strips.py).
+
+from typing import Iterator, TYPE_CHECKING
+from bisect import bisect_left
+from dna_repeat.ai import encode_kmers, encode_kmers_both, hamming_distance_2bit
+from dna_repeat.core import PairCounter, RepeatHit, make_hit, subject_window
+from dna_repeat.strips import iter_strip_pairs
+
+if TYPE_CHECKING:
+    import numpy as np
+
+def split_blocks(kmer_length: int, allowed_mismatches: int) -> list[tuple[int, int]]:
+    '''Splits a k-mer into m + 1 blocks (as even as possible). Returns (shift, mask) per block for pulling it out of a 2-bit code'''
+    number_of_blocks = allowed_mismatches + 1
+    blocks: list[tuple[int, int]] = []
+    start = 0
+    for b in range(number_of_blocks):
+        end = start + kmer_length // number_of_blocks + (b < kmer_length % number_of_blocks)    # first (k % blocks) blocks get one extra base
+        shift = 2 * (kmer_length - end)                                                         # first base of the k-mer is in the highest bits
+        mask = (1 << (2 * (end - start))) - 1
+        blocks.append((shift, mask))
+        start = end
+    return blocks
+
+def build_block_index(codes: list[int], shift: int, mask: int, valid: list[bool] | None = None) -> dict[int, list[int]]:
+    '''Maps the 2-bit code of one block -> sorted list of k-mer positions that have it (only positions where valid is True)'''
+    index: dict[int, list[int]] = {}
+    items = enumerate(codes) if valid is None else ((pos, code) for pos, code in enumerate(codes) if valid[pos])
+    for pos, code in items:
+        index.setdefault((code >> shift) & mask, []).append(pos)
+    return index
+
+class BlockIndex:
+    '''2-bit k-mer codes of a sequence and the block indexes over them. rc_codes (reverse-complement code of every k-mer) are
+    only needed for inverted searches. K-mers where valid is False (e.g. overlapping ambiguous bases) are left out of the
+    indexes and never queried'''
+
+    def __init__(self, codes: list[int], rc_codes: list[int] | None, kmer_length: int, allowed_mismatches: int,
+                 valid: list[bool] | None = None) -> None:
+        self.codes = codes
+        self.rc_codes = rc_codes
+        self.valid = valid
+        self.n_kmers = len(codes)
+        self.kmer_length = kmer_length
+        self.allowed_mismatches = allowed_mismatches
+        self.blocks = split_blocks(kmer_length, allowed_mismatches)
+        self.indexes = [build_block_index(codes, shift, mask, valid) for shift, mask in self.blocks]
+
+    @classmethod
+    def from_seq(cls, seq: str, kmer_length: int, allowed_mismatches: int, inverted: bool = True) -> 'BlockIndex':
+        codes, rc_codes = encode_kmers_both(seq, kmer_length) if inverted else (encode_kmers(seq, kmer_length), None)
+        return cls(codes, rc_codes, kmer_length, allowed_mismatches)
+
+    def pairs(self, direct: bool = True, inverted: bool = True, min_distance: int = 0, max_distance: int | None = None,
+              rows: tuple[int, int] | None = None, counter: PairCounter | None = None) -> Iterator[tuple[int, int, int, bool]]:
+        '''Yields (query pos, subject pos, mismatches, inverted) for the query k-mers in rows = (first, stop) (default: all).
+        Per query k-mer: direct hits (subject pos ascending), then inverted hits (descending), the order of the nested-loop
+        searches. Only pairs with min_distance <= subject pos - query pos <= max_distance are compared; counter gets the
+        number of candidate pairs that were hamming-checked'''
+        codes, rc_codes, kmer_length, allowed_mismatches = self.codes, self.rc_codes, self.kmer_length, self.allowed_mismatches
+        valid = self.valid
+        blocks_indexes = list(zip(self.blocks, self.indexes))
+        for i in range(*(rows or (0, self.n_kmers))):
+            if valid is not None and not valid[i]:
+                continue
+            first, stop = subject_window(i, self.n_kmers, min_distance, max_distance)
+            if direct:
+                code = codes[i]
+                direct_first = max(i + 1, first)                    # only j > i
+                candidates: set[int] = set()
+                for (shift, mask), index in blocks_indexes:
+                    bucket = index[(code >> shift) & mask]          # always exists; k-mer i is in its own bucket
+                    candidates.update(bucket[bisect_left(bucket, direct_first):bisect_left(bucket, stop)])
+                if counter:
+                    counter.pairs += len(candidates)
+                for j in sorted(candidates):
+                    mismatches = hamming_distance_2bit(code, codes[j], kmer_length)
+                    if mismatches <= allowed_mismatches:
+                        yield i, j, mismatches, False
+            if inverted:
+                rc_code = rc_codes[i]                               # inverted: p >= i
+                rc_candidates: set[int] = set()
+                for (shift, mask), index in blocks_indexes:
+                    bucket = index.get((rc_code >> shift) & mask)
+                    if bucket:
+                        rc_candidates.update(bucket[bisect_left(bucket, first):bisect_left(bucket, stop)])
+                if counter:
+                    counter.pairs += len(rc_candidates)
+                for p in sorted(rc_candidates, reverse=True):       # from the 3' end like the nested loop
+                    mismatches = hamming_distance_2bit(rc_code, codes[p], kmer_length)
+                    if mismatches <= allowed_mismatches:
+                        yield i, p, mismatches, True
+
+def find_repeats_pigeonhole(rec_id: str, seq: str, kmer_length: int, allowed_mismatches: int) -> list[RepeatHit]:
+    '''Find direct repeats by block-index filtering. Same hits (and order) as find_repeats_2bit'''
+    return list(iter_repeats_pigeonhole(rec_id, seq, kmer_length, allowed_mismatches))
+
+def iter_repeats_pigeonhole(rec_id: str, seq: str, kmer_length: int, allowed_mismatches: int) -> Iterator[RepeatHit]:
+    '''Generator version of find_repeats_pigeonhole; yields hits one at a time'''
+    for i, j, mismatches in iter_pairs_pigeonhole(seq, kmer_length, allowed_mismatches):
+        yield make_hit(rec_id, seq, kmer_length, i, j, mismatches, 'direct')
+
+def iter_pairs_pigeonhole(seq: str, kmer_length: int, allowed_mismatches: int,
+                          min_distance: int = 0, max_distance: int | None = None, *, jobs: int = 1,
+                          counter: PairCounter | None = None) -> Iterator[tuple[int, int, int]]:
+    '''Yields (query pos, subject pos, mismatches) of direct repeats; 0-based k-mer starts.
+    Only pairs with min_distance <= subject pos - query pos <= max_distance are compared. jobs > 1: strips of query k-mers
+    run in a process pool'''
+    index = BlockIndex.from_seq(seq, kmer_length, allowed_mismatches, inverted=False)
+    for i, j, mismatches, _ in iter_strip_pairs(index, True, False, min_distance, max_distance, jobs, counter):
+        yield i, j, mismatches
+
+def find_invert_repeats_pigeonhole(rec_id: str, seq: str, kmer_length: int, allowed_mismatches: int) -> list[RepeatHit]:
+    '''Find inverted repeats by block-index filtering. Same hits (and order) as find_invert_repeats_2bit'''
+    return list(iter_invert_repeats_pigeonhole(rec_id, seq, kmer_length, allowed_mismatches))
+
+def iter_invert_repeats_pigeonhole(rec_id: str, seq: str, kmer_length: int, allowed_mismatches: int) -> Iterator[RepeatHit]:
+    '''Generator version of find_invert_repeats_pigeonhole; yields hits one at a time'''
+    for i, p, mismatches in iter_invert_pairs_pigeonhole(seq, kmer_length, allowed_mismatches):
+        yield make_hit(rec_id, seq, kmer_length, i, p, mismatches, 'inverted')
+
+def iter_invert_pairs_pigeonhole(seq: str, kmer_length: int, allowed_mismatches: int,
+                                 min_distance: int = 0, max_distance: int | None = None, *, jobs: int = 1,
+                                 counter: PairCounter | None = None) -> Iterator[tuple[int, int, int]]:
+    '''Yields (query pos, subject pos, mismatches) of inverted repeats; 0-based k-mer starts, subject on the forward strand.
+    Only pairs with min_distance <= subject pos - query pos <= max_distance are compared. jobs > 1: see iter_pairs_pigeonhole'''
+    index = BlockIndex.from_seq(seq, kmer_length, allowed_mismatches)
+    for i, p, mismatches, _ in iter_strip_pairs(index, False, True, min_distance, max_distance, jobs, counter):
+        yield i, p, mismatches
+
+def iter_pairs_both_pigeonhole(seq: str, kmer_length: int, allowed_mismatches: int, min_distance: int = 0,
+                               max_distance: int | None = None, *, jobs: int = 1, counter: PairCounter | None = None) -> Iterator[tuple[int, int, int, bool]]:
+    '''Yields (query pos, subject pos, mismatches, inverted) of direct and inverted repeats from one encoding pass and one set of
+    block indexes (forward strand). Per query k-mer: direct hits first, then inverted hits, each in the order of the separate generators'''
+    yield from iter_strip_pairs(BlockIndex.from_seq(seq, kmer_length, allowed_mismatches), True, True, min_distance, max_distance, jobs, counter)
+
+def iter_code_pairs_pigeonhole(codes: 'np.ndarray', valid: 'np.ndarray | None', kmer_length: int, allowed_mismatches: int,
+                               direct: bool = True, inverted: bool = True, min_distance: int = 0,
+                               max_distance: int | None = None, *, jobs: int = 1,
+                               counter: PairCounter | None = None) -> Iterator[tuple[int, int, int, bool]]:
+    '''Same pairs (and order) as iter_pairs_both_pigeonhole, or one orientation of it, from k-mer codes that are already
+    encoded (e.g. straight from a packed file, see PackedSequence.kmer_codes). K-mers where valid is False are skipped'''
+    from dna_repeat.vectorized import reverse_complement_codes     # NumPy; code arrays only come from packed files
+    rc_codes = reverse_complement_codes(codes, kmer_length).tolist() if inverted else None
+    index = BlockIndex(codes.tolist(), rc_codes, kmer_length, allowed_mismatches, None if valid is None else valid.tolist())
+    yield from iter_strip_pairs(index, direct, inverted, min_distance, max_distance, jobs, counter)
@@ -0,0 +1,333 @@
+# src/dna_repeat/scan.py
+# Per-record scanning (clean, check, search) and process-pool parallel scanning across records
+
+from collections import deque
+from dataclasses import dataclass, replace
+from functools import partial
+from itertools import islice
+from pathlib import Path
+from typing import Iterable, Iterator, TYPE_CHECKING
+from dna_repeat.ambiguity import iter_segment_pairs
+from dna_repeat.cache import ResultCache, cache_key
+from dna_repeat.core import PairCounter, clean_and_check
+from dna_repeat.hits import HitTable
+from dna_repeat.stats import RecordStats, no_stage, peak_rss_mib, timed_stage
+from dna_repeat.summary import RecordSummary, count_hits, first_hit
+from dna_repeat.engines import CODE_ENGINES, COMBINED_ENGINES, ENGINES, TILED_ENGINES
+from dna_repeat.error import (
+    EmptySequenceError,
+    InvalidSequenceError,
+    InvalidKmerError,
+)
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future, ProcessPoolExecutor
+    from dna_repeat.packed import PackedSequence
+
+@dataclass(frozen=True)
+class ScanParams:
+    '''Search parameters shared by every record of a run'''
+    kmer_length: int
+    allowed_mismatches: int
+    engine: str
+    do_direct: bool = True
+    do_inverted: bool = True
+    tile_jobs: int = 1
+    '''Processes used inside one record (tiled engines only)'''
+    split_ambiguous: bool = False
+    '''Split sequences into ACGT-only segments at ambiguous bases instead of rejecting them'''
+    maximal: bool = False
+    '''Report maximal exact repeats >= kmer_length bp (suffix array) instead of k-mer pairs; engine is not used'''
+    min_distance: int = 0
+    max_distance: int | None = None
+    '''Distance band (subject start - query start, bp). Engines only compare pairs inside it'''
+
+    first_hit: bool = False
+    '''Screening: stop each record's search at its first hit and only report whether there is one'''
+    count_only: bool = False
+    '''Screening: only report each record's hit count and repeat coverage'''
+
+    cache_dir: Path | None = None
+    '''Directory of the on-disk result cache (None = no cache)'''
+
+    stats: bool = False
+    '''Collect per-record telemetry (RecordResult.stats): time per stage, candidate pairs, peak RSS'''
+
+    block_hits: int = 0
+    '''> 0: hand each record's hits out as RecordResult.blocks of at most this many rows, searched as they are consumed, so a
+    record's hits never have to fit in memory at once. Needs a consumer in the same process; ignored with cache_dir, stats and
+    maximal, which need the whole table'''
+
+    def cache_fields(self) -> tuple:
+        '''Parameters that change the hits of a record (part of its cache key). The engine isn't: all engines give the same hits'''
+        return (self.kmer_length, self.allowed_mismatches, self.do_direct, self.do_inverted, self.split_ambiguous, self.maximal,
+                self.min_distance, self.max_distance)
+
+    def in_band(self, query_pos: int, subject_pos: int) -> bool:
+        distance = subject_pos - query_pos
+        return distance >= self.min_distance and (self.max_distance is None or distance <= self.max_distance)
+
+@dataclass
+class RecordResult:
+    '''Outcome of scanning one record: its hits, or the error that stopped it'''
+    record_id: str
+    hits: HitTable | None = None
+    error: str | None = None
+    summary: RecordSummary | None = None
+    '''Set instead of hits in the screening modes (first_hit, count_only)'''
+    stats: RecordStats | None = None
+    '''Telemetry, if params.stats'''
+    blocks: Iterator[HitTable] | None = None
+    '''Set instead of hits with params.block_hits (see iter_record_blocks)'''
+
+def scan_record(rec_id: str, seq: 'str | PackedSequence', params: ScanParams) -> RecordResult:
+    '''Cleans/checks one record and runs the direct and/or inverted search on it. A PackedSequence (packed input) is
+    searched from its k-mer codes by the engines that take them (CODE_ENGINES), and decoded to a str for the others'''
+    stats = RecordStats(rec_id, length=len(seq)) if params.stats else None
+    result = _scan_record(rec_id, seq, params, stats)
+    if stats:
+        stats.record_id, stats.error = result.record_id, result.error
+        stats.hits = len(result.hits) if result.hits is not None else result.summary.hits if result.summary else None
+        if stats.peak_rss_mib is None:
+            stats.peak_rss_mib = peak_rss_mib()
+        result.stats = stats
+    return result
+
+def _scan_record(rec_id: str, seq: 'str | PackedSequence', params: ScanParams, stats: RecordStats | None) -> RecordResult:
+    stage = stats.stage if stats else no_stage
+    try:
+        with stage('clean'):
+            if isinstance(seq, str):
+                rec_id, seq = clean_and_check(rec_id, seq, params.kmer_length, allow_ambiguous=params.split_ambiguous)
+            else:                                   # packed: already clean, only checked
+                rec_id = seq.check(rec_id, params.kmer_length, allow_ambiguous=params.split_ambiguous)
+                if params.maximal or params.engine not in CODE_ENGINES:
+                    seq = str(seq)
+    except (EmptySequenceError, InvalidSequenceError, InvalidKmerError) as e:
+        return RecordResult(record_id=rec_id, error=f"{e}")
+    if stats:
+        stats.length = len(seq)
+    with stage('cache'):
+        cache = ResultCache(params.cache_dir) if params.cache_dir else None
+        key = cache_key(seq, params.cache_fields()) if cache else ''
+        cached = cache.get(key, rec_id, seq) if cache else None
+    if stats:
+        stats.cached = cached is not None
+    if params.first_hit or params.count_only:
+        summarize = first_hit if params.first_hit else count_hits
+        spans = cached.spans() if cached is not None else iter_record_spans(seq, params)
+        with stage('search'):
+            summary = summarize(rec_id, len(seq), spans)
+        return RecordResult(record_id=rec_id, summary=summary)
+    if cached is not None:
+        return RecordResult(record_id=rec_id, hits=cached)
+    if params.block_hits and not (cache or stats or params.maximal):
+        return RecordResult(record_id=rec_id, blocks=iter_record_blocks(rec_id, seq, params))
+    if params.maximal:
+        with stage('search'):
+            hits = scan_maximal(rec_id, seq, params)
+    else:
+        hits = HitTable(rec_id, seq, params.kmer_length)
+        counter = PairCounter() if stats else None
+        pairs = iter_record_pairs(seq, params, counter)
+        with stage('hits'):
+            hits.extend_both(timed_stage(pairs, stats, 'search') if stats else pairs)
+        if stats:
+            stats.stages['hits'] -= stats.stages.get('search', 0.0)    # pairs are streamed: hits = the rest of the loop
+            stats.candidate_pairs = counter.pairs
+    if cache:
+        with stage('cache'):
+            cache.put(key, hits)
+    return RecordResult(record_id=rec_id, hits=hits)
+
+def iter_record_pairs(seq: 'str | PackedSequence', params: ScanParams,
+                      counter: PairCounter | None = None) -> Iterator[tuple[int, int, int, bool]]:
+    '''Yields (query pos, subject pos, mismatches, inverted) of a clean record, from the engine chosen in params. Lazy: the
+    inverted search only starts once the direct hits have been consumed. counter gets the k-mer pairs the engine compared.
+    A PackedSequence goes to the engine as k-mer codes; k-mers overlapping its ambiguous runs are masked out, which gives
+    the same hits as splitting a str at them (split_ambiguous)'''
+    extra = {'jobs': params.tile_jobs} if params.tile_jobs > 1 and params.engine in TILED_ENGINES else {}
+    extra.update(min_distance=params.min_distance, max_distance=params.max_distance)
+    if counter:
+        extra['counter'] = counter
+    if not isinstance(seq, str):
+        codes, valid = seq.kmer_codes(params.kmer_length)
+        yield from CODE_ENGINES[params.engine](codes, valid if seq.runs else None, params.kmer_length,
+                                               params.allowed_mismatches, params.do_direct, params.do_inverted, **extra)
+        return
+    if params.do_direct and params.do_inverted and params.engine in COMBINED_ENGINES:
+        find_both = COMBINED_ENGINES[params.engine]
+        if params.split_ambiguous:
+            find_both = partial(iter_segment_pairs, find_both)
+        yield from find_both(seq, params.kmer_length, params.allowed_mismatches, **extra)
+        return
+    find_direct, find_inverted = ENGINES[params.engine]
+    if params.split_ambiguous:
+        find_direct = partial(iter_segment_pairs, find_direct)
+        find_inverted = partial(iter_segment_pairs, find_inverted)
+    if params.do_direct:
+        for query_pos, subject_pos, mismatches in find_direct(seq, params.kmer_length, params.allowed_mismatches, **extra):
+            yield query_pos, subject_pos, mismatches, False
+    if params.do_inverted:
+        for query_pos, subject_pos, mismatches in find_inverted(seq, params.kmer_length, params.allowed_mismatches, **extra):
+            yield query_pos, subject_pos, mismatches, True
+
+def iter_record_blocks(rec_id: str, seq: 'str | PackedSequence', params: ScanParams) -> Iterator[HitTable]:
+    '''Hits of a clean record as HitTables of at most params.block_hits rows, in the usual row order (direct hits, then
+    inverted). The two orientations are searched one after the other, not by a combined engine, so the direct hits can be
+    written before the inverted search starts and no block is held back'''
+    for do_direct, do_inverted in ((True, False), (False, True)):
+        if not (params.do_direct and do_direct or params.do_inverted and do_inverted):
+            continue
+        pairs = iter_record_pairs(seq, replace(params, do_direct=do_direct, do_inverted=do_inverted))
+        while True:
+            block = HitTable(rec_id, seq, params.kmer_length)
+            if not block.extend_both(islice(pairs, params.block_hits)):
+                break
+            yield block
+
+def iter_record_spans(seq: 'str | PackedSequence', params: ScanParams) -> Iterator[tuple[int, int, int]]:
+    '''Yields (query pos, subject pos, length) of every hit of a clean record, for the screening modes'''
+    if params.maximal:
+        for repeats in _maximal_in_band(seq, params):
+            yield from repeats
+        return
+    k = params.kmer_length
+    for query_pos, subject_pos, _, _ in iter_record_pairs(seq, params):
+        yield query_pos, subject_pos, k
+
+def scan_maximal(rec_id: str, seq: str, params: ScanParams) -> HitTable:
+    '''Maximal exact repeats of one (clean) record, as a HitTable with per-hit lengths'''
+    hits = HitTable(rec_id, seq, params.kmer_length)
+    direct_repeats, inverted_repeats = _maximal_in_band(seq, params)
+    hits.extend_maximal(direct_repeats, inverted=False)
+    hits.extend_maximal(inverted_repeats, inverted=True)
+    return hits
+
+def _maximal_in_band(seq: str, params: ScanParams) -> tuple[list[tuple[int, int, int]], list[tuple[int, int, int]]]:
+    '''(direct, inverted) maximal repeats as (query pos, subject pos, length), limited to the distance band'''
+    from dna_repeat.suffix import maximal_repeats   # NumPy; only needed for --maximal
+    direct_repeats, inverted_repeats = maximal_repeats(seq, params.kmer_length, params.do_direct, params.do_inverted)
+    return ([repeat for repeat in direct_repeats if params.in_band(repeat[0], repeat[1])],
+            [repeat for repeat in inverted_repeats if params.in_band(repeat[0], repeat[1])])
+
+def scan_chunk(chunk: tuple[tuple[str, str], ...], params: ScanParams) -> list[RecordResult]:
+    '''Scans a chunk of records (in a worker process). An unexpected exception only fails its own record'''
+    results: list[RecordResult] = []
+    for rec_id, seq in chunk:
+        try:
+            results.append(scan_record(rec_id, seq, params))
+        except Exception as e:
+            results.append(RecordResult(record_id=rec_id, error=f"{rec_id} : {type(e).__name__}: {e}"))
+    return results
+
+def default_chunk_bp(total_bp: int, jobs: int) -> int:
+    '''Bases per task: ~8 tasks per worker so small records are cheap to dispatch but work still balances'''
+    return max(1, total_bp // (jobs * 8))
+
+def iter_chunks(records: Iterable[tuple[str, str]], chunk_bp: int) -> Iterator[tuple[tuple[str, str], ...]]:
+    '''Groups records into chunks of about chunk_bp bases (a record is never split; a big one gets its own chunk)'''
+    chunk: list[tuple[str, str]] = []
+    chunk_length = 0
+    for rec_id, seq in records:
+        chunk.append((rec_id, seq))
+        chunk_length += len(seq)
+        if chunk_length >= chunk_bp:
+            yield tuple(chunk)
+            chunk, chunk_length = [], 0
+    if chunk:
+        yield tuple(chunk)
+
+def iter_scan(records: Iterable[tuple[str, str]], params: ScanParams, jobs: int = 1, chunk_bp: int = 1) -> Iterator[RecordResult]:
+    '''Generator that scans (record ID, sequence) tuples and yields a RecordResult per record, in input order'''
+    if jobs <= 1:
+        for rec_id, seq in records:
+            yield scan_record(rec_id, seq, params)
+        return
+    yield from _iter_scan_parallel(records, params, jobs, chunk_bp)
+
+def _iter_scan_parallel(records: Iterable[tuple[str, str]], params: ScanParams, jobs: int, chunk_bp: int) -> Iterator[RecordResult]:
+    '''Sends chunks of records to a process pool. Only ~2 chunks per worker are in flight, so memory stays bounded'''
+    pool = _ChunkPool(params, jobs)
+    try:
+        for chunk in iter_chunks(records, chunk_bp):
+            pool.submit(chunk)
+            if len(pool.pending) >= 2 * jobs:
+                yield from pool.collect()
+        while pool.pending:
+            yield from pool.collect()
+    finally:
+        pool.shutdown()
+
+class _ChunkPool:
+    '''Process pool of in-flight chunks (oldest first) that survives worker crashes (e.g. segfault/OOM). A broken pool is
+    replaced once and its unfinished chunks are resubmitted to the new one; the chunk that was being waited for is retried
+    record by record in a one-worker pool, so only the record that crashes its worker is reported as an error'''
+
+    def __init__(self, params: ScanParams, jobs: int) -> None:
+        from concurrent.futures import ProcessPoolExecutor
+        self.params = params
+        self.jobs = jobs
+        self.pool = ProcessPoolExecutor(max_workers=jobs)
+        self.pending: deque[list] = deque()     # [chunk, future, pool the future belongs to]
+
+    def submit(self, chunk: tuple[tuple[str, str], ...]) -> None:
+        self.pending.append([chunk, *self._submit(chunk)])
+
+    def _submit(self, chunk: tuple[tuple[str, str], ...]) -> tuple['Future', 'ProcessPoolExecutor']:
+        from concurrent.futures.process import BrokenProcessPool
+        while True:
+            pool = self.pool
+            try:
+                return pool.submit(scan_chunk, chunk, self.params), pool
+            except BrokenProcessPool:
+                self._replace(pool)
+
+    def _replace(self, broken: 'ProcessPoolExecutor') -> None:
+        '''Replaces the pool if broken is still the current one (a breakage is seen once per pending future), then
+        resubmits every pending chunk that hasn't finished in a pool that is no longer current'''
+        from concurrent.futures import ProcessPoolExecutor
+        if broken is not self.pool:
+            return
+        broken.shutdown(wait=False, cancel_futures=True)
+        self.pool = ProcessPoolExecutor(max_workers=self.jobs)
+        for entry in list(self.pending):
+            chunk, future, pool = entry
+            if pool is not self.pool and not _succeeded(future):
+                entry[1:] = self._submit(chunk)
+
+    def collect(self) -> list[RecordResult]:
+        '''Waits for the oldest chunk and returns its results'''
+        from concurrent.futures import CancelledError
+        from concurrent.futures.process import BrokenProcessPool
+        chunk, future, pool = self.pending.popleft()
+        try:
+            return future.result()
+        except (BrokenProcessPool, CancelledError):
+            self._replace(pool)
+        return _scan_isolated(chunk, self.params)
+
+    def shutdown(self) -> None:
+        self.pool.shutdown(cancel_futures=True)
+
+def _succeeded(future: 'Future') -> bool:
+    return future.done() and not future.cancelled() and future.exception() is None
+
+def _scan_isolated(chunk: tuple[tuple[str, str], ...], params: ScanParams) -> list[RecordResult]:
+    '''Scans the records of a chunk one by one in a one-worker pool of their own (replaced after a crash), so a crash is
+    pinned on the record that caused it'''
+    from concurrent.futures import ProcessPoolExecutor
+    from concurrent.futures.process import BrokenProcessPool
+    pool = ProcessPoolExecutor(max_workers=1)
+    results: list[RecordResult] = []
+    try:
+        for rec_id, seq in chunk:
+            try:
+                results.extend(pool.submit(scan_chunk, ((rec_id, seq),), params).result())
+            except BrokenProcessPool:
+                results.append(RecordResult(record_id=rec_id, error=f"{rec_id} : worker process crashed"))
+                pool.shutdown(wait=False)
+                pool = ProcessPoolExecutor(max_workers=1)
+    finally:
+        pool.shutdown()
+    return results
@@ -0,0 +1,228 @@
+# src/dna_repeat/serve.py
+# Local scanning service ("dna-repeat serve"). A long-running process pays the import and warm-up cost once; clients send
+# batches of sequences over a Unix socket or a localhost TCP port and get the hits back. asyncio handles the connections, the
+# scans run in a thread (or, with jobs > 1, in a process pool that is started and warmed up once).
+#
+# Protocol: newline-delimited JSON, one response line per request line, in order.
+#   request   {"id": any, "records": [[record_id, sequence], ...], "params": {"kmer_length": 20, "allowed_mismatches": 0, ...}}
+#   response  {"id": ..., "columns": [...], "results": [{"record_id": ..., "rows": [[...], ...], "error": null}, ...]}
+#             {"id": ..., "error": "..."} if the request itself is invalid
+# params are ScanParams fields (see REQUEST_PARAMS for the defaults); rows are the CLI's output rows
+
+import asyncio
+import json
+import os
+import signal
+import socket
+from concurrent.futures import Executor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Any
+from dna_repeat.cache import ResultCache, entry_bytes
+from dna_repeat.engines import DEFAULT_ENGINE, ENGINES, EXACT_ONLY_ENGINES, select_engine
+from dna_repeat.output import COLUMNS
+from dna_repeat.scan import RecordResult, ScanParams, default_chunk_bp, iter_chunks, scan_chunk
+from dna_repeat.summary import COUNT_COLUMNS, FIRST_HIT_COLUMNS
+
+REQUEST_PARAMS: dict[str, Any] = {
+    'kmer_length': 20,
+    'allowed_mismatches': 0,
+    'engine': DEFAULT_ENGINE,
+    'do_direct': True,
+    'do_inverted': True,
+    'split_ambiguous': False,
+    'maximal': False,
+    'min_distance': 0,
+    'max_distance': None,
+    'first_hit': False,
+    'count_only': False,
+}
+'''ScanParams fields a request may set, with their defaults'''
+
+EVICT_FRACTION = 8
+'''Evict once the batches since the last eviction have stored 1/EVICT_FRACTION of the cache limit, so the cache stays within
+about 1 + 1/EVICT_FRACTION times its limit without a directory walk per batch'''
+
+LINE_LIMIT = 2**30
+'''Longest request line (bytes); a batch is one line'''
+
+WARM_UP_SEQ = 'TGAAAGCCAGGCAAGTTTTCTGCTTCTTTTGCTTCTTAGTCAGGAGATAGATAGATTACGTTTTTAGAGTGCCAGGCAAGTCTTCTGCTT'
+
+def warm_up() -> None:
+    '''Runs every engine once on a short sequence, so lazy imports (NumPy) and first-call costs are paid before the first
+    request. Also the initializer of the pool workers'''
+    for engine in ENGINES:
+        scan_chunk((('warm-up', WARM_UP_SEQ),), ScanParams(kmer_length=12, allowed_mismatches=0, engine=engine))
+
+def request_params(request_fields: dict[str, Any], cache_dir: Path | None = None) -> ScanParams:
+    '''ScanParams from a request's "params". Raises ValueError with the same rules as the CLI'''
+    unknown = set(request_fields) - set(REQUEST_PARAMS)
+    if unknown:
+        raise ValueError(f"unknown params: {', '.join(sorted(unknown))}")
+    values = {**REQUEST_PARAMS, **request_fields}
+    for name, value in values.items():
+        default = REQUEST_PARAMS[name]
+        if isinstance(default, bool):
+            valid = isinstance(value, bool)
+        else:                                   # int, str, or None (= optional int)
+            valid = (default is None and value is None) or (isinstance(value, type(default) if default is not None else int)
+                                                             and not isinstance(value, bool))
+        if not valid:
+            raise ValueError(f'param {name} has the wrong type ({value!r})')
+    kmer_length, allowed_mismatches = values['kmer_length'], values['allowed_mismatches']
+    if values['engine'] != DEFAULT_ENGINE and values['engine'] not in ENGINES:
+        raise ValueError(f"engine must be one of: {', '.join([DEFAULT_ENGINE, *ENGINES])}")
+    values['engine'] = select_engine(values['engine'], kmer_length, allowed_mismatches)
+    if values['maximal']:
+        if kmer_length < 4 or allowed_mismatches != 0:
+            raise ValueError('maximal needs kmer_length >= 4 and allowed_mismatches 0')
+    elif not 4 <= kmer_length <= 30:
+        raise ValueError('kmer_length must be in the range 4-30')
+    if not 0 <= allowed_mismatches <= kmer_length / 2:
+        raise ValueError('allowed_mismatches must be in the range 0 to kmer_length / 2')
+    if values['engine'] in EXACT_ONLY_ENGINES and allowed_mismatches != 0:
+        raise ValueError(f"engine '{values['engine']}' only finds exact repeats (allowed_mismatches 0)")
+    if values['min_distance'] < 0 or (values['max_distance'] is not None and values['max_distance'] < values['min_distance']):
+        raise ValueError('distance band must satisfy 0 <= min_distance <= max_distance')
+    if values['first_hit'] and values['count_only']:
+        raise ValueError("first_hit and count_only can't be combined")
+    return ScanParams(**values, cache_dir=cache_dir)
+
+def result_columns(params: ScanParams) -> list[str]:
+    if params.first_hit:
+        return FIRST_HIT_COLUMNS
+    return COUNT_COLUMNS if params.count_only else COLUMNS
+
+def result_json(result: RecordResult, columns: list[str]) -> dict[str, Any]:
+    if result.summary:
+        rows = [result.summary.row(columns)]
+    else:
+        rows = list(result.hits.rows()) if result.hits is not None else []
+    return {'record_id': result.record_id, 'rows': rows, 'error': result.error}
+
+class ScanServer:
+    '''Answers scan requests. With jobs > 1 a batch is split into chunks of about equal bp that run in a process pool.
+    With a cache, its least recently used entries are evicted (in a thread) as batches fill it up'''
+
+    def __init__(self, jobs: int = 1, cache: ResultCache | None = None) -> None:
+        self.jobs = jobs
+        self.cache = cache
+        self.stored_bytes = 0
+        '''Bytes of hit tables returned since the last eviction (cached ones too: an upper bound of what was written)'''
+        self._eviction: asyncio.Future | None = None
+        self.pool: ProcessPoolExecutor | None = None
+        if jobs > 1:
+            self.pool = ProcessPoolExecutor(max_workers=jobs, initializer=warm_up)
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        '''One connection: answers request lines until the client closes it'''
+        try:
+            while line := await reader.readline():
+                if line.strip():
+                    writer.write(json.dumps(await self.respond(line)).encode() + b'\n')
+                    await writer.drain()
+        except (ConnectionError, asyncio.LimitOverrunError, ValueError):   # client gone, or line over LINE_LIMIT
+            pass
+        finally:
+            writer.close()
+
+    async def respond(self, line: bytes) -> dict[str, Any]:
+        request_id = None
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError('request must be a JSON object')
+            request_id = request.get('id')
+            params = request_params(request.get('params', {}), self.cache.directory if self.cache else None)
+            records = [(str(rec_id), str(seq)) for rec_id, seq in request.get('records', [])]
+        except (ValueError, TypeError, AttributeError) as e:
+            return {'id': request_id, 'error': f'invalid request: {e}'}
+        try:
+            results = await self.scan(records, params)
+        except BrokenProcessPool:
+            self.pool = ProcessPoolExecutor(max_workers=self.jobs, initializer=warm_up)
+            return {'id': request_id, 'error': 'worker process crashed'}
+        if self.cache:
+            self.stored_bytes += sum(entry_bytes(result.hits) for result in results if result.hits is not None)
+            self.maybe_evict()
+        columns = result_columns(params)
+        return {'id': request_id, 'columns': columns, 'results': [result_json(result, columns) for result in results]}
+
+    async def scan(self, records: list[tuple[str, str]], params: ScanParams) -> list[RecordResult]:
+        '''Scans records off the event loop (thread, or chunks in the process pool); results in input order'''
+        loop = asyncio.get_running_loop()
+        executor: Executor | None = self.pool
+        if executor is None or len(records) <= 1:
+            return await loop.run_in_executor(executor, scan_chunk, tuple(records), params)
+        chunk_bp = default_chunk_bp(sum(len(seq) for _, seq in records), self.jobs)
+        chunks = await asyncio.gather(*(loop.run_in_executor(executor, scan_chunk, chunk, params)
+                                        for chunk in iter_chunks(records, chunk_bp)))
+        return [result for chunk in chunks for result in chunk]
+
+    def maybe_evict(self) -> None:
+        '''Starts an eviction in a thread once the stored bytes pass the threshold (one eviction at a time)'''
+        if self.stored_bytes <= self.cache.max_bytes // EVICT_FRACTION or (self._eviction and not self._eviction.done()):
+            return
+        self.stored_bytes = 0
+        self._eviction = asyncio.get_running_loop().run_in_executor(None, self.cache.evict)
+
+    def close(self) -> None:
+        if self.pool:
+            self.pool.shutdown(cancel_futures=True)
+
+async def serve(server: ScanServer, socket_path: Path | None = None, port: int | None = None) -> None:
+    '''Serves on a Unix socket (socket_path) or on 127.0.0.1:port until cancelled or SIGINT/SIGTERM'''
+    if socket_path is not None:
+        listener = await asyncio.start_unix_server(server.handle, path=socket_path, limit=LINE_LIMIT)
+    else:
+        listener = await asyncio.start_server(server.handle, host='127.0.0.1', port=port, limit=LINE_LIMIT)
+    loop = asyncio.get_running_loop()
+    stop = asyncio.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(signum, stop.set)
+        except (ValueError, RuntimeError):      # not the main thread (e.g. tests)
+            pass
+    try:
+        async with listener:
+            await stop.wait()
+    finally:
+        if socket_path is not None and os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+class ScanClient:
+    '''Blocking client for a running "dna-repeat serve" (standard library only). address = Unix socket path or TCP port'''
+
+    def __init__(self, address: str | Path | int, timeout: float | None = None) -> None:
+        if isinstance(address, int):
+            self._socket = socket.create_connection(('127.0.0.1', address), timeout=timeout)
+        else:
+            self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._socket.settimeout(timeout)
+            self._socket.connect(str(address))
+        self._file = self._socket.makefile('rwb')
+        self._next_id = 0
+
+    def scan(self, records: list[tuple[str, str]], **params: Any) -> dict[str, Any]:
+        '''Sends one batch (params: see REQUEST_PARAMS) and returns the response; raises ValueError if it was rejected'''
+        self._next_id += 1
+        request = {'id': self._next_id, 'records': [list(record) for record in records], 'params': params}
+        self._file.write(json.dumps(request).encode() + b'\n')
+        self._file.flush()
+        line = self._file.readline()
+        if not line:
+            raise ConnectionError('server closed the connection')
+        response = json.loads(line)
+        if 'error' in response:
+            raise ValueError(response['error'])
+        return response
+
+    def close(self) -> None:
+        self._file.close()
+        self._socket.close()
+
+    def __enter__(self) -> 'ScanClient':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
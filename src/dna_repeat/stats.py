@@ -0,0 +1,129 @@
+# src/dna_repeat/stats.py
+# Per-record performance telemetry (--stats FILE). With stats on, every record gets a RecordStats: wall time per stage, candidate
+# k-mer pairs compared, hits, sequence length and peak RSS, written as one JSON line per record plus a summary line at the end.
+# With stats off nothing here runs; the scan only checks one flag per record
+
+import json
+import resource
+import sys
+import time
+from contextlib import contextmanager, nullcontext
+from dataclasses import asdict, dataclass, field
+from typing import ContextManager, Iterable, Iterator, TextIO, TypeVar
+
+T = TypeVar('T')
+
+STAGES: list[str] = ['parse', 'clean', 'cache', 'search', 'hits', 'output']
+'''Stages in order. search = k-mer encoding + pair comparison (engines encode inside their generators, and count the pairs
+they compare as they go); hits = building the hit table'''
+
+def peak_rss_mib() -> float:
+    '''Peak resident set size of this process so far (MiB)'''
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (2**20 if sys.platform == 'darwin' else 2**10), 1)     # bytes on macOS, KiB on Linux
+
+@dataclass
+class RecordStats:
+    '''Telemetry of one record'''
+    record_id: str
+    length: int = 0                 # bp (after cleaning, if the record got that far)
+    stages: dict[str, float] = field(default_factory=dict)     # stage -> wall time (s)
+    candidate_pairs: int | None = None  # k-mer pairs compared by the engine; None if not a pair search (--maximal, cached)
+    hits: int | None = None
+    cached: bool = False
+    error: str | None = None
+    peak_rss_mib: float | None = None   # of the process that scanned the record
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        '''Adds the wall time of the with-block to stage name'''
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - start
+
+    def to_json(self) -> str:
+        record = asdict(self)
+        record['stages'] = {name: round(self.stages[name], 6) for name in STAGES if name in self.stages}
+        return json.dumps(record)
+
+_NO_STAGE = nullcontext()
+
+def no_stage(name: str) -> ContextManager:
+    '''Stand-in for RecordStats.stage when stats are off'''
+    return _NO_STAGE
+
+class StatsWriter:
+    '''Writes RecordStats as JSON lines and keeps the totals for the summary line'''
+
+    def __init__(self, handle: TextIO) -> None:
+        self.handle = handle
+        self.started = time.perf_counter()
+        self.records = self.errors = self.cached = self.length = self.hits = self.candidate_pairs = 0
+        self.stages: dict[str, float] = {}
+        self.peak_rss_mib = 0.0
+
+    def write(self, stats: RecordStats) -> None:
+        self.handle.write(stats.to_json() + '\n')
+        self.records += 1
+        self.errors += stats.error is not None
+        self.cached += stats.cached
+        self.length += stats.length
+        self.hits += stats.hits or 0
+        self.candidate_pairs += stats.candidate_pairs or 0
+        for name, seconds in stats.stages.items():
+            self.stages[name] = self.stages.get(name, 0.0) + seconds
+        self.peak_rss_mib = max(self.peak_rss_mib, stats.peak_rss_mib or 0.0)
+
+    def summary(self) -> dict:
+        '''Run totals: records, bp, hits, candidate pairs, time per stage (summed over records) and wall time'''
+        return {
+            'summary': True,
+            'records': self.records,
+            'errors': self.errors,
+            'cached': self.cached,
+            'length': self.length,
+            'hits': self.hits,
+            'candidate_pairs': self.candidate_pairs,
+            'stages': {name: round(self.stages[name], 6) for name in STAGES if name in self.stages},
+            'wall_seconds': round(time.perf_counter() - self.started, 6),
+            'peak_rss_mib': max(self.peak_rss_mib, peak_rss_mib()),
+        }
+
+    def close(self) -> dict:
+        '''Writes the summary line and returns it'''
+        summary = self.summary()
+        self.handle.write(json.dumps(summary) + '\n')
+        self.handle.flush()
+        return summary
+
+def timed(records: Iterable[tuple[str, str]], seconds: list[float]) -> Iterator[tuple[str, str]]:
+    '''Passes records through, appending the time taken to read each one to seconds'''
+    iterator = iter(records)
+    while True:
+        start = time.perf_counter()
+        try:
+            record = next(iterator)
+        except StopIteration:
+            return
+        seconds.append(time.perf_counter() - start)
+        yield record
+
+def timed_stage(items: Iterable[T], stats: RecordStats, name: str) -> Iterator[T]:
+    '''Passes items through, adding the time taken to produce them to stage name (e.g. the engine's share of a streamed
+    search, without collecting its pairs)'''
+    iterator = iter(items)
+    seconds = 0.0
+    try:
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                seconds += time.perf_counter() - start
+            yield item
+    finally:
+        stats.stages[name] = stats.stages.get(name, 0.0) + seconds
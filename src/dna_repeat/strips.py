@@ -0,0 +1,63 @@
+# src/dna_repeat/strips.py
+# Query strips: one sequence's search split into strips of query k-mers that run in a process pool (-j on a single sequence).
+# The engine's index is built once in the parent and handed to the workers when they start (inherited, not pickled, where
+# processes are forked); each task then searches one strip. Strips come back in serial order and only ~2 per worker are in
+# flight, so memory stays bounded by a few strips' hits
+
+from collections import deque
+from typing import Any, Callable, Iterable, Iterator, TYPE_CHECKING
+from dna_repeat.core import PairCounter
+
+if TYPE_CHECKING:
+    from concurrent.futures import Executor, Future
+    from dna_repeat.exact import CodeIndex
+    from dna_repeat.pigeonhole import BlockIndex
+
+STRIPS_PER_JOB = 8
+'''Strips per worker: enough to even out strips that take longer (e.g. repeat-dense regions)'''
+
+MIN_STRIP_KMERS = 1024
+'''Smallest strip (query k-mers); shorter sequences are searched serially'''
+
+_worker_index: 'BlockIndex | CodeIndex | None' = None
+
+def _set_worker_index(index: 'BlockIndex | CodeIndex') -> None:
+    global _worker_index
+    _worker_index = index
+
+def _strip_pairs(direct: bool, inverted: bool, band: tuple[int, int | None],
+                 rows: tuple[int, int]) -> tuple[list[tuple[int, int, int, bool]], int]:
+    '''Worker: (pairs, number of pairs compared) of one strip of query k-mers'''
+    counter = PairCounter()
+    return list(_worker_index.pairs(direct, inverted, *band, rows=rows, counter=counter)), counter.pairs
+
+def iter_in_order(pool: 'Executor', fn: Callable[..., Any], tasks: Iterable[tuple], window: int) -> Iterator[Any]:
+    '''Yields fn(*task) for every task, in order. Tasks are submitted as the consumer catches up, at most window ahead'''
+    pending: deque[Future] = deque()
+    for task in tasks:
+        pending.append(pool.submit(fn, *task))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+def iter_strip_pairs(index: 'BlockIndex | CodeIndex', direct: bool = True, inverted: bool = True, min_distance: int = 0,
+                     max_distance: int | None = None, jobs: int = 1,
+                     counter: PairCounter | None = None) -> Iterator[tuple[int, int, int, bool]]:
+    '''Yields index.pairs(...) over every query k-mer, in serial order. With jobs > 1 strips of query k-mers run in a process
+    pool; each worker gets its own copy of the index. counter gets the pairs compared, as in index.pairs'''
+    n = index.n_kmers
+    strip = max(MIN_STRIP_KMERS, -(-n // (jobs * STRIPS_PER_JOB)))
+    if jobs <= 1 or n <= strip:
+        yield from index.pairs(direct, inverted, min_distance, max_distance, counter=counter)
+        return
+    from concurrent.futures import ProcessPoolExecutor
+    pool = ProcessPoolExecutor(max_workers=jobs, initializer=_set_worker_index, initargs=(index,))
+    tasks = ((direct, inverted, (min_distance, max_distance), (start, min(start + strip, n))) for start in range(0, n, strip))
+    try:
+        for pairs, compared in iter_in_order(pool, _strip_pairs, tasks, 2 * jobs):
+            if counter:
+                counter.pairs += compared
+            yield from pairs
+    finally:
+        pool.shutdown(cancel_futures=True)          # generator closed early (e.g. --first-hit): drop the strips not started yet
@@ -0,0 +1,134 @@
+# src/dna_repeat/suffix.py
+    ## Maximal exact repeats of any length (>= a minimum) with a suffix array + LCP array. The sequence is joined with its reverse
+    ## complement (seq # rc $), so one pass finds direct and inverted repeats. A repeat is maximal when it can't be extended to the
+    ## left or right; a 200 bp repeat is then reported as one row instead of ~180 overlapping k-mer hits.
+    ## Suffix array: prefix doubling with NumPy sorts (O(n log n) rounds of sorting). LCP: Kasai. Pairs: bottom-up walk over the
+    ## LCP intervals, only pairing suffixes with different left characters (Gusfield), so the work is O(n + number of repeats).
+
+from itertools import count
+from typing import Iterator
+import numpy as np
+from dna_repeat.constants import BASE_TO_INT
+from dna_repeat.core import RepeatHit, reverse_complement
+
+def suffix_array(text: np.ndarray) -> np.ndarray:
+    '''Suffix array of an integer array (the last value must be a unique, smallest sentinel)'''
+    n = len(text)
+    rank = text.astype(np.int64)
+    step = 1
+    while True:
+        second = np.full(n, -1, dtype=np.int64)
+        second[:n - step] = rank[step:]
+        sa = np.lexsort((second, rank))
+        first_sorted, second_sorted = rank[sa], second[sa]
+        new_group = np.empty(n, dtype=bool)
+        new_group[0] = True
+        new_group[1:] = (first_sorted[1:] != first_sorted[:-1]) | (second_sorted[1:] != second_sorted[:-1])
+        rank = np.empty(n, dtype=np.int64)
+        rank[sa] = np.cumsum(new_group) - 1
+        if rank[sa[-1]] == n - 1:                           # all ranks unique -> sorted
+            return sa
+        step *= 2
+
+def lcp_array(text: list[int], sa: list[int]) -> list[int]:
+    '''lcp[r] = longest common prefix of suffixes sa[r - 1] and sa[r] (lcp[0] = 0). Kasai's algorithm'''
+    n = len(sa)
+    rank = [0] * n
+    for r, pos in enumerate(sa):
+        rank[pos] = r
+    lcp = [0] * n
+    h = 0
+    for pos in range(n):
+        r = rank[pos]
+        if r == 0:
+            h = 0
+            continue
+        prev = sa[r - 1]
+        while pos + h < n and prev + h < n and text[pos + h] == text[prev + h]:
+            h += 1
+        lcp[r] = h
+        if h:
+            h -= 1
+    return lcp
+
+def _maximal_pairs(text: list[int], sa: list[int], lcp: list[int], min_length: int) -> Iterator[tuple[int, int, int]]:
+    '''Yields (pos_a, pos_b, length) for every maximal exact repeat pair in text with length >= min_length'''
+    def merge(node: list, child: dict[int, list[int]]) -> None:
+        '''Merges a child's positions (grouped by left character) into a node; pairs across them repeat for node[0] bases'''
+        length, groups = node
+        if length >= min_length:
+            for left_char, positions in child.items():
+                for other_char, others in groups.items():
+                    if other_char != left_char:             # different left characters -> can't extend left -> maximal
+                        for a in positions:
+                            for b in others:
+                                yield_buffer.append((a, b, length))
+        for left_char, positions in child.items():
+            if left_char in groups:
+                group = groups[left_char]
+                if len(group) < len(positions):
+                    group, positions = positions, group
+                    groups[left_char] = group
+                group.extend(positions)
+            else:
+                groups[left_char] = positions
+
+    yield_buffer: list[tuple[int, int, int]] = []
+    stack: list[list] = [[0, {}]]                           # [lcp, {left char: positions}] per open LCP interval
+    n = len(sa)
+    for r in range(n):
+        pos = sa[r]
+        child = {text[pos - 1] if pos > 0 else -1: [pos]}
+        h = lcp[r + 1] if r + 1 < n else 0                  # lcp with the next suffix
+        while stack[-1][0] > h:
+            node = stack.pop()
+            merge(node, child)
+            child = node[1]
+        if stack[-1][0] == h:
+            merge(stack[-1], child)
+        else:
+            node = [h, {}]
+            merge(node, child)
+            stack.append(node)
+        yield from yield_buffer
+        yield_buffer.clear()
+
+def maximal_repeats(seq: str, min_length: int, direct: bool = True, inverted: bool = True) -> tuple[list[tuple[int, int, int]], list[tuple[int, int, int]]]:
+    '''Returns (direct, inverted) lists of maximal exact repeats as (query pos, subject pos, length), 0-based, sorted.
+    Subject positions are on the forward strand, also for inverted repeats. Repeats never span an ambiguous base'''
+    n = len(seq)
+    unique_codes = count(len(BASE_TO_INT) + 2)              # ambiguous bases (N etc.) get a code of their own -> never match
+    codes = [BASE_TO_INT[base] + 2 if base in BASE_TO_INT else next(unique_codes) for base in seq]   # 0 and 1 = sentinels
+    if inverted:
+        codes += [1] + [BASE_TO_INT[base] + 2 if base in BASE_TO_INT else next(unique_codes) for base in reverse_complement(seq)]
+    codes.append(0)
+    sa = suffix_array(np.array(codes, dtype=np.int64)).tolist()
+    lcp = lcp_array(codes, sa)
+    direct_repeats: set[tuple[int, int, int]] = set()
+    inverted_repeats: set[tuple[int, int, int]] = set()
+    for a, b, length in _maximal_pairs(codes, sa, lcp, min_length):
+        a, b = min(a, b), max(a, b)
+        if b < n:                                           # both on the forward strand
+            if direct:
+                direct_repeats.add((a, b, length))
+        elif a < n and inverted:                            # forward vs. reverse complement
+            subject = n - (b - n - 1) - length              # rc position -> forward start of the same bases
+            inverted_repeats.add((min(a, subject), max(a, subject), length))    # each one is found from both ends
+    return sorted(direct_repeats), sorted(inverted_repeats)
+
+def find_maximal_repeats(rec_id: str, seq: str, min_length: int, direct: bool = True, inverted: bool = True) -> list[RepeatHit]:
+    '''Find maximal exact direct and/or inverted repeats of at least min_length bp (no upper limit)'''
+    direct_repeats, inverted_repeats = maximal_repeats(seq, min_length, direct, inverted)
+    return [RepeatHit(
+                record_id = rec_id,
+                query_start = i + 1,
+                query_end = i + length,
+                subject_start = p + 1,
+                subject_end = p + length,
+                query_seq = seq[i:i + length],
+                subject_seq = seq[p:p + length],
+                mismatches = 0,
+                kmer_length = length,
+                orientation = orientation
+                ) for repeats, orientation in ((direct_repeats, 'direct'), (inverted_repeats, 'inverted'))
+                  for i, p, length in repeats]
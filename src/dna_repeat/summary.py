@@ -0,0 +1,48 @@
+# src/dna_repeat/summary.py
+# Screening modes: one summary row per record instead of one row per hit. --first-hit stops a record's search at the first
+# qualifying pair (engines are generators, so nothing after it is computed); --count-only counts hits and repeat coverage
+# straight from the engine's position tuples, without building RepeatHit objects or a hit table
+
+from array import array
+from dataclasses import dataclass
+from typing import Iterable
+
+FIRST_HIT_COLUMNS: list[str] = ['record_id', 'length', 'has_repeat']
+COUNT_COLUMNS: list[str] = ['record_id', 'length', 'hits', 'covered_bp', 'coverage']
+
+@dataclass
+class RecordSummary:
+    '''Screening result of one record'''
+    record_id: str
+    length: int
+    has_repeat: bool
+    hits: int | None = None         # None with --first-hit (search stopped at the first hit)
+    covered_bp: int | None = None   # bases covered by either copy of any repeat
+
+    @property
+    def coverage(self) -> float | None:
+        '''Fraction of the record covered by repeats'''
+        if self.covered_bp is None:
+            return None
+        return round(self.covered_bp / self.length, 4) if self.length else 0.0
+
+    def row(self, columns: list[str]) -> tuple:
+        return tuple(getattr(self, column) for column in columns)
+
+def first_hit(rec_id: str, seq_length: int, spans: Iterable[tuple[int, int, int]]) -> RecordSummary:
+    '''Summary from the first (query pos, subject pos, length) span only; the rest of the search is never run'''
+    return RecordSummary(record_id=rec_id, length=seq_length, has_repeat=next(iter(spans), None) is not None)
+
+def count_hits(rec_id: str, seq_length: int, spans: Iterable[tuple[int, int, int]]) -> RecordSummary:
+    '''Summary with hit count and coverage from (query pos, subject pos, length) spans (0-based)'''
+    import numpy as np                          # not at module level: plain scans don't need NumPy
+    reach = array('i', bytes(4 * seq_length))   # furthest end of a repeat copy starting at each position
+    hits = 0
+    for query_pos, subject_pos, length in spans:
+        hits += 1
+        if reach[query_pos] < query_pos + length:
+            reach[query_pos] = query_pos + length
+        if reach[subject_pos] < subject_pos + length:
+            reach[subject_pos] = subject_pos + length
+    covered_bp = int(np.count_nonzero(np.maximum.accumulate(np.frombuffer(reach, dtype=np.int32)) > np.arange(seq_length))) if seq_length else 0
+    return RecordSummary(record_id=rec_id, length=seq_length, has_repeat=hits > 0, hits=hits, covered_bp=covered_bp)
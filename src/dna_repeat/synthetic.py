@@ -0,0 +1,55 @@
+# src/dna_repeat/synthetic.py
+# Deterministic synthetic test sequences for benchmarks and tests: uniform random bases, tandem / low-complexity regions, and
+# planted direct and inverted repeats with an exact number of mismatches between the two copies. The same arguments (and seed)
+# always give the same sequence
+
+from dataclasses import dataclass
+import numpy as np
+
+LETTERS = np.frombuffer(b'ACGT', dtype=np.uint8)
+
+@dataclass
+class PlantedRepeat:
+    '''A repeat planted into a synthetic sequence (0-based starts of both copies; the subject copy is reverse-complemented
+    for inverted repeats)'''
+    query_pos: int
+    subject_pos: int
+    length: int
+    mismatches: int                 # between the two copies (over their whole length)
+    inverted: bool
+
+    def first_pair(self, kmer_length: int) -> tuple[int, int]:
+        '''(query pos, subject pos) of the k-mer pair at the start of the query copy, as an engine reports it. Its mismatches
+        are at most self.mismatches, so every engine must find it for m >= self.mismatches'''
+        if self.inverted:           # the rev. comp. of the query's first k-mer is the last k-mer of the subject copy
+            return self.query_pos, self.subject_pos + self.length - kmer_length
+        return self.query_pos, self.subject_pos
+
+def synthetic_sequence(length: int, seed: int = 0, planted: int = 4, repeat_length: int = 40, mismatches: int = 0,
+                       tandem_fraction: float = 0.02) -> tuple[str, list[PlantedRepeat]]:
+    '''Returns (sequence, planted repeats). About tandem_fraction of the sequence is tandem / low-complexity regions (short
+    units of 1-6 bp repeated over 50-200 bp); planted repeats alternate direct / inverted and never overlap each other. Fewer
+    repeats are planted if the sequence is too short to hold them all'''
+    rng = np.random.default_rng(seed)
+    bases = rng.integers(0, 4, length, dtype=np.uint8)
+
+    tandem_bp = 0
+    while length >= 50 and tandem_bp < tandem_fraction * length:
+        region = int(rng.integers(50, min(200, length) + 1))
+        start = int(rng.integers(0, length - region + 1))
+        unit = rng.integers(0, 4, int(rng.integers(1, 7)), dtype=np.uint8)
+        bases[start:start + region] = np.resize(unit, region)
+        tandem_bp += region
+
+    repeats: list[PlantedRepeat] = []
+    slots = min(2 * planted, length // repeat_length) // 2 * 2              # non-overlapping slots of repeat_length bp
+    chosen = np.sort(rng.choice(length // repeat_length, slots, replace=False)) * repeat_length if slots else []
+    for r in range(slots // 2):
+        query_pos, subject_pos = int(chosen[2 * r]), int(chosen[2 * r + 1])
+        copy = bases[query_pos:query_pos + repeat_length].copy()
+        changed = rng.choice(repeat_length, mismatches, replace=False)
+        copy[changed] = (copy[changed] + rng.integers(1, 4, mismatches, dtype=np.uint8)) % 4    # always a different base
+        inverted = r % 2 == 1
+        bases[subject_pos:subject_pos + repeat_length] = 3 - copy[::-1] if inverted else copy
+        repeats.append(PlantedRepeat(query_pos, subject_pos, repeat_length, mismatches, inverted))
+    return LETTERS[bases].tobytes().decode('ascii'), repeats
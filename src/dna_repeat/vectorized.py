@@ -0,0 +1,212 @@
+# src/dna_repeat/vectorized.py
+    ## NumPy backend for the 2-bit brute-force search. Same bit tricks as ai.py (XOR, fold, mask, popcount) but done on whole
+    ## tiles of the (i, j) comparison matrix at once instead of one pair at a time. Still O(n^2) comparisons, so it's meant for
+    ## high-m searches where block-index filtering doesn't filter much. Tiling keeps memory bounded (~tile_size^2 per temp array).
+    ## For one long sequence the rows can be split into strips that run on a process pool, sharing the code arrays through shared memory.
+
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Iterator
+from multiprocessing.shared_memory import SharedMemory
+import numpy as np
+from dna_repeat.core import PairCounter, RepeatHit, make_hit, reverse_complement
+from dna_repeat.strips import iter_in_order
+
+BASE_LOOKUP = np.full(256, 255, dtype=np.uint8)
+'''Byte -> 2-bit base value lookup table (same values as BASE_TO_INT; 255 = not a base)'''
+for _i, _base in enumerate(b'ACGT'):
+    BASE_LOOKUP[_base] = _i
+
+TILE_SIZE = 1024
+'''Rows/columns per tile of the comparison matrix'''
+
+def encode_kmers_np(seq: str, kmer_length: int) -> np.ndarray:
+    '''Returns all k-mers of seq as 2-bit codes (uint64 array), same values as ai.encode_kmers'''
+    return encode_bases_np(BASE_LOOKUP[np.frombuffer(seq.encode('ascii'), dtype=np.uint8)], kmer_length)
+
+def encode_bases_np(bases: np.ndarray, kmer_length: int) -> np.ndarray:
+    '''Returns all k-mers of an array of 2-bit base values (0-3) as 2-bit codes (uint64 array)'''
+    bases = bases.astype(np.uint64)
+    n = len(bases) - kmer_length + 1
+    codes = np.zeros(n, dtype=np.uint64)
+    for t in range(kmer_length):                            # k vectorized shift/OR passes instead of n*k python steps
+        codes <<= np.uint64(2)
+        codes |= bases[t:t + n]
+    return codes
+
+def reverse_complement_codes(codes: np.ndarray, kmer_length: int) -> np.ndarray:
+    '''Reverse-complement code of every k-mer code (uint64 array), same values as the rc codes of ai.encode_kmers_both.
+    Complement = NOT of each 2-bit base; the bases are then reversed by swapping 2-bit pairs, nibbles and bytes'''
+    x = ~codes
+    x = ((x >> np.uint64(2)) & np.uint64(0x3333333333333333)) | ((x & np.uint64(0x3333333333333333)) << np.uint64(2))
+    x = ((x >> np.uint64(4)) & np.uint64(0x0F0F0F0F0F0F0F0F)) | ((x & np.uint64(0x0F0F0F0F0F0F0F0F)) << np.uint64(4))
+    return x.byteswap() >> np.uint64(64 - 2 * kmer_length)    # the k-mer's bases are now the top 2k bits
+
+def hamming_tile(rows: np.ndarray, cols: np.ndarray, kmer_length: int) -> np.ndarray:
+    '''Hamming distances between every row code and every column code (2D array, rows x cols)'''
+    diff = rows[:, None] ^ cols[None, :]
+    diff |= diff >> np.uint64(1)
+    diff &= np.uint64(((1 << (2 * kmer_length)) - 1) // 3)  # 01 01 01 ... mask, see ai.hamming_distance_2bit
+    return np.bitwise_count(diff)
+
+def _tile_pairs(codes: np.ndarray, codes_other: np.ndarray, kmer_length: int, allowed_mismatches: int, inverted: bool,
+                tile_size: int | None = None, rows: tuple[int, int] | None = None,
+                min_distance: int = 0, max_distance: int | None = None) -> tuple[np.ndarray, np.ndarray, np.ndarray, int]:
+    '''Returns (i, j, mismatches) arrays of all qualifying pairs in nested-loop order (i, then j), plus the number of pairs
+    compared (tile cells). rows = (first, stop) limits i. Only tiles that touch the distance band
+    (min_distance <= subject pos - query pos <= max_distance) are compared'''
+    tile_size = tile_size or TILE_SIZE
+    n = len(codes)
+    row_start, row_stop = rows or (0, n)
+    min_distance = min_distance if inverted else max(min_distance, 1)   # direct: j > i (upper triangle). inverted: p >= i
+    max_distance = n if max_distance is None else max_distance
+    found_i, found_j, found_mm = [], [], []
+    compared = 0
+    for i0 in range(row_start, row_stop, tile_size):
+        i1 = min(i0 + tile_size, row_stop)
+        i = np.arange(i0, i1)
+        if inverted:                                        # column j is the rev. comp. k-mer starting at p = n - 1 - j
+            j_start, j_stop = max(0, n - i1 - max_distance), max(0, n - i0 - min_distance)
+        else:
+            j_start, j_stop = i0 + min_distance, min(n, i1 + max_distance)
+        for j0 in range(j_start, j_stop, tile_size):
+            j1 = min(j0 + tile_size, j_stop)
+            mismatches = hamming_tile(codes[i0:i1], codes_other[j0:j1], kmer_length)
+            compared += mismatches.size
+            keep = mismatches <= allowed_mismatches
+            j = np.arange(j0, j1)
+            distance = (n - 1 - j[None, :] if inverted else j[None, :]) - i[:, None]
+            keep &= (distance >= min_distance) & (distance <= max_distance)
+            ti, tj = np.nonzero(keep)
+            found_i.append(ti + i0)
+            found_j.append(tj + j0)
+            found_mm.append(mismatches[ti, tj])
+    if not found_i:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, empty, compared
+    all_i, all_j, all_mm = np.concatenate(found_i), np.concatenate(found_j), np.concatenate(found_mm)
+    order = np.lexsort((all_j, all_i))                      # tiles of one row block are visited column-by-column
+    return all_i[order], all_j[order], all_mm[order], compared
+
+def _shared_tile_pairs(shm_name: str, shm_other_name: str, n: int, kmer_length: int, allowed_mismatches: int, inverted: bool,
+                       band: tuple[int, int | None], rows: tuple[int, int]) -> tuple[np.ndarray, np.ndarray, np.ndarray, int]:
+    '''Worker: attaches to the shared code arrays (no copy/pickle) and compares one strip of rows'''
+    shm = SharedMemory(name=shm_name)
+    shm_other = SharedMemory(name=shm_other_name)
+    try:
+        codes = np.ndarray((n,), dtype=np.uint64, buffer=shm.buf)
+        codes_other = np.ndarray((n,), dtype=np.uint64, buffer=shm_other.buf)
+        result = _tile_pairs(codes, codes_other, kmer_length, allowed_mismatches, inverted, rows=rows,
+                             min_distance=band[0], max_distance=band[1])
+        del codes, codes_other                              # release the buffer views before closing
+        return result
+    finally:
+        shm.close()
+        shm_other.close()
+
+def _to_shared(codes: np.ndarray) -> SharedMemory:
+    '''Copies a code array into a new shared memory block'''
+    shm = SharedMemory(create=True, size=max(codes.nbytes, 1))
+    np.ndarray(codes.shape, dtype=codes.dtype, buffer=shm.buf)[:] = codes
+    return shm
+
+def _iter_strips(codes: np.ndarray, codes_other: np.ndarray, kmer_length: int, allowed_mismatches: int, inverted: bool,
+                 jobs: int = 1, min_distance: int = 0, max_distance: int | None = None,
+                 counter: PairCounter | None = None) -> Iterator[tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    '''Yields (i, j, mismatches) arrays per strip of TILE_SIZE rows, in serial order; counter gets the pairs compared.
+    With jobs > 1 strips run in a process pool; only ~2 strips per worker are submitted ahead of the consumer, so finished
+    strips don't pile up in memory'''
+    n = len(codes)
+    strips = [(i0, min(i0 + TILE_SIZE, n)) for i0 in range(0, n, TILE_SIZE)]
+    if jobs <= 1 or len(strips) <= 1:
+        results = (_tile_pairs(codes, codes_other, kmer_length, allowed_mismatches, inverted, rows=rows,
+                               min_distance=min_distance, max_distance=max_distance) for rows in strips)
+        pool = None
+    else:
+        shm = _to_shared(codes)
+        shm_other = shm if codes_other is codes else _to_shared(codes_other)
+        pool = ProcessPoolExecutor(max_workers=jobs)
+        strip_pairs = partial(_shared_tile_pairs, shm.name, shm_other.name, n, kmer_length, allowed_mismatches, inverted,
+                              (min_distance, max_distance))
+        results = iter_in_order(pool, strip_pairs, ((rows,) for rows in strips), 2 * jobs)     # in serial order
+    try:
+        for ii, jj, mm, compared in results:
+            if counter:
+                counter.pairs += compared
+            yield ii, jj, mm
+    finally:
+        if pool:
+            pool.shutdown(cancel_futures=True)              # generator closed early (e.g. --first-hit): drop the strips not started yet
+            for block in {shm, shm_other}:
+                block.close()
+                block.unlink()
+
+def find_repeats_np(rec_id: str, seq: str, kmer_length: int, allowed_mismatches: int, *, jobs: int = 1) -> list[RepeatHit]:
+    '''Find direct repeats with NumPy tiles (optionally on `jobs` processes). Same hits (and order) as find_repeats_2bit'''
+    return list(iter_repeats_np(rec_id, seq, kmer_length, allowed_mismatches, jobs=jobs))
+
+def iter_repeats_np(rec_id: str, seq: str, kmer_length: int, allowed_mismatches: int, *, jobs: int = 1) -> Iterator[RepeatHit]:
+    '''Generator version of find_repeats_np; yields hits strip by strip'''
+    for i, j, mismatches in iter_pairs_np(seq, kmer_length, allowed_mismatches, jobs=jobs):
+        yield make_hit(rec_id, seq, kmer_length, i, j, mismatches, 'direct')
+
+def iter_pairs_np(seq: str, kmer_length: int, allowed_mismatches: int,
+                  min_distance: int = 0, max_distance: int | None = None, *, jobs: int = 1,
+                  counter: PairCounter | None = None) -> Iterator[tuple[int, int, int]]:
+    '''Yields (query pos, subject pos, mismatches) of direct repeats; 0-based k-mer starts.
+    Only pairs with min_distance <= subject pos - query pos <= max_distance are compared (counted in counter, if given)'''
+    yield from _direct_pairs(encode_kmers_np(seq, kmer_length), None, kmer_length, allowed_mismatches,
+                             min_distance, max_distance, jobs, counter)
+
+def _direct_pairs(codes: np.ndarray, valid: np.ndarray | None, kmer_length: int, allowed_mismatches: int, min_distance: int,
+                  max_distance: int | None, jobs: int, counter: PairCounter | None) -> Iterator[tuple[int, int, int]]:
+    '''Direct (query pos, subject pos, mismatches) of a code array; pairs with an invalid k-mer are dropped'''
+    for ii, jj, mm in _iter_strips(codes, codes, kmer_length, allowed_mismatches, False, jobs, min_distance, max_distance, counter):
+        if valid is not None:
+            keep = valid[ii] & valid[jj]
+            ii, jj, mm = ii[keep], jj[keep], mm[keep]
+        yield from zip(ii.tolist(), jj.tolist(), mm.tolist())
+
+def find_invert_repeats_np(rec_id: str, seq: str, kmer_length: int, allowed_mismatches: int, *, jobs: int = 1) -> list[RepeatHit]:
+    '''Find inverted repeats with NumPy tiles (optionally on `jobs` processes). Same hits (and order) as find_invert_repeats_2bit'''
+    return list(iter_invert_repeats_np(rec_id, seq, kmer_length, allowed_mismatches, jobs=jobs))
+
+def iter_invert_repeats_np(rec_id: str, seq: str, kmer_length: int, allowed_mismatches: int, *, jobs: int = 1) -> Iterator[RepeatHit]:
+    '''Generator version of find_invert_repeats_np; yields hits strip by strip'''
+    for i, p, mismatches in iter_invert_pairs_np(seq, kmer_length, allowed_mismatches, jobs=jobs):
+        yield make_hit(rec_id, seq, kmer_length, i, p, mismatches, 'inverted')
+
+def iter_invert_pairs_np(seq: str, kmer_length: int, allowed_mismatches: int,
+                         min_distance: int = 0, max_distance: int | None = None, *, jobs: int = 1,
+                         counter: PairCounter | None = None) -> Iterator[tuple[int, int, int]]:
+    '''Yields (query pos, subject pos, mismatches) of inverted repeats; 0-based k-mer starts, subject on the forward strand.
+    Only pairs with min_distance <= subject pos - query pos <= max_distance are compared (counted in counter, if given)'''
+    codes = encode_kmers_np(seq, kmer_length)
+    codes_rc = encode_kmers_np(reverse_complement(seq), kmer_length)
+    yield from _inverted_pairs(codes, codes_rc, None, kmer_length, allowed_mismatches, min_distance, max_distance, jobs, counter)
+
+def _inverted_pairs(codes: np.ndarray, codes_rc: np.ndarray, valid: np.ndarray | None, kmer_length: int, allowed_mismatches: int,
+                    min_distance: int, max_distance: int | None, jobs: int,
+                    counter: PairCounter | None) -> Iterator[tuple[int, int, int]]:
+    '''Inverted (query pos, subject pos, mismatches) of a code array; pairs with an invalid k-mer are dropped'''
+    for ii, jj, mm in _iter_strips(codes, codes_rc, kmer_length, allowed_mismatches, True, jobs, min_distance, max_distance, counter):
+        pp = len(codes) - 1 - jj                                    # rev. comp. k-mer j -> forward start
+        if valid is not None:
+            keep = valid[ii] & valid[pp]
+            ii, pp, mm = ii[keep], pp[keep], mm[keep]
+        yield from zip(ii.tolist(), pp.tolist(), mm.tolist())
+
+def iter_code_pairs_np(codes: np.ndarray, valid: np.ndarray | None, kmer_length: int, allowed_mismatches: int,
+                       direct: bool = True, inverted: bool = True, min_distance: int = 0, max_distance: int | None = None, *,
+                       jobs: int = 1, counter: PairCounter | None = None) -> Iterator[tuple[int, int, int, bool]]:
+    '''Yields (query pos, subject pos, mismatches, inverted) from k-mer codes that are already encoded (e.g. straight from a
+    packed file, see PackedSequence.kmer_codes): all direct hits, then all inverted hits, each in the order of the separate
+    generators. K-mers where valid is False (overlapping ambiguous bases) are never reported'''
+    if direct:
+        for i, j, mismatches in _direct_pairs(codes, valid, kmer_length, allowed_mismatches, min_distance, max_distance, jobs, counter):
+            yield i, j, mismatches, False
+    if inverted:
+        codes_rc = np.ascontiguousarray(reverse_complement_codes(codes, kmer_length)[::-1])  # = codes of the rev. comp. sequence
+        for i, p, mismatches in _inverted_pairs(codes, codes_rc, valid, kmer_length, allowed_mismatches, min_distance,
+                                                max_distance, jobs, counter):
+            yield i, p, mismatches, True
@@ -0,0 +1,45 @@
+from dna_repeat.ambiguity import SegmentMap, iter_segment_pairs
+from dna_repeat.ai import iter_pairs_2bit, iter_invert_pairs_2bit, hamming_distance_2bit, dna_to_int
+from dna_repeat.core import clean_and_check, reverse_complement
+from dna_repeat.error import InvalidSequenceError
+import random
+import pytest
+
+random.seed(5)
+seq = ''.join(random.choice('ACGT') for _ in range(60)) + 'N' * 7 + 'ACGTTGCA' + 'RY' + ''.join(random.choice('ACGT') for _ in range(60))
+k, m = 6, 1
+
+def brute_force(seq: str, inverted: bool) -> list[tuple[int, int, int]]:
+    '''All pairs of ACGT-only k-mers, in nested-loop order'''
+    valid = [i for i in range(len(seq) - k + 1) if set(seq[i:i + k]) <= set('ACGT')]
+    pairs = []
+    for i in valid:
+        for p in (reversed([p for p in valid if p >= i]) if inverted else [p for p in valid if p > i]):
+            subject = reverse_complement(seq[p:p + k]) if inverted else seq[p:p + k]
+            mismatches = hamming_distance_2bit(dna_to_int(seq[i:i + k]), dna_to_int(subject), k)
+            if mismatches <= m:
+                pairs.append((i, p, mismatches))
+    return pairs
+
+def test_segment_map():
+    segment_map = SegmentMap('ACGTNNACGTACGNACG', 4)
+    assert segment_map.segments == [(0, 4), (6, 13)]
+    assert segment_map.joined == 'ACGTACGTACG'
+    assert segment_map.to_original(0) == 0
+    assert segment_map.to_original(1) is None          # crosses the junction
+    assert segment_map.to_original(4) == 6
+
+@pytest.mark.parametrize('find, inverted', [(iter_pairs_2bit, False), (iter_invert_pairs_2bit, True)])
+def test_segment_pairs_in_original_coordinates(find, inverted):
+    assert list(iter_segment_pairs(find, seq, k, m)) == brute_force(seq, inverted)
+
+@pytest.mark.parametrize('find, inverted', [(iter_pairs_2bit, False), (iter_invert_pairs_2bit, True)])
+def test_segment_pairs_distance_band(find, inverted):
+    # the band is measured in original coordinates, across the N gap too
+    expected = [(i, p, mm) for i, p, mm in brute_force(seq, inverted) if 30 <= p - i <= 70]
+    assert list(iter_segment_pairs(find, seq, k, m, min_distance=30, max_distance=70)) == expected
+
+def test_clean_and_check_ambiguous():
+    with pytest.raises(InvalidSequenceError, match="'N' at pos. 61-67"):
+        clean_and_check('gappy', seq, k)
+    assert clean_and_check('gappy', seq.lower(), k, allow_ambiguous=True) == ('gappy', seq)
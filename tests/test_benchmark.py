@@ -0,0 +1,39 @@
+from dna_repeat.benchmark import BASELINE, BenchResult, cross_check, engine_pairs, iter_benchmark, scaling_exponents
+from dna_repeat.core import reverse_complement
+from dna_repeat.synthetic import synthetic_sequence
+import pytest
+
+def test_synthetic_sequence_is_deterministic():
+    seq, planted = synthetic_sequence(2000, seed=7, planted=4, repeat_length=40, mismatches=3)
+    assert (seq, planted) == synthetic_sequence(2000, seed=7, planted=4, repeat_length=40, mismatches=3)
+    assert len(seq) == 2000 and set(seq) <= set('ACGT')
+    assert [repeat.inverted for repeat in planted] == [False, True, False, True]
+    for repeat in planted:
+        query = seq[repeat.query_pos:repeat.query_pos + 40]
+        subject = seq[repeat.subject_pos:repeat.subject_pos + 40]
+        subject = reverse_complement(subject) if repeat.inverted else subject
+        assert sum(a != b for a, b in zip(query, subject)) == 3
+
+def test_cross_check_finds_disagreement_and_missing_repeats():
+    seq, planted = synthetic_sequence(600, seed=1, mismatches=1)
+    pairs = {engine: engine_pairs(engine, seq, 12, 1) for engine in ('index', 'numpy', BASELINE)}
+    assert cross_check(pairs, planted, 12, 1) == []
+    pairs['numpy'] = pairs['numpy'][1:]
+    assert cross_check(pairs, planted, 12, 1) == ['numpy: 0 extra / 1 missing hits vs. index']
+    assert any('planted' in problem for problem in cross_check({'index': []}, planted, 12, 1))
+
+def test_iter_benchmark():
+    problems = []
+    results = list(iter_benchmark([200, 400], [8], [0, 2], seed=3, memory=False, problems=problems))
+    assert problems == []
+    assert {(r.engine, r.allowed_mismatches) for r in results} == {(e, m) for e in ('index', 'numpy', '2bit', BASELINE) for m in (0, 2)} | {('exact', 0)}
+    assert all(r.orientation == ('direct' if r.engine == BASELINE else 'both') for r in results)
+
+def test_scaling_exponents():
+    results = [BenchResult('2bit', n, 20, 0, 'both', 1e-6 * n ** 2, 0) for n in (100, 200, 400)]
+    results.append(BenchResult('index', 100, 20, 0, 'both', 0.1, 0))        # one length: no fit
+    assert scaling_exponents(results) == {('2bit', 20, 0, 'both'): pytest.approx(2.0)}
+
+def test_scaling_exponent_of_quadratic_engine():
+    results = list(iter_benchmark([150, 300, 600], [8], [0], engines=['2bit'], inverted=False, memory=False))
+    assert scaling_exponents(results)[('2bit', 8, 0, 'direct')] > 1
@@ -0,0 +1,64 @@
+from dna_repeat.cache import ResultCache, cache_key
+from dna_repeat.cli import main
+from dna_repeat.hits import HitTable
+from dna_repeat.scan import ScanParams, scan_record
+import os
+
+seq = 'TGAAAGCCAGGCAAGTTTTCTGCTTCTTTTGCTTCTTAGTCAGGAGATAGATAGATTACGTTTTTAGAGTGCCAGGCAAGTCTTCTGCTT'
+
+def test_round_trip(tmp_path):
+    cache = ResultCache(tmp_path)
+    hits = HitTable('x', seq, 8)
+    hits.extend([(0, 20, 1), (3, 40, 0)], inverted=False)
+    hits.extend_maximal([(5, 60, 12)], inverted=True)
+    cache.put('ab12', hits)
+    cached = cache.get('ab12', 'renamed', seq)
+    assert list(cached.rows()) == [('renamed', *row[1:]) for row in hits.rows()]
+    assert cache.get('cd34', 'x', seq) is None
+
+def test_corrupt_entry_is_a_miss(tmp_path):
+    cache = ResultCache(tmp_path)
+    cache.put('ab12', HitTable('x', seq, 8))
+    cache._path('ab12').write_bytes(b'DRH1 truncated')
+    assert cache.get('ab12', 'x', seq) is None
+
+def test_scan_record_reuses_cached_hits(tmp_path):
+    params = ScanParams(kmer_length=8, allowed_mismatches=1, engine='index', cache_dir=tmp_path)
+    first = scan_record('a', seq, params).hits
+    key = cache_key(seq, params.cache_fields())
+    assert list(ResultCache(tmp_path).get(key, 'a', seq).rows()) == list(first.rows())
+    fake = HitTable('b', seq, 8)
+    fake.append(1, 2, 0, False)
+    ResultCache(tmp_path).put(key, fake)                    # same sequence + parameters -> no new search
+    assert [(hit.query_start, hit.subject_start) for hit in scan_record('b', seq, params).hits] == [(2, 3)]
+    assert scan_record('b', seq, ScanParams(kmer_length=8, allowed_mismatches=1, engine='numpy', cache_dir=tmp_path, count_only=True)).summary.hits == 1
+    assert len(scan_record('b', seq, ScanParams(kmer_length=8, allowed_mismatches=0, engine='exact', cache_dir=tmp_path)).hits) != 1
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = ResultCache(tmp_path)
+    hits = HitTable('x', seq, 8)
+    hits.extend([(i, i + 1, 0) for i in range(100)], inverted=False)
+    for age, key in enumerate(['aa', 'bb', 'cc']):
+        cache.put(key, hits)
+        os.utime(cache._path(key), (1000 + age, 1000 + age))
+    cache.get('aa', 'x', seq)                               # now the most recently used
+    size = cache._path('aa').stat().st_size
+    cache.max_bytes = 2 * size
+    assert cache.evict() == size
+    assert [key for key in ['aa', 'bb', 'cc'] if cache._path(key).exists()] == ['aa', 'cc']
+
+def test_cli_cache_is_opt_in(tmp_path, monkeypatch):
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path / 'xdg'))
+    run = lambda *args: main(['tests/test.fasta', '-k', '12', '-m', '1', '-o', str(tmp_path), *args])
+    assert run() == 0 and not (tmp_path / 'xdg').exists()
+    assert run('--cache') == 0 and list((tmp_path / 'xdg' / 'dna-repeat').glob('*/*.hits'))
+    assert run('--cache-dir', str(tmp_path / 'dir')) == 0 and list((tmp_path / 'dir').glob('*/*.hits'))
+    assert run('--cache-dir', str(tmp_path / 'off'), '--no-cache') == 0 and not (tmp_path / 'off').exists()
+
+def test_failed_write_leaves_no_partial_file(tmp_path, monkeypatch):
+    def disk_full(*args):
+        raise OSError(28, 'No space left on device')
+    monkeypatch.setattr('dna_repeat.cache._encode', disk_full)
+    cache = ResultCache(tmp_path)
+    cache.put('ab12', HitTable('x', seq, 8))                  # ignored
+    assert not list(tmp_path.glob('*/*'))
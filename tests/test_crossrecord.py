@@ -0,0 +1,41 @@
+from dna_repeat.crossrecord import iter_cross_rows, group_pools, read_pools
+from dna_repeat.ai import hamming_distance_2bit, dna_to_int
+from dna_repeat.core import reverse_complement
+import random
+import pytest
+
+random.seed(13)
+records = [(f'frag{r}', ''.join(random.choice('ACGT') for _ in range(random.randint(3, 90)))) for r in range(6)]
+
+def brute_force(records: list[tuple[str, str]], k: int, m: int) -> list[tuple]:
+    '''Every k-mer of every record vs. every k-mer of every later record'''
+    rows = []
+    for a, (query_id, query_seq) in enumerate(records):
+        for subject_id, subject_seq in records[a + 1:]:
+            for i in range(len(query_seq) - k + 1):
+                for p in range(len(subject_seq) - k + 1):
+                    for orientation, subject in (('direct', subject_seq[p:p + k]), ('inverted', reverse_complement(subject_seq[p:p + k]))):
+                        mismatches = hamming_distance_2bit(dna_to_int(query_seq[i:i + k]), dna_to_int(subject), k)
+                        if mismatches <= m:
+                            rows.append((query_id, i + 1, i + k, subject_id, p + 1, p + k, query_seq[i:i + k],
+                                         subject_seq[p:p + k], mismatches, k, orientation))
+    return sorted(rows)
+
+@pytest.mark.parametrize('k, m', [(4, 0), (5, 1), (8, 2)])
+def test_same_as_brute_force(k, m):
+    assert sorted(iter_cross_rows(records, k, m)) == brute_force(records, k, m)
+
+def test_pools(tmp_path):
+    pool_file = tmp_path / 'pools.tsv'
+    pool_file.write_text('# fragment\tpool\nfrag0\tA\nfrag2\tB\nfrag3\tA\nfrag5\tB\n')
+    pools = read_pools(pool_file)
+    assert group_pools([rec_id for rec_id, _ in records], pools) == [[0, 3], [2, 5]]
+    expected = brute_force([records[0], records[3]], 5, 1) + brute_force([records[2], records[5]], 5, 1)
+    assert sorted(iter_cross_rows(records, 5, 1, pools=pools)) == sorted(expected)
+    pool_file.write_text('frag0 A\n')
+    with pytest.raises(ValueError, match='line 1'):
+        read_pools(pool_file)
+
+def test_direct_only():
+    rows = list(iter_cross_rows([('a', 'GCCAGGCAAGTT'), ('b', 'AACTTGCCTGGC'), ('c', 'TTGCCAGGCAAG')], 10, 0, inverted=False))
+    assert [(row[0], row[3], row[10]) for row in rows] == [('a', 'c', 'direct')]
@@ -0,0 +1,41 @@
+from dna_repeat.ai import find_repeats_2bit, find_invert_repeats_2bit, encode_kmers, encode_kmers_both
+from dna_repeat.exact import find_repeats_exact, find_invert_repeats_exact, iter_pairs_both_exact, iter_pairs_exact, iter_invert_pairs_exact
+import dna_repeat.strips
+from dna_repeat.core import reverse_complement
+from dna_repeat.engines import select_engine
+import random
+import pytest
+
+random.seed(11)
+seq = 'TGAAAGCCAGGCAAGTTTTCTGCTTCTTTTGCTTCTTAGTCAGGAGATAGATAGATTACGTTTTTAGAGTGCCAGGCAAGTCTTCTGCTT'
+random_seq = ''.join(random.choice('ACGT') for _ in range(500))
+
+@pytest.mark.parametrize('test_seq', [seq, random_seq, 'A' * 30, 'ACGT' * 20])
+@pytest.mark.parametrize('k', [4, 6, 12])
+def test_same_as_2bit(test_seq, k):
+    assert find_repeats_exact('x', test_seq, k, 0) == find_repeats_2bit('x', test_seq, k, 0)
+    assert find_invert_repeats_exact('x', test_seq, k, 0) == find_invert_repeats_2bit('x', test_seq, k, 0)
+
+def test_encode_kmers_both():
+    codes, rc_codes = encode_kmers_both(seq, 12)
+    assert codes == encode_kmers(seq, 12)
+    assert rc_codes == encode_kmers(reverse_complement(seq), 12)[::-1]
+
+@pytest.mark.parametrize('test_seq', [seq, random_seq, 'ACGT' * 20])
+def test_combined_same_as_separate(test_seq):
+    hits = [(i + 1, j + 1, 'inverted' if inverted else 'direct') for i, j, _, inverted in iter_pairs_both_exact(test_seq, 6)]
+    hits.sort(key=lambda hit: hit[2] == 'inverted')        # stable: direct first, both in their own order
+    assert hits == [(hit.query_start, hit.subject_start, hit.orientation)
+                    for hit in find_repeats_2bit('x', test_seq, 6, 0) + find_invert_repeats_2bit('x', test_seq, 6, 0)]
+
+def test_select_engine():
+    assert select_engine('auto', 20, 0) == 'exact'
+    assert select_engine('auto', 20, 2) == 'index'
+    assert select_engine('auto', 20, 6) == 'numpy'
+    assert select_engine('2bit', 20, 0) == '2bit'
+
+def test_query_strips_same_as_serial(monkeypatch):
+    monkeypatch.setattr(dna_repeat.strips, 'MIN_STRIP_KMERS', 64)
+    for find in (iter_pairs_exact, iter_invert_pairs_exact, iter_pairs_both_exact):
+        assert list(find(random_seq, 8, 0, jobs=2)) == list(find(random_seq, 8, 0))
+    assert list(iter_pairs_both_exact(random_seq, 8, 0, 5, 200, jobs=3)) == list(iter_pairs_both_exact(random_seq, 8, 0, 5, 200))
@@ -0,0 +1,33 @@
+from dna_repeat.fasta import FastaFile
+from dna_repeat.core import iter_fasta
+from pathlib import Path
+
+text = '>one first record\nACGTACGTAC\nGTACGTACGT\nACG\n>two\r\nTTTT\r\nGG\r\n>three\nAAAAA\nCC\nGGGGG\n'
+expected = [('one', 'ACGTACGTACGTACGTACGTACG'), ('two', 'TTTTGG'), ('three', 'AAAAACCGGGGG')]
+
+def test_read_and_random_access(tmp_path):
+    path = tmp_path / 'x.fasta'
+    path.write_bytes(text.encode())
+    with FastaFile(path) as fasta:
+        assert list(fasta) == expected
+        assert len(fasta) == 3
+        assert fasta.total_length == 41
+        assert fasta['two'] == 'TTTTGG'
+        assert fasta[2] == 'AAAAACCGGGGG'
+        assert [(e.line_bases, e.line_width) for e in fasta.entries] == [(10, 11), (4, 6), (0, 0)]   # 'three' has ragged lines
+    assert list(iter_fasta(path)) == expected
+
+def test_fai_roundtrip(tmp_path):
+    path = tmp_path / 'x.fasta'
+    path.write_bytes(b'>one first record\nACGTACGTAC\nGTACGTACGT\nACG\n>two\r\nTTTT\r\nGG\r\n')
+    with FastaFile(path) as fasta:
+        records = list(fasta)
+        fai_path = fasta.save_index()
+    assert fai_path.read_text().splitlines()[0] == 'one\t23\t18\t10\t11'
+    with FastaFile(path) as fasta:      # now loaded from the .fai
+        assert fasta.entries[0].end is None
+        assert list(fasta) == records
+
+def test_test_fasta():
+    with FastaFile(Path('tests/test.fasta')) as fasta:
+        assert [name for name, _ in fasta] == ['DirectRepeats', 'InvertedRepeats', 'SeqWithInvalidLetters', '']
@@ -0,0 +1,27 @@
+from dna_repeat.ai import find_repeats_2bit, find_invert_repeats_2bit, iter_pairs_2bit, iter_invert_pairs_2bit
+from dna_repeat.hits import HitTable
+from dataclasses import astuple
+import pickle
+
+seq = 'TGAAAGCCAGGCAAGTTTTCTGCTTCTTTTGCTTCTTAGTCAGGAGATAGATAGATTACGTTTTTAGAGTGCCAGGCAAGTCTTCTGCTT'
+k, m = 8, 2
+
+def make_table() -> HitTable:
+    table = HitTable('stevo', seq, k)
+    table.extend(iter_pairs_2bit(seq, k, m), inverted=False)
+    table.extend(iter_invert_pairs_2bit(seq, k, m), inverted=True)
+    return table
+
+def test_iterates_as_repeat_hits():
+    expected = find_repeats_2bit('stevo', seq, k, m) + find_invert_repeats_2bit('stevo', seq, k, m)
+    table = make_table()
+    assert len(table) == len(expected)
+    assert list(table) == expected
+    assert list(table.rows()) == [astuple(hit) for hit in expected]
+
+def test_columns_and_pickle():
+    table = make_table()
+    columns = table.to_numpy()
+    assert columns['query_start'].dtype.name == 'int32'
+    assert columns['inverted'].sum() == len(find_invert_repeats_2bit('stevo', seq, k, m))
+    assert list(pickle.loads(pickle.dumps(table))) == list(table)
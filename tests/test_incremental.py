@@ -0,0 +1,44 @@
+from dna_repeat.incremental import RepeatScanner
+from dna_repeat.scan import ScanParams, scan_record
+from dna_repeat.error import InvalidSequenceError
+import random
+import pytest
+
+random.seed(9)
+random_bases = lambda n: ''.join(random.choice('ACGT') for _ in range(n))
+
+def full_rescan(scanner: RepeatScanner) -> list[tuple]:
+    params = ScanParams(kmer_length=scanner.kmer_length, allowed_mismatches=scanner.allowed_mismatches, engine='2bit')
+    return list(scan_record(scanner.rec_id, scanner.seq, params).hits.rows())
+
+@pytest.mark.parametrize('k, m', [(5, 0), (6, 1), (8, 2)])
+def test_random_edits_same_as_full_rescan(k, m):
+    scanner = RepeatScanner('x', random_bases(120), k, m)
+    for _ in range(60):
+        pos = random.randrange(len(scanner.seq))
+        edit = random.choice(['substitute', 'insert', 'delete'])
+        if edit == 'substitute':
+            scanner.substitute(pos, random_bases(min(3, len(scanner.seq) - pos)))
+        elif edit == 'insert':
+            scanner.insert(pos, random_bases(random.randint(1, 4)))
+        elif len(scanner.seq) > 60:
+            scanner.delete(pos, min(4, len(scanner.seq) - pos))
+        assert list(scanner.hit_table().rows()) == full_rescan(scanner)
+
+def test_indel_shifts_coordinates():
+    repeat = 'GCCAGGCAAG'
+    scanner = RepeatScanner('x', repeat + 'TTTT' + repeat, 10, 0, inverted=False)
+    assert list(scanner.direct_hits) == [(0, 14)]
+    scanner.insert(12, 'AAA')
+    assert list(scanner.direct_hits) == [(0, 17)]
+    scanner.substitute(17, 'T')                             # breaks the second copy
+    assert len(scanner) == 0
+
+def test_edit_checks():
+    scanner = RepeatScanner('x', 'ACGTACGTACGT', 4, 0)
+    with pytest.raises(InvalidSequenceError):
+        scanner.insert(3, 'ANA')
+    with pytest.raises(IndexError):
+        scanner.delete(10, 5)
+    scanner.delete(0, 10)                                   # shorter than k: no k-mers left
+    assert len(scanner) == 0 and scanner.seq == 'GT'
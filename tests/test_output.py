@@ -0,0 +1,36 @@
+from dna_repeat.ai import iter_repeats_2bit, find_repeats_2bit
+from dna_repeat.output import HitWriter, COLUMNS, missing_format_dependency
+import dna_repeat.output
+import csv
+import pytest
+
+seq = 'TGAAAGCCAGGCAAGTTTTCTGCTTCTTTTGCTTCTTAGTCAGGAGATAGATAGATTACGTTTTTAGAGTGCCAGGCAAGTCTTCTGCTT'
+
+def test_streams_generator_to_tsv(tmp_path):
+    with HitWriter(tmp_path, 'tsv') as writer:
+        assert writer.write(iter_repeats_2bit('stevo', seq, 10, 2)) == len(find_repeats_2bit('stevo', seq, 10, 2))
+        assert writer.write(iter([])) == 0
+    with open(tmp_path / 'output.tsv', newline='') as f:
+        rows = list(csv.reader(f, delimiter='\t'))
+    assert rows[0] == COLUMNS
+    assert rows[1][:3] == ['stevo', '2', '11']
+    assert len(rows) == writer.rows_written + 1
+
+def test_no_file_without_hits(tmp_path):
+    with HitWriter(tmp_path, 'csv') as writer:
+        writer.write(iter([]))
+    assert not (tmp_path / 'output.csv').exists()
+
+def test_missing_parquet_engine(monkeypatch):
+    monkeypatch.setattr(dna_repeat.output, 'find_spec', lambda name: name == 'pandas' or None)
+    assert missing_format_dependency('parquet') == 'pyarrow or fastparquet'
+    assert missing_format_dependency('csv') is None
+    monkeypatch.setattr(dna_repeat.output, 'find_spec', lambda name: None)
+    assert missing_format_dependency('parquet') == 'pandas'
+
+def test_failed_close_is_not_repeated(tmp_path):
+    writer = HitWriter(tmp_path / 'missing-dir', 'parquet')
+    writer.write(iter_repeats_2bit('stevo', seq, 10, 2))
+    with pytest.raises(Exception):
+        writer.close()                          # no parquet engine here, or the directory doesn't exist
+    writer.close()
@@ -0,0 +1,89 @@
+from dataclasses import replace
+from dna_repeat.core import is_packed, iter_fasta, open_fasta
+from dna_repeat.error import InvalidFASTAError
+from dna_repeat.packed import HEADER, PackedFile, PackedSequence, write_packed
+from dna_repeat.scan import ScanParams, scan_record
+from dna_repeat.vectorized import encode_kmers_np
+from pathlib import Path
+import pickle
+import random
+import struct
+import numpy as np
+import pytest
+
+records = [('a', 'ACGTACGGTACCANNNNTTGACwGCA'), ('empty', ''), ('b', 'GATTACA'), ('c', 'nnACGT')]
+
+def test_round_trip(tmp_path):
+    path = tmp_path / 'x.2bit'
+    assert write_packed(records, path) == 4
+    assert is_packed(path) and not is_packed(Path('tests/test.fasta'))
+    with PackedFile(path) as packed:
+        assert list(packed) == [(rec_id, seq.upper()) for rec_id, seq in records]
+        assert packed['b'] == 'GATTACA' and packed[3] == 'NNACGT'
+        assert packed.entries[0].runs == [(13, 4, ord('N')), (22, 1, ord('W'))]
+        assert packed.total_length == 39
+
+def test_kmer_codes_from_packed_bytes(tmp_path):
+    seq = 'TGAAAGCCAGGCAAGTTTTCTGCTTCTTTTGCTTCTTAGTCAGG'
+    write_packed([('x', seq)], tmp_path / 'x.2bit')
+    with PackedFile(tmp_path / 'x.2bit') as packed:
+        codes, valid = packed.kmer_codes(packed.entries[0], 11)
+        assert np.array_equal(codes, encode_kmers_np(seq, 11)) and valid.all()
+
+def test_kmer_codes_mask_ambiguous_runs(tmp_path):
+    write_packed(records, tmp_path / 'x.2bit')
+    with PackedFile(tmp_path / 'x.2bit') as packed:
+        codes, valid = packed.kmer_codes(packed.entries[0], 5)     # runs at 13-16 (N) and 22 (W) of 26 bases
+        assert len(codes) == len(valid) == 22
+        assert list(np.flatnonzero(valid)) == [0, 1, 2, 3, 4, 5, 6, 7, 8, 17]
+
+def test_open_fasta_detects_packed_files(tmp_path):
+    path = tmp_path / 'test.2bit'
+    write_packed(iter_fasta(Path('tests/test.fasta')), path)
+    with open_fasta(path) as packed:
+        assert isinstance(packed, PackedFile)
+    assert list(iter_fasta(path)) == [(rec_id, seq.upper()) for rec_id, seq in iter_fasta(Path('tests/test.fasta'))]
+
+@pytest.mark.parametrize('cut', [6, 20, 40, -60, -1])
+def test_truncated_packed_file(tmp_path, cut):
+    path = tmp_path / 'x.2bit'
+    write_packed(records, path)
+    path.write_bytes(path.read_bytes()[:cut])
+    with pytest.raises(InvalidFASTAError, match='truncated or corrupt'):
+        open_fasta(path)
+
+def test_corrupt_record_offset(tmp_path):
+    path = tmp_path / 'x.2bit'
+    write_packed([('a', 'ACGT' * 10)], path)
+    data = bytearray(path.read_bytes())
+    index_offset = HEADER.unpack_from(data)[2]
+    struct.pack_into('<Q', data, index_offset + 4 + 2 + 1 + 8, 10**6)     # count, name length, 'a', length -> offset
+    path.write_bytes(bytes(data))
+    with pytest.raises(ValueError, match='outside the data section'):
+        PackedFile(path)
+
+random.seed(11)
+unit = ''.join(random.choice('ACGT') for _ in range(20))
+ambiguous_seq = ''.join(random.choice('ACGT') for _ in range(150)) + unit + 'NNNN' + unit + 'ACGTW' + unit[::-1] + 'GATTACA'
+
+@pytest.mark.parametrize('engine, m', [('index', 2), ('exact', 0), ('numpy', 2)])
+@pytest.mark.parametrize('band', [(0, None), (10, 60)])
+def test_packed_records_searched_from_codes(tmp_path, engine, m, band):
+    write_packed([('x', ambiguous_seq)], tmp_path / 'x.2bit')
+    with PackedFile(tmp_path / 'x.2bit') as packed:
+        (rec_id, record), = packed.records()
+    assert isinstance(record, PackedSequence) and record._text is None
+    params = ScanParams(kmer_length=8, allowed_mismatches=m, engine=engine, split_ambiguous=True,
+                        min_distance=band[0], max_distance=band[1])
+    expected = scan_record('x', ambiguous_seq, replace(params, engine='2bit'))
+    result = scan_record(rec_id, pickle.loads(pickle.dumps(record)), params)
+    assert len(result.hits) > 0 and list(result.hits.rows()) == list(expected.hits.rows())
+
+def test_packed_record_checks(tmp_path):
+    write_packed(records, tmp_path / 'x.2bit')
+    with PackedFile(tmp_path / 'x.2bit') as packed:
+        results = [scan_record(rec_id, record, ScanParams(kmer_length=5, allowed_mismatches=0, engine='exact'))
+                   for rec_id, record in packed.records()]
+    expected = [scan_record(rec_id, seq, ScanParams(kmer_length=5, allowed_mismatches=0, engine='exact')) for rec_id, seq in records]
+    assert [result.error for result in results] == [result.error for result in expected]
+    assert results[0].error == "a has invalid bases: 'N' at pos. 14-17, 'W' at pos. 23"
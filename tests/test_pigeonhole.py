@@ -0,0 +1,37 @@
+from dna_repeat.ai import find_repeats_2bit, find_invert_repeats_2bit, iter_pairs_2bit, iter_invert_pairs_2bit
+from dna_repeat.core import PairCounter
+from dna_repeat.pigeonhole import split_blocks, find_repeats_pigeonhole, find_invert_repeats_pigeonhole, iter_pairs_both_pigeonhole, iter_pairs_pigeonhole, iter_invert_pairs_pigeonhole
+import dna_repeat.strips
+import random
+import pytest
+
+random.seed(7)
+seq = 'TGAAAGCCAGGCAAGTTTTCTGCTTCTTTTGCTTCTTAGTCAGGAGATAGATAGATTACGTTTTTAGAGTGCCAGGCAAGTCTTCTGCTT'
+random_seq = ''.join(random.choice('ACGT') for _ in range(400))
+
+def test_split_blocks():
+    # k = 10, m = 2 -> blocks of 4, 3, 3 bases
+    assert split_blocks(10, 2) == [(12, 0xFF), (6, 0x3F), (0, 0x3F)]
+
+@pytest.mark.parametrize('test_seq', [seq, random_seq, 'A' * 40])
+@pytest.mark.parametrize('k, m', [(4, 0), (6, 1), (8, 2), (10, 5), (20, 1)])
+def test_same_as_2bit(test_seq, k, m):
+    assert find_repeats_pigeonhole('x', test_seq, k, m) == find_repeats_2bit('x', test_seq, k, m)
+    assert find_invert_repeats_pigeonhole('x', test_seq, k, m) == find_invert_repeats_2bit('x', test_seq, k, m)
+
+@pytest.mark.parametrize('test_seq', [seq, random_seq, 'ACGT' * 20])
+@pytest.mark.parametrize('k, m', [(4, 0), (8, 2), (20, 1)])
+def test_combined_same_as_separate(test_seq, k, m):
+    both = list(iter_pairs_both_pigeonhole(test_seq, k, m))
+    assert [(i, j, mm) for i, j, mm, inverted in both if not inverted] == list(iter_pairs_2bit(test_seq, k, m))
+    assert [(i, p, mm) for i, p, mm, inverted in both if inverted] == list(iter_invert_pairs_2bit(test_seq, k, m))
+
+def test_query_strips_same_as_serial(monkeypatch):
+    monkeypatch.setattr(dna_repeat.strips, 'MIN_STRIP_KMERS', 64)
+    for find in (iter_pairs_pigeonhole, iter_invert_pairs_pigeonhole, iter_pairs_both_pigeonhole):
+        assert list(find(random_seq, 8, 2, jobs=2)) == list(find(random_seq, 8, 2))
+    assert list(iter_pairs_both_pigeonhole(random_seq, 8, 2, 5, 200, jobs=3)) == list(iter_pairs_both_pigeonhole(random_seq, 8, 2, 5, 200))
+    serial, strips = PairCounter(), PairCounter()
+    list(iter_pairs_both_pigeonhole(random_seq, 8, 2, counter=serial))
+    list(iter_pairs_both_pigeonhole(random_seq, 8, 2, jobs=2, counter=strips))
+    assert strips.pairs == serial.pairs > 0
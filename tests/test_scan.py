@@ -0,0 +1,76 @@
+from dataclasses import replace
+from dna_repeat.core import iter_fasta
+from dna_repeat.scan import ScanParams, iter_scan, iter_chunks, scan_record
+from dna_repeat.engines import ENGINES
+from pathlib import Path
+import multiprocessing
+import os
+import pytest
+
+params = ScanParams(kmer_length=5, allowed_mismatches=1, engine='index')
+
+def test_parallel_same_as_serial():
+    serial = [(r.record_id, list(r.hits or []), r.error) for r in iter_scan(iter_fasta(Path('tests/test.fasta')), params)]
+    parallel = [(r.record_id, list(r.hits or []), r.error) for r in iter_scan(iter_fasta(Path('tests/test.fasta')), params, jobs=2, chunk_bp=20)]
+    assert parallel == serial
+    assert [error is not None for _, _, error in serial] == [False, False, True, False]     # SeqWithInvalidLetters
+
+def test_worker_error_does_not_stop_run():
+    broken = ScanParams(kmer_length=5, allowed_mismatches=1, engine='no-such-engine')
+    results = list(iter_scan([('a', 'ACGTACGT'), ('b', 'GGGGCCCC')], broken, jobs=2))
+    assert [r.record_id for r in results] == ['a', 'b']
+    assert all('KeyError' in r.error for r in results)
+
+def _crash_on_marker(seq, kmer_length, allowed_mismatches, **kwargs):
+    if seq.startswith('TTTTT'):
+        os._exit(1)                             # like a segfault / OOM kill: the worker dies without an exception
+    return iter(())
+
+@pytest.mark.skipif(multiprocessing.get_start_method() != 'fork', reason='workers must inherit the patched engine')
+def test_worker_crash_with_many_chunks_queued(monkeypatch):
+    monkeypatch.setitem(ENGINES, 'crash', (_crash_on_marker, _crash_on_marker))
+    records = [(f'r{i}', ('TTTTT' if i == 13 else 'ACGTA') + 'ACGT' * 50) for i in range(40)]
+    results = list(iter_scan(records, ScanParams(kmer_length=5, allowed_mismatches=0, engine='crash'), jobs=2, chunk_bp=200))
+    assert [r.record_id for r in results] == [rec_id for rec_id, _ in records]
+    assert [r.record_id for r in results if r.error] == ['r13']
+    assert 'worker process crashed' in results[13].error
+
+def test_iter_chunks():
+    records = [('a', 'A' * 5), ('b', 'C' * 30), ('c', 'G' * 5), ('d', 'T' * 5)]
+    assert [[rec_id for rec_id, _ in chunk] for chunk in iter_chunks(records, 10)] == [['a', 'b'], ['c', 'd']]
+
+def test_combined_engine_same_rows_as_separate_searches():
+    seq = 'TGAAAGCCAGGCAAGTTTTCTGCTTCTTTTGCTTCTTAGTCAGGAGATAGATAGATTACGTNNNNTTTAGAGTGCCAGGCAAGTCTTCTGCTTAAGCAGAAGA'
+    for engine, m in [('exact', 0), ('index', 1)]:
+        combined = ScanParams(kmer_length=8, allowed_mismatches=m, engine=engine, split_ambiguous=True)
+        separate = ScanParams(kmer_length=8, allowed_mismatches=m, engine='2bit', split_ambiguous=True)
+        assert list(scan_record('x', seq, combined).hits.rows()) == list(scan_record('x', seq, separate).hits.rows())
+
+@pytest.mark.parametrize('engine, m', [('exact', 0), ('index', 1), ('numpy', 1), ('2bit', 1)])
+def test_distance_band(engine, m):
+    seq = 'TGAAAGCCAGGCAAGTTTTCTGCTTCTTTTGCTTCTTAGTCAGGAGATAGATAGATTACGTTTTTAGAGTGCCAGGCAAGTCTTCTGCTTAAGCAGAAGA'
+    full = scan_record('x', seq, ScanParams(kmer_length=6, allowed_mismatches=m, engine='2bit')).hits
+    banded = scan_record('x', seq, ScanParams(kmer_length=6, allowed_mismatches=m, engine=engine, min_distance=6, max_distance=40)).hits
+    assert list(banded.rows()) == [row for row in full.rows() if 6 <= row[3] - row[1] <= 40]
+
+def test_hit_blocks():
+    seq = 'TGAAAGCCAGGCAAGTTTTCTGCTTCTTTTGCTTCTTAGTCAGGAGATAGATAGATTACGTTTTTAGAGTGCCAGGCAAGTCTTCTGCTT'
+    whole = scan_record('x', seq, params).hits
+    result = scan_record('x', seq, replace(params, block_hits=4))
+    assert result.hits is None
+    blocks = list(result.blocks)
+    assert all(0 < len(block) <= 4 for block in blocks) and len(blocks) > 2
+    assert [row for block in blocks for row in block.rows()] == list(whole.rows())
+
+def test_direct_block_out_before_inverted_search(monkeypatch):
+    calls = []
+    def direct(seq, *args, **kwargs):
+        calls.append('direct')
+        yield from [(0, 4, 0), (1, 5, 0)]
+    def inverted(seq, *args, **kwargs):
+        calls.append('inverted')
+        yield from [(0, 3, 0)]
+    monkeypatch.setitem(ENGINES, 'spy', (direct, inverted))
+    blocks = scan_record('x', 'ACGTACGT', ScanParams(kmer_length=3, allowed_mismatches=0, engine='spy', block_hits=100)).blocks
+    assert list(next(blocks).inverted) == [0, 0] and calls == ['direct']
+    assert list(next(blocks).inverted) == [1] and calls == ['direct', 'inverted']
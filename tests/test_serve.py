@@ -0,0 +1,73 @@
+from dna_repeat.core import iter_fasta
+from dna_repeat.scan import ScanParams, scan_record
+from dna_repeat.cache import ResultCache
+from dna_repeat.serve import ScanClient, ScanServer, request_params, serve
+from pathlib import Path
+import asyncio
+import json
+import threading
+import time
+import pytest
+
+seq = 'TGAAAGCCAGGCAAGTTTTCTGCTTCTTTTGCTTCTTAGTCAGGAGATAGATAGATTACGTTTTTAGAGTGCCAGGCAAGTCTTCTGCTT'
+
+def test_request_params():
+    assert request_params({'kmer_length': 12, 'allowed_mismatches': 1}) == ScanParams(kmer_length=12, allowed_mismatches=1, engine='index')
+    assert request_params({'max_distance': 50}).max_distance == 50
+    for bad in ({'kmer_length': 3}, {'kmer_length': '12'}, {'do_direct': 1}, {'engine': 'exact', 'allowed_mismatches': 1},
+                {'first_hit': True, 'count_only': True}, {'min_distance': 10, 'max_distance': 5}, {'colour': 'red'}):
+        with pytest.raises(ValueError):
+            request_params(bad)
+
+@pytest.fixture
+def socket_path(tmp_path):
+    '''Runs a server on a Unix socket in a background thread'''
+    path = tmp_path / 'dna-repeat.sock'
+    loop = asyncio.new_event_loop()
+    task = loop.create_task(serve(ScanServer(), path))
+
+    def run():
+        try:
+            loop.run_until_complete(task)
+        except asyncio.CancelledError:
+            pass
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    for _ in range(500):
+        if path.exists():
+            break
+        time.sleep(0.01)
+    yield path
+    loop.call_soon_threadsafe(task.cancel)
+    thread.join()
+    loop.close()
+    assert not path.exists()
+
+def test_client_round_trip(socket_path):
+    records = list(iter_fasta(Path('tests/test.fasta'))) + [('x', seq)]
+    with ScanClient(socket_path, timeout=30) as client:
+        response = client.scan(records, kmer_length=12, allowed_mismatches=1)
+        results = {result['record_id']: result for result in response['results']}
+        assert [result['record_id'] for result in response['results']][:3] == [rec_id for rec_id, _ in records][:3]
+        assert results['x']['rows'] == [list(row) for row in scan_record('x', seq, request_params({'kmer_length': 12, 'allowed_mismatches': 1})).hits.rows()]
+        assert results['SeqWithInvalidLetters']['error'] and not results['SeqWithInvalidLetters']['rows']
+        summary = client.scan([('x', seq)], kmer_length=12, allowed_mismatches=1, first_hit=True)
+        assert summary['columns'] == ['record_id', 'length', 'has_repeat'] and summary['results'][0]['rows'] == [['x', len(seq), True]]
+        with pytest.raises(ValueError, match='kmer_length'):
+            client.scan([('x', seq)], kmer_length=40)
+        assert client.scan([('x', seq)], kmer_length=20, allowed_mismatches=1)['results'][0]['rows']   # connection still usable after an error
+
+def test_cache_evicted_while_serving(tmp_path):
+    cache = ResultCache(tmp_path, max_bytes=200)
+    server = ScanServer(cache=cache)
+
+    async def batches():
+        for i in range(6):
+            line = json.dumps({'id': i, 'records': [['x', seq[i:] + seq[:i]]], 'params': {'kmer_length': 8}}).encode()
+            assert (await server.respond(line))['results'][0]['rows']
+            if server._eviction:
+                await server._eviction
+    asyncio.run(batches())
+    assert server._eviction is not None
+    assert 0 < sum(path.stat().st_size for path in tmp_path.glob('*/*.hits')) <= 200             # 6 entries of 83 bytes without eviction
@@ -0,0 +1,60 @@
+from dna_repeat.core import PairCounter, subject_window
+from dna_repeat.scan import ScanParams, iter_record_pairs, scan_record
+from dna_repeat.stats import RecordStats, timed_stage
+import json
+import subprocess
+import sys
+import pytest
+
+seq = 'TGAAAGCCAGGCAAGTTTTCTGCTTCTTTTGCTTCTTAGTCAGGAGATAGATAGATTACGTTTTTAGAGTGCCAGGCAAGTCTTCTGCTT'
+
+def count_pairs(engine, k, m, min_distance=0, max_distance=None):
+    counter = PairCounter()
+    hits = list(iter_record_pairs(seq, ScanParams(kmer_length=k, allowed_mismatches=m, engine=engine,
+                                                 min_distance=min_distance, max_distance=max_distance), counter))
+    return counter.pairs, len(hits)
+
+@pytest.mark.parametrize('min_distance, max_distance', [(0, None), (5, 30), (40, 10), (0, 0)])
+def test_brute_force_counts_band(min_distance, max_distance):
+    n = len(seq) - 12 + 1
+    direct = sum(max(0, stop - max(i + 1, first)) for i in range(n) for first, stop in [subject_window(i, n, min_distance, max_distance)])
+    inverted = sum(max(0, stop - first) for i in range(n) for first, stop in [subject_window(i, n, min_distance, max_distance)])
+    assert count_pairs('2bit', 12, 3, min_distance, max_distance)[0] == direct + inverted
+    assert count_pairs('numpy', 12, 3, min_distance, max_distance)[0] >= direct + inverted     # whole tiles
+
+def test_engine_counts():
+    brute_force, _ = count_pairs('2bit', 12, 1)
+    index_pairs, index_hits = count_pairs('index', 12, 1)
+    assert index_hits <= index_pairs < brute_force
+    exact_pairs, exact_hits = count_pairs('exact', 8, 0)
+    assert exact_pairs == exact_hits > 0
+
+def test_scan_record_stats():
+    result = scan_record('x', seq, ScanParams(kmer_length=12, allowed_mismatches=1, engine='index', stats=True))
+    stats = result.stats
+    assert (stats.record_id, stats.length, stats.hits, stats.error) == ('x', len(seq), len(result.hits), None)
+    assert {'clean', 'cache', 'search', 'hits'} <= set(stats.stages)
+    assert stats.candidate_pairs >= stats.hits and stats.peak_rss_mib > 0
+    assert scan_record('x', seq, ScanParams(kmer_length=12, allowed_mismatches=1, engine='index')).stats is None
+
+def test_timed_stage_streams():
+    produced = []
+    def pairs():
+        for i in range(3):
+            produced.append(i)
+            yield i
+    stats = RecordStats('x')
+    stream = timed_stage(pairs(), stats, 'search')
+    assert next(stream) == 0 and produced == [0]       # nothing is collected ahead
+    assert list(stream) == [1, 2] and stats.stages['search'] >= 0
+
+def test_cli_stats_file(tmp_path):
+    stats_filepath = tmp_path / 'stats.jsonl'
+    subprocess.run([sys.executable, '-m', 'dna_repeat.cli', 'tests/test.fasta', '-k', '12', '-m', '1', '--no-cache', '-o',
+                    str(tmp_path), '--stats', str(stats_filepath), '--profile', str(tmp_path / 'run.prof')], check=True,
+                   capture_output=True)
+    lines = [json.loads(line) for line in stats_filepath.read_text().splitlines()]
+    *records, summary = lines
+    assert len(records) == 4 and all('parse' in record['stages'] and 'output' in record['stages'] for record in records)
+    assert summary['summary'] and summary['records'] == 4 and summary['errors'] == sum(record['error'] is not None for record in records)
+    assert (tmp_path / 'run.prof').stat().st_size > 0
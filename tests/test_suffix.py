@@ -0,0 +1,54 @@
+from dna_repeat.core import reverse_complement
+from dna_repeat.suffix import maximal_repeats, find_maximal_repeats
+import random
+import pytest
+
+def brute_force(seq: str, min_length: int) -> tuple[list, list]:
+    '''Maximal exact repeats by extending every matching position pair as far as possible'''
+    n = len(seq)
+    rc = reverse_complement(seq)
+    direct, inverted = set(), set()
+    for a in range(n):
+        for b in range(a + 1, n):
+            if a > 0 and seq[a - 1] == seq[b - 1]:          # not left-maximal
+                continue
+            length = 0
+            while b + length < n and seq[a + length] == seq[b + length]:
+                length += 1
+            if length >= min_length:
+                direct.add((a, b, length))
+        for r in range(n):                                  # seq[a:] vs rc[r:]
+            if a > 0 and r > 0 and seq[a - 1] == rc[r - 1]:
+                continue
+            length = 0
+            while a + length < n and r + length < n and seq[a + length] == rc[r + length]:
+                length += 1
+            if length >= min_length:
+                subject = n - r - length
+                inverted.add((min(a, subject), max(a, subject), length))
+    return sorted(direct), sorted(inverted)
+
+@pytest.mark.parametrize('seed', range(5))
+def test_same_as_brute_force(seed):
+    random.seed(seed)
+    repeat = ''.join(random.choice('ACGT') for _ in range(25))
+    parts = [''.join(random.choice('ACGT') for _ in range(40)) for _ in range(3)]
+    seq = parts[0] + repeat + parts[1] + reverse_complement(repeat) + parts[2] + repeat[:18] + 'AAAAAAAAAA'
+    assert maximal_repeats(seq, 6) == brute_force(seq, 6)
+
+def test_one_row_per_repeat():
+    repeat = 'GCCAGGCAAGTTTTCTGCTTAGCTAGGATCGATTACGCGCGATATAGCGGCATCGACTTA'     # 60 bp
+    seq = 'TTTTT' + repeat + 'CCCCC' + repeat + 'GGGGG'
+    hits = find_maximal_repeats('x', seq, 30, inverted=False)
+    assert len(hits) == 1
+    assert (hits[0].query_start, hits[0].subject_start, hits[0].kmer_length) == (6, 71, 60)
+    assert hits[0].query_seq == hits[0].subject_seq == repeat
+
+def test_scan_maximal_with_ambiguous_segments():
+    from dna_repeat.scan import ScanParams, scan_record
+    repeat = 'GCCAGGCAAGTTTTCTGCTTAGCTAGGATCG'
+    params = ScanParams(kmer_length=20, allowed_mismatches=0, engine='auto', do_inverted=False, maximal=True, split_ambiguous=True)
+    hits = list(scan_record('x', 'ACACAC' + repeat + 'NNNN' + repeat + 'NN', params).hits)
+    assert [(hit.query_start, hit.subject_start, hit.kmer_length) for hit in hits] == [(7, 42, 31)]
+    hits = list(scan_record('x', repeat + 'NCTG' + repeat[:25] + 'N' + repeat[25:], params).hits)    # N splits the 2nd copy
+    assert [(hit.query_start, hit.subject_start, hit.kmer_length) for hit in hits] == [(1, 36, 25)]
@@ -0,0 +1,31 @@
+from dna_repeat.scan import ScanParams, scan_record
+from dna_repeat.summary import RecordSummary, count_hits, first_hit
+import pytest
+
+seq = 'TGAAAGCCAGGCAAGTTTTCTGCTTCTTTTGCTTCTTAGTCAGGAGATAGATAGATTACGTTTTTAGAGTGCCAGGCAAGTCTTCTGCTT'
+
+def test_count_hits_coverage():
+    summary = count_hits('x', 20, [(0, 10, 4), (2, 12, 4), (15, 16, 3)])   # covers 0-5, 10-18
+    assert summary == RecordSummary(record_id='x', length=20, has_repeat=True, hits=3, covered_bp=15)
+    assert summary.coverage == 0.75
+    assert count_hits('x', 20, []).row(['has_repeat', 'hits', 'covered_bp']) == (False, 0, 0)
+
+def test_first_hit_stops_the_search():
+    consumed = []
+    def spans():
+        for span in [(0, 5, 4), (1, 6, 4)]:
+            consumed.append(span)
+            yield span
+    assert first_hit('x', 10, spans()).has_repeat
+    assert consumed == [(0, 5, 4)]
+    assert not first_hit('x', 10, iter([])).has_repeat
+
+@pytest.mark.parametrize('engine, m', [('exact', 0), ('index', 1), ('numpy', 1), ('2bit', 1)])
+def test_screening_matches_full_scan(engine, m):
+    params = ScanParams(kmer_length=8, allowed_mismatches=m, engine=engine)
+    hits = scan_record('x', seq, params).hits
+    covered = {pos for hit in hits for start in (hit.query_start, hit.subject_start) for pos in range(start, start + 8)}
+    counted = scan_record('x', seq, ScanParams(kmer_length=8, allowed_mismatches=m, engine=engine, count_only=True)).summary
+    assert (counted.hits, counted.covered_bp) == (len(hits), len(covered))
+    assert scan_record('x', seq, ScanParams(kmer_length=8, allowed_mismatches=m, engine=engine, first_hit=True)).summary.has_repeat
+    assert not scan_record('x', seq[:30], ScanParams(kmer_length=12, allowed_mismatches=0, engine=engine, first_hit=True)).summary.has_repeat
@@ -0,0 +1,55 @@
+from dna_repeat.ai import encode_kmers, encode_kmers_both, find_repeats_2bit, find_invert_repeats_2bit, iter_pairs_2bit, iter_invert_pairs_2bit
+from dna_repeat.vectorized import encode_kmers_np, reverse_complement_codes, find_repeats_np, find_invert_repeats_np, iter_pairs_np, iter_invert_pairs_np
+import dna_repeat.vectorized
+from concurrent.futures import ThreadPoolExecutor
+import random
+import pytest
+
+random.seed(3)
+seq = 'TGAAAGCCAGGCAAGTTTTCTGCTTCTTTTGCTTCTTAGTCAGGAGATAGATAGATTACGTTTTTAGAGTGCCAGGCAAGTCTTCTGCTT'
+random_seq = ''.join(random.choice('ACGT') for _ in range(300))
+
+def test_encode_kmers_np():
+    assert encode_kmers_np(seq, 30).tolist() == encode_kmers(seq, 30)
+
+@pytest.mark.parametrize('k', [1, 7, 16, 32])
+def test_reverse_complement_codes(k):
+    assert reverse_complement_codes(encode_kmers_np(random_seq, k), k).tolist() == encode_kmers_both(random_seq, k)[1]
+
+@pytest.mark.parametrize('tile_size', [7, 1024])
+@pytest.mark.parametrize('test_seq', [seq, random_seq])
+@pytest.mark.parametrize('k, m', [(4, 0), (8, 2), (12, 6)])
+def test_same_as_2bit(monkeypatch, tile_size, test_seq, k, m):
+    monkeypatch.setattr(dna_repeat.vectorized, 'TILE_SIZE', tile_size)
+    assert find_repeats_np('x', test_seq, k, m) == find_repeats_2bit('x', test_seq, k, m)
+    assert find_invert_repeats_np('x', test_seq, k, m) == find_invert_repeats_2bit('x', test_seq, k, m)
+
+def test_parallel_tiles_same_as_serial(monkeypatch):
+    monkeypatch.setattr(dna_repeat.vectorized, 'TILE_SIZE', 64)
+    assert find_repeats_np('x', random_seq, 6, 2, jobs=2) == find_repeats_np('x', random_seq, 6, 2)
+    assert find_invert_repeats_np('x', random_seq, 6, 2, jobs=2) == find_invert_repeats_np('x', random_seq, 6, 2)
+
+def test_parallel_strips_bounded(monkeypatch):
+    submitted = []
+    class CountingPool(ThreadPoolExecutor):
+        def submit(self, fn, *args):
+            submitted.append(args)
+            return super().submit(fn, *args)
+    monkeypatch.setattr(dna_repeat.vectorized, 'TILE_SIZE', 16)
+    monkeypatch.setattr(dna_repeat.vectorized, 'ProcessPoolExecutor', CountingPool)
+    pairs = iter_pairs_np(random_seq, 6, 2, jobs=2)
+    next(pairs)
+    assert len(submitted) <= 4                              # of 19 strips
+    assert [next(pairs)] + list(pairs) == list(iter_pairs_np(random_seq, 6, 2))[1:]
+
+def test_band_is_positional_like_other_engines():
+    assert list(iter_pairs_np(random_seq, 6, 2, 10, 100)) == list(iter_pairs_2bit(random_seq, 6, 2, 10, 100))
+    assert list(iter_invert_pairs_np(random_seq, 6, 2, 10, 100)) == list(iter_invert_pairs_2bit(random_seq, 6, 2, 10, 100))
+
+@pytest.mark.parametrize('band', [(0, 0), (0, 50), (10, 100), (150, None)])
+def test_distance_band(monkeypatch, band):
+    monkeypatch.setattr(dna_repeat.vectorized, 'TILE_SIZE', 32)
+    min_distance, max_distance = band
+    in_band = lambda pairs: [(i, p, mm) for i, p, mm in pairs if min_distance <= p - i and (max_distance is None or p - i <= max_distance)]
+    assert list(iter_pairs_np(random_seq, 6, 2, *band, jobs=1)) == in_band(iter_pairs_2bit(random_seq, 6, 2))
+    assert list(iter_invert_pairs_np(random_seq, 6, 2, *band, jobs=2)) == in_band(iter_invert_pairs_2bit(random_seq, 6, 2))